@@ -0,0 +1,127 @@
+import os
+import logging
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ENV_PREFIX = "TAX_RELIEF_"
+
+
+def _env(name: str) -> Optional[str]:
+    value = os.getenv(ENV_PREFIX + name)
+    return value if value not in (None, "") else None
+
+
+def _env_float(name: str, default: float) -> float:
+    value = _env(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid value for {ENV_PREFIX}{name}: {value!r}, using {default}")
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(_env_float(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = _env(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+class Settings:
+    """Runtime configuration, read from TAX_RELIEF_* environment variables"""
+
+    def __init__(self):
+        # Admin endpoints are disabled unless a token is configured
+        self.admin_token: Optional[str] = _env("ADMIN_TOKEN")
+
+        # Seconds between checks of the rules directory; 0 disables the poller
+        self.rules_reload_interval: float = _env_float("RULES_RELOAD_INTERVAL", 30.0)
+
+        # Hugging Face model id or local path of the NLI model
+        self.model_name: str = _env("MODEL") or "facebook/bart-large-mnli"
+
+        # Inference backend chosen at startup: fp32, int8, onnx or onnx-int8.
+        # onnx_path overrides where the exported graph is read from and written to.
+        self.inference_backend: str = (_env("INFERENCE_BACKEND") or "fp32").lower()
+        self.onnx_path: Optional[str] = _env("ONNX_PATH")
+
+        # Optional small NLI model scored first; only pairs within cascade_band of the
+        # relevance threshold are re-scored by the main model
+        self.cascade_model: Optional[str] = _env("CASCADE_MODEL")
+        self.cascade_band: float = _env_float("CASCADE_BAND", 0.15)
+
+        # Micro-batching of NLI pairs across concurrent requests
+        self.batching_enabled: bool = _env_bool("BATCHING", True)
+        self.batch_max_size: int = _env_int("BATCH_MAX_SIZE", 32)
+        self.batch_wait_ms: float = _env_float("BATCH_WAIT_MS", 5.0)
+
+        # Lexical prefilter in front of NLI scoring: bm25, trigram or none
+        self.prefilter_backend: str = (_env("PREFILTER") or "bm25").lower()
+        self.prefilter_top_k: int = _env_int("PREFILTER_TOP_K", 8)
+
+        # Also consider rules from the profession's category and related categories
+        self.related_rules: bool = _env_bool("RELATED_RULES", False)
+
+        # Recommendation cache bounds; 0 disables a limit
+        self.cache_max_entries: int = _env_int("CACHE_MAX_ENTRIES", 10000)
+        self.cache_max_bytes: int = _env_int("CACHE_MAX_BYTES", 64 * 1024 * 1024)
+        self.cache_ttl: float = _env_float("CACHE_TTL", 24 * 60 * 60)
+        self.cache_policy: str = (_env("CACHE_POLICY") or "lru").lower()
+
+        # Optional SQLite result cache shared by workers and kept across restarts
+        self.persistent_cache_path: Optional[str] = _env("PERSISTENT_CACHE")
+        self.persistent_cache_ttl: float = _env_float("PERSISTENT_CACHE_TTL", 30 * 24 * 60 * 60)
+        self.persistent_cache_prune_interval: float = _env_float("PERSISTENT_CACHE_PRUNE_INTERVAL", 60 * 60)
+
+        # Reuse results of near-identical questions: none, hashing or sentence-transformers
+        self.semantic_cache: str = (_env("SEMANTIC_CACHE") or "none").lower()
+        self.semantic_cache_model: Optional[str] = _env("SEMANTIC_CACHE_MODEL")
+        self.semantic_cache_threshold: float = _env_float("SEMANTIC_CACHE_THRESHOLD", 0.9)
+        self.semantic_cache_max_entries: int = _env_int("SEMANTIC_CACHE_MAX_ENTRIES", 1000)
+
+        # Precomputed label scores written by `python -m app.precompute`
+        self.answer_table_path: Optional[str] = _env("ANSWER_TABLE")
+
+        # Requests to load into the cache at startup, most popular first
+        self.cache_warm_file: Optional[str] = _env("CACHE_WARM_FILE")
+        self.cache_warm_top_n: int = _env_int("CACHE_WARM_TOP_N", 500)
+        self.cache_warm_compute: bool = _env_bool("CACHE_WARM_COMPUTE", False)
+
+        # Per-client rate limit; 0 disables it. The sqlite backend shares limits across workers
+        self.rate_limit_per_minute: int = _env_int("RATE_LIMIT_PER_MINUTE", 60)
+        self.rate_limit_burst: int = _env_int("RATE_LIMIT_BURST", 0) or self.rate_limit_per_minute
+        self.rate_limit_backend: str = (_env("RATE_LIMIT_BACKEND") or "memory").lower()
+        self.rate_limit_path: Optional[str] = _env("RATE_LIMIT_PATH")
+        self.rate_limit_max_clients: int = _env_int("RATE_LIMIT_MAX_CLIENTS", 10000)
+
+        # Inference pool sizing; torch_threads=None keeps torch's own default
+        self.inference_workers: int = _env_int("INFERENCE_WORKERS", 1)
+        self.inference_queue_size: int = _env_int("INFERENCE_QUEUE_SIZE", 64)
+        self.torch_threads: Optional[int] = _env_int("TORCH_THREADS", 0) or None
+
+        # Bulk endpoints: requests per call, and requests handed to an inference worker at a time
+        self.bulk_max_requests: int = _env_int("BULK_MAX_REQUESTS", 1000)
+        self.bulk_chunk_size: int = _env_int("BULK_CHUNK_SIZE", 64)
+
+        # Labels scored per step when streaming a single request's recommendations
+        self.stream_chunk_size: int = _env_int("STREAM_CHUNK_SIZE", 4)
+
+        # Default time budget for a request that needs inference; 0 means no deadline
+        self.request_deadline_ms: float = _env_float("REQUEST_DEADLINE_MS", 0.0)
+
+        # Seconds browsers and shared caches may reuse a GET /tax-relief response; 0 makes them revalidate
+        self.http_cache_max_age: int = _env_int("HTTP_CACHE_MAX_AGE", 300)
+
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Get the process-wide Settings instance"""
+    return Settings()
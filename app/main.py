@@ -1,21 +1,68 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
-from app.routers import tax_relief
-from app.middleware.rate_limit import RateLimiter
-from app.middleware.timing import add_timing_middleware
+from starlette.concurrency import run_in_threadpool
+from app.config import get_settings
+from app.routers import admin, metrics, tax_relief
+from app.middleware.compression import AcceptEncodingGZipMiddleware
+from app.middleware.rate_limit import RateLimiter, create_rate_limit_backend
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.timing import TimingMiddleware
+from app.services.cache_warmer import start_cache_warming
+from app.services.http_cache import GZIP_MINIMUM_SIZE
+from app.services.inference_executor import get_inference_executor
+from app.services.llm_service import get_llm_service
+from app.services.profiler import get_profiler
+from app.services.rules_reloader import RulesReloader
+from app.utils.data_loader import get_rules_loader
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the rules snapshot once, before the first request arrives
+    settings = get_settings()
+    rules_loader = get_rules_loader()
+    rules_loader.snapshot
+    reloader = RulesReloader(rules_loader, interval=settings.rules_reload_interval)
+    reloader.start()
+    # Load the model now rather than on the first request; a no-op when pre-forked
+    llm_service = get_llm_service()
+    if settings.cache_warm_file:
+        start_cache_warming(
+            llm_service,
+            settings.cache_warm_file,
+            settings.cache_warm_top_n,
+            compute_missing=settings.cache_warm_compute
+        )
+    inference_executor = get_inference_executor()
+    yield
+    await run_in_threadpool(get_profiler().stop)
+    reloader.stop()
+    inference_executor.shutdown(wait=False)
+
 
 app = FastAPI(
     title="Tax Relief API",
     description="API for UK tax relief recommendations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add Gzip compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(AcceptEncodingGZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
 
 # Add rate limiting
-app.add_middleware(RateLimiter, requests_per_minute=60)
+settings = get_settings()
+app.add_middleware(
+    RateLimiter,
+    requests_per_minute=settings.rate_limit_per_minute,
+    burst=settings.rate_limit_burst,
+    backend=create_rate_limit_backend(
+        settings.rate_limit_backend,
+        settings.rate_limit_path,
+        settings.rate_limit_max_clients
+    )
+)
 
 # Configure CORS
 app.add_middleware(
@@ -26,5 +73,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profile requests sampled by an admin-started profiling session
+app.add_middleware(ProfilingMiddleware)
+
+# Time every request, outside the other middleware; adds Server-Timing
+app.add_middleware(TimingMiddleware)
+
 # Include routers
 app.include_router(tax_relief.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+app.include_router(metrics.router)
@@ -0,0 +1,20 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+
+from app.services.http_cache import accepts_gzip
+
+
+class AcceptEncodingGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that honours q-values: Starlette compresses whenever
+    "gzip" appears in Accept-Encoding, even as `gzip;q=0`.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not accepts_gzip(Headers(scope=scope).get("Accept-Encoding")):
+            responder = IdentityResponder(
+                self.app, self.minimum_size, exclude_content_types=self.exclude_content_types
+            )
+            await responder(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,26 @@
+from app.services.profiler import get_profiler
+
+# Never profiled, so downloading a profile does not show up in it
+EXCLUDED_PREFIXES = ("/api/admin", "/metrics")
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests sampled by an active profiling session, started with
+    POST /api/admin/profile. Does nothing but check a flag otherwise.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.profiler = get_profiler()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.profiler.active
+            or scope["type"] != "http"
+            or scope["path"].startswith(EXCLUDED_PREFIXES)
+            or not self.profiler.sample_request()
+        ):
+            await self.app(scope, receive, send)
+            return
+        await self.profiler.profile_request(self.app(scope, receive, send))
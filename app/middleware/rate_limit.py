@@ -1,38 +1,213 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-import time
-from collections import defaultdict
 import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from starlette.responses import JSONResponse
 
 logger = logging.getLogger(__name__)
 
-class RateLimiter(BaseHTTPMiddleware):
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.requests = defaultdict(list)
-    
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
+
+def _take(tokens: float, updated: float, now: float, capacity: float, rate: float) -> Tuple[float, float]:
+    """
+    Refill a token bucket up to now and try to take one token.
+    Returns the remaining tokens and the seconds until a token is available (0 if one was taken).
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1.0:
+        return tokens - 1.0, 0.0
+    return tokens, (1.0 - tokens) / rate
+
+
+class InMemoryBackend:
+    """Token buckets for the current process, in an LRU table of at most max_clients"""
+
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client: str, capacity: float, rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (capacity, now))
+            tokens, retry_after = _take(tokens, updated, now, capacity, rate)
+            self._buckets[client] = (tokens, now)
+            # The least recently seen client goes; a forgotten client starts with a full bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """
+    Token buckets in a SQLite file, so every worker process on a node shares
+    one limit per client. Buckets idle long enough to have refilled are
+    deleted, which keeps the table bounded by the number of active clients.
+
+    acquire runs on the event loop, so it waits at most lock_timeout for the
+    file's write lock. When another worker holds it longer, the request is
+    counted against a bucket local to this process instead, and cleanup runs
+    on a short-lived thread of its own.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS buckets (
+        client TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL
+    ) WITHOUT ROWID
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_clients: int = 10000,
+        cleanup_interval: float = 60.0,
+        lock_timeout: float = 0.002
+    ):
+        self.path = Path(path)
+        self.max_clients = max_clients
+        self.cleanup_interval = cleanup_interval
+        self.lock_timeout = lock_timeout
+        self.fallbacks = 0
+        self._fallback = InMemoryBackend(max_clients)
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._last_cleanup = 0.0
+        self._cleanup_thread: Optional[threading.Thread] = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection().execute(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # SQLite connections must not be shared with a forked child
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect(self.lock_timeout)
+            self._local.conn = conn
+        return conn
+
+    def _connect(self, timeout: float) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        return conn
+
+    def acquire(self, client: str, capacity: float, rate: float) -> float:
+        # Wall-clock time, since monotonic clocks are not comparable across processes
         now = time.time()
-        
-        # Clean old requests
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if now - req_time < 60
-        ]
-        
-        # Check rate limit
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE client = ?", (client,)).fetchone()
+                tokens, updated = row if row is not None else (capacity, now)
+                tokens, retry_after = _take(tokens, updated, now, capacity, rate)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (client, tokens, updated) VALUES (?, ?, ?)",
+                    (client, tokens, now)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                logger.error(f"Rate limit store unavailable: {str(e)}")
+                return 0.0
+            # Another worker holds the write lock; do not wait for it on the event loop
+            self.fallbacks += 1
+            return self._fallback.acquire(client, capacity, rate)
+        except sqlite3.Error as e:
+            # Fail open: a broken limiter store should not take the API down
+            logger.error(f"Rate limit store unavailable: {str(e)}")
+            return 0.0
+        if now - self._last_cleanup > self.cleanup_interval:
+            self._last_cleanup = now
+            self._start_cleanup(now - capacity / rate)
+        return retry_after
+
+    def _start_cleanup(self, refilled_before: float):
+        if self._cleanup_thread is not None and self._cleanup_thread.is_alive():
+            return
+        self._cleanup_thread = threading.Thread(
+            target=self._cleanup, args=(refilled_before,), name="rate-limit-cleanup", daemon=True
+        )
+        self._cleanup_thread.start()
+
+    def _cleanup(self, refilled_before: float):
+        """Drop buckets that are full again, then the oldest beyond max_clients"""
+        try:
+            conn = self._connect(timeout=5.0)
+            try:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (refilled_before,))
+                conn.execute(
+                    "DELETE FROM buckets WHERE client IN ("
+                    "SELECT client FROM buckets ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                    (self.max_clients,)
+                )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Rate limit store cleanup failed: {str(e)}")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+
+def create_rate_limit_backend(backend: str = "memory", path: Optional[str] = None, max_clients: int = 10000):
+    """Build the rate limit backend named by configuration"""
+    if backend == "memory":
+        return InMemoryBackend(max_clients)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite rate limit backend needs a file path")
+        return SQLiteBackend(path, max_clients)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+class RateLimiter:
+    """
+    Per-client token bucket rate limiting as plain ASGI middleware.
+
+    Each client may burst up to `burst` requests and is then refilled at
+    requests_per_minute. Limited requests get a 429 with Retry-After.
+    """
+
+    def __init__(self, app, requests_per_minute: int = 60, burst: Optional[int] = None, backend=None):
+        self.app = app
+        self.requests_per_minute = requests_per_minute
+        self.capacity = float(burst or requests_per_minute)
+        self.rate = requests_per_minute / 60.0
+        self.backend = backend or InMemoryBackend()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.requests_per_minute <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        retry_after = self.backend.acquire(client_ip, self.capacity, self.rate)
+        if retry_after > 0:
             logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            raise HTTPException(
+            response = JSONResponse(
                 status_code=429,
-                detail="Too many requests. Please try again later."
+                content={"detail": "Too many requests. Please try again later."},
+                headers={"Retry-After": str(math.ceil(retry_after))}
             )
-        
-        # Add new request
-        self.requests[client_ip].append(now)
-        
-        # Process the request
-        response = await call_next(request)
-        return response 
\ No newline at end of file
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
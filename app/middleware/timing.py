@@ -1,16 +1,56 @@
-from fastapi import Request
-import time
 import logging
+import time
+
+from app.services.metrics import REQUEST_SECONDS, collect_timings, server_timing
 
 logger = logging.getLogger(__name__)
 
-async def add_timing_middleware(request: Request, call_next):
-    start_time = time.time()
-    
-    response = await call_next(request)
-    
-    process_time = time.time() - start_time
-    logger.info(f"Request to {request.url.path} took {process_time:.2f} seconds")
-    
-    response.headers["X-Process-Time"] = str(process_time)
-    return response 
\ No newline at end of file
+
+def _route_label(scope) -> str:
+    """Low-cardinality route label: the matched path, or its template if it has parameters"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Routers included with a prefix report the path without it, so use the
+    # request path when the route has no parameters to expand
+    return route.path if "{" in route.path else scope["path"]
+
+
+class TimingMiddleware:
+    """
+    Times each HTTP request as plain ASGI middleware. Stage timings recorded
+    while handling the request are returned in a Server-Timing header, and the
+    total is added to the request latency histogram by route and status.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter_ns()
+        status = 500
+        timings = {}
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = time.perf_counter_ns() - started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(timings, total).encode()))
+                headers.append((b"x-process-time", f"{total / 1e9:.6f}".encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            with collect_timings() as timings:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            total = time.perf_counter_ns() - started
+            REQUEST_SECONDS.observe_ns(total, scope["method"], _route_label(scope), str(status))
+            if total > 1e9:
+                logger.info(f"Request to {scope['path']} took {total / 1e9:.2f} seconds")
@@ -1,7 +1,6 @@
 from pydantic import BaseModel, Field, validator
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 import re
-from app.utils.data_loader import load_tax_rules
 
 class TaxRequest(BaseModel):
     profession: str = Field(
@@ -16,6 +15,17 @@ class TaxRequest(BaseModel):
         max_length=1000,
         description="Questions about tax relief eligibility"
     )
+    include_categories: bool = Field(
+        False,
+        description="Also score generic expense categories and return them in `categories`"
+    )
+
+    @property
+    def questions_text(self) -> str:
+        """Questions as a single string"""
+        if isinstance(self.questions, str):
+            return self.questions
+        return " ".join(self.questions.values())
 
     @validator('profession')
     def validate_profession(cls, v):
@@ -37,3 +47,7 @@ class TaxResponse(BaseModel):
         ...,
         description="List of tax relief recommendations"
     )
+    categories: Optional[Dict[str, float]] = Field(
+        None,
+        description="Relevance of generic expense categories, when requested"
+    )
@@ -0,0 +1,166 @@
+"""
+Precompute an answer table.
+
+Scores every label a request could need (all of the profession's rules and
+the generic categories) for each (profession, scenario) pair, using a pool
+of worker processes that each load the NLI model once, and writes the
+scores as a memory-mappable answer table. Point TAX_RELIEF_ANSWER_TABLE at
+the output and the API answers matching requests without running the model.
+
+Scenarios are a JSON array or JSON-lines file. Entries with a profession
+are scored for that profession only; entries with just questions (or bare
+strings) are scored for every profession given with --profession, by
+default every profession in the rules snapshot.
+
+    python -m app.precompute --scenarios scenarios.jsonl --output answers.bin --workers 4
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# The model each pool process loaded in _init_worker
+_worker_scorer = None
+
+
+def _init_worker(model: str, backend: str, threads: Optional[int]):
+    global _worker_scorer
+    from app.services.nli_scorer import NLIScorer
+
+    _worker_scorer = NLIScorer.from_pretrained(model, backend=backend, threads=threads)
+
+
+def _score_chunk(pairs: Sequence[Tuple[str, str]], batch_size: int) -> List[float]:
+    scores = []
+    for start in range(0, len(pairs), batch_size):
+        scores.extend(_worker_scorer.score(pairs[start:start + batch_size]))
+    return scores
+
+
+class _Unloaded:
+    """Stands in for the model in the main process, which only resolves rules"""
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+
+    def score(self, pairs):
+        raise RuntimeError("The precompute main process does not score")
+
+
+def load_scenarios(path: str, professions: Sequence[str]) -> List[Tuple[str, str]]:
+    """Distinct (profession, questions) pairs, validated and cleaned as the API does"""
+    from app.models.tax_request import TaxRequest
+    from app.services.cache_warmer import load_warm_list
+
+    requests: Dict[str, Tuple[str, str]] = {}
+    for entry in load_warm_list(path, 0):
+        if isinstance(entry, str):
+            entry = {"questions": entry}
+        targets = [entry["profession"]] if entry.get("profession") else professions
+        for profession in targets:
+            try:
+                request = TaxRequest(profession=profession, questions=entry["questions"])
+            except (KeyError, ValidationError):
+                logger.warning(f"Skipping invalid scenario {entry!r}")
+                break
+            key = f"{request.profession.lower()}\0{request.questions_text.lower()}"
+            requests.setdefault(key, (request.profession, request.questions_text))
+    return list(requests.values())
+
+
+def precompute(
+    scenarios: str,
+    output: str,
+    model: str,
+    backend: str = "fp32",
+    professions: Optional[Sequence[str]] = None,
+    workers: int = 2,
+    batch_size: int = 64,
+    chunk_size: int = 512,
+    threads: Optional[int] = None
+) -> dict:
+    """Score the scenarios and write the answer table; returns its header"""
+    from app.services.answer_table import write_answer_table
+    from app.services.label_planner import plan_labels
+    from app.services.llm_service import HYPOTHESIS_TEMPLATE, LLMService, _premise
+
+    model_id = model if backend == "fp32" else f"{model}@{backend}"
+    # Only rules resolution is used, so no cache file or answer table is opened
+    service = LLMService(scorer=_Unloaded(model_id), shared_tiers=False)
+    snapshot = service.rules_loader.snapshot
+    requests = load_scenarios(scenarios, professions or sorted(snapshot.professions))
+
+    rows, pairs = [], []
+    for profession, questions in requests:
+        _, rules, rules_version = service._resolve_rules(profession)
+        if not rules:
+            continue
+        labels = plan_labels(rules, include_generic=True).labels
+        premise = _premise(profession, questions)
+        rows.append((profession, questions, rules_version, labels))
+        pairs.extend((premise, HYPOTHESIS_TEMPLATE.format(label)) for label in labels)
+    logger.info(f"Scoring {len(pairs)} pairs for {len(rows)} of {len(requests)} requests with {workers} workers")
+
+    started = time.perf_counter()
+    scores: List[float] = []
+    chunks = [pairs[start:start + chunk_size] for start in range(0, len(pairs), chunk_size)]
+    # spawn, so workers do not inherit the main process's threads and locks
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=max(1, workers),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(model, backend, threads)
+    ) as pool:
+        for done, chunk_scores in enumerate(pool.map(_score_chunk, chunks, [batch_size] * len(chunks)), 1):
+            scores.extend(chunk_scores)
+            if done % 10 == 0 or done == len(chunks):
+                logger.info(f"Scored {len(scores)}/{len(pairs)} pairs")
+    elapsed = time.perf_counter() - started
+    logger.info(f"Scored {len(pairs)} pairs in {elapsed:.1f}s ({len(pairs) / elapsed if elapsed else 0:.0f} pairs/s)")
+
+    table_rows, position = [], 0
+    for profession, questions, rules_version, labels in rows:
+        table_rows.append((profession, questions, rules_version, labels, scores[position:position + len(labels)]))
+        position += len(labels)
+    return write_answer_table(output, model_id, snapshot.version, table_rows)
+
+
+def main():
+    from app.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", required=True, help="JSON or JSON-lines scenario file")
+    parser.add_argument("--output", required=True, help="answer table to write")
+    parser.add_argument("--model", default=settings.model_name)
+    parser.add_argument("--backend", default=settings.inference_backend)
+    parser.add_argument(
+        "--profession", action="append", dest="professions",
+        help="profession for scenarios without one; repeatable (default: every profession with rules)"
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--chunk-size", type=int, default=512, help="pairs sent to a worker at a time")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per worker")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    header = precompute(
+        args.scenarios, args.output, args.model, args.backend, args.professions,
+        args.workers, args.batch_size, args.chunk_size, args.threads
+    )
+    print(json.dumps({key: header[key] for key in ("model_id", "rules_snapshot", "rows", "scores")}))
+    print(f"Wrote {Path(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.routers import tax_relief
+from app.services.inference_executor import get_inference_executor
+from app.services.llm_service import get_llm_service
+from app.services.profiler import MAX_DURATION, get_profiler
+from app.utils.data_loader import get_rules_loader
+
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Guard for admin endpoints; disabled unless TAX_RELIEF_ADMIN_TOKEN is set"""
+    admin_token = get_settings().admin_token
+    if admin_token is None:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(verify_admin_token)])
+
+
+def _rules_status() -> dict:
+    snapshot = get_rules_loader().snapshot
+    return {
+        "version": snapshot.version,
+        "rules": len(snapshot),
+        "professions": len(snapshot.professions),
+        "loaded_at": snapshot.loaded_at,
+    }
+
+
+@router.get("/rules")
+async def get_rules_status():
+    """
+    Report the version of the rules snapshot currently being served.
+    """
+    return _rules_status()
+
+
+@router.post("/rules/reload")
+async def reload_rules(force: bool = False):
+    """
+    Rebuild the rules snapshot from disk and swap it in if anything changed.
+    """
+    # Parsing and indexing happen on a worker thread, not the event loop
+    changed = await run_in_threadpool(get_rules_loader().reload, force)
+    status = _rules_status()
+    status["changed_professions"] = sorted(changed)
+    return status
+
+
+@router.get("/inference")
+async def get_inference_stats():
+    """
+    Report inference queue depth, wait times and coalesced duplicate requests.
+    """
+    stats = get_inference_executor().stats()
+    stats["single_flight"] = tax_relief.inflight.stats()
+    cascade = get_llm_service().cascade
+    if cascade is not None:
+        stats["cascade"] = cascade.stats()
+    return stats
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Report recommendation cache size, hit ratio and evictions.
+    """
+    return get_llm_service().cache_stats()
+
+
+@router.post("/profile")
+async def start_profiling(
+    duration: float = Query(60.0, gt=0, le=MAX_DURATION, description="Seconds to profile for"),
+    fraction: float = Query(0.1, ge=0, le=1, description="Share of requests to run under cProfile"),
+    cpu: bool = Query(True, description="cProfile sampled requests"),
+    stacks: bool = Query(True, description="Sample every thread's stack"),
+    memory: bool = Query(False, description="Trace allocations with tracemalloc"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Milliseconds between stack samples")
+):
+    """
+    Start a profiling session in this worker process, replacing any previous results.
+    """
+    # Starting stops the previous session, which joins its sampler and may snapshot memory
+    return await run_in_threadpool(get_profiler().start, duration, fraction, cpu, stacks, memory, interval_ms)
+
+
+@router.post("/profile/stop")
+async def stop_profiling():
+    """
+    End the profiling session early, keeping its results.
+    """
+    # Collecting a tracemalloc snapshot can take a while
+    return await run_in_threadpool(get_profiler().stop)
+
+
+@router.get("/profile")
+async def get_profiling_status(top: int = Query(0, ge=0, le=200)):
+    """
+    Report the profiling session and, with top > 0, its top functions by cumulative time.
+    """
+    profiler = get_profiler()
+    status = profiler.status()
+    if top:
+        status["top_functions"] = profiler.top_functions(top)
+    return status
+
+
+@router.get("/profile/stacks", response_class=PlainTextResponse)
+async def download_stacks(kind: str = Query("cpu", pattern="^(cpu|memory)$")):
+    """
+    Collapsed stacks for flamegraph tools: stack samples, or live bytes allocated by stack.
+    """
+    profiler = get_profiler()
+    body = profiler.collapsed_stacks() if kind == "cpu" else profiler.collapsed_memory()
+    return PlainTextResponse(body)
+
+
+@router.get("/profile/pstats")
+async def download_pstats():
+    """
+    The merged cProfile table of sampled requests, readable with pstats or snakeviz.
+    """
+    dump = get_profiler().pstats_dump()
+    if dump is None:
+        raise HTTPException(status_code=404, detail="No requests have been profiled")
+    return Response(
+        dump,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="profile.pstats"'}
+    )
@@ -0,0 +1,54 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.routers import tax_relief
+from app.services import metrics
+from app.services.inference_executor import get_inference_executor
+from app.services.llm_service import get_llm_service
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _component_samples():
+    """Counters and gauges kept by the cache, inference pool and single-flight table"""
+    cache = get_llm_service().cache_stats()
+    inference = get_inference_executor().stats()
+    single_flight = tax_relief.inflight.stats()
+    samples = [
+        ("tax_relief_cache_hits_total", "counter", "Recommendation cache hits.", cache["hits"]),
+        ("tax_relief_cache_misses_total", "counter", "Recommendation cache misses.", cache["misses"]),
+        ("tax_relief_cache_evictions_total", "counter", "Entries evicted from the cache.", cache["evictions"]),
+        ("tax_relief_cache_entries", "gauge", "Entries in the recommendation cache.", cache["entries"]),
+        ("tax_relief_cache_bytes", "gauge", "Estimated bytes held by the cache.", cache["bytes"]),
+        ("tax_relief_inference_queue_depth", "gauge", "Jobs waiting for an inference worker.", inference["queue_depth"]),
+        ("tax_relief_inference_running", "gauge", "Jobs running on inference workers.", inference["running"]),
+        ("tax_relief_inference_completed_total", "counter", "Inference jobs completed.", inference["completed"]),
+        ("tax_relief_inference_rejected_total", "counter", "Jobs rejected with a full queue.", inference["rejected"]),
+        ("tax_relief_inference_shed_total", "counter", "Jobs rejected as unable to meet their deadline.", inference["shed"]),
+        ("tax_relief_inference_expired_total", "counter", "Jobs dropped after their deadline passed in the queue.", inference["expired"]),
+        ("tax_relief_inference_cancelled_total", "counter", "Queued jobs dropped because the client went away.", inference["cancelled"]),
+        ("tax_relief_coalesced_requests_total", "counter", "Requests that joined an identical in-flight request.", single_flight["coalesced"]),
+    ]
+    if "precomputed" in cache:
+        samples += [
+            ("tax_relief_answer_table_hits_total", "counter", "Requests answered from the answer table.", cache["precomputed"]["hits"]),
+            ("tax_relief_answer_table_misses_total", "counter", "Answer table lookups that fell through.", cache["precomputed"]["misses"]),
+        ]
+    cascade = get_llm_service().cascade
+    if cascade is not None:
+        stats = cascade.stats()
+        samples += [
+            ("tax_relief_cascade_pairs_total", "counter", "Pairs scored by the small model first.", stats["pairs"]),
+            ("tax_relief_cascade_escalated_total", "counter", "Pairs re-scored by the large model.", stats["escalated"]),
+        ]
+    return samples
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """
+    Stage and request latency histograms plus component counters, in Prometheus text format.
+    """
+    return PlainTextResponse(metrics.expose(_component_samples()), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,33 +1,396 @@
-from fastapi import APIRouter, Depends
-from typing import List
+import asyncio
+import json
+import logging
+import time
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Union
+
+from app.config import get_settings
 
 from app.models.tax_request import TaxRequest, TaxResponse
-from app.utils.data_loader import load_tax_rules
-from app.services.llm_service import LLMService
+from app.services.http_cache import accepts_gzip, encode_result, etag_matches
+from app.services.inference_executor import DeadlineExceededError, InferenceQueueFullError, get_inference_executor
+from app.services.llm_service import (
+    ERROR_MESSAGE, NO_RULES_MESSAGE, RecommendationResult, RecommendationStream, get_llm_service
+)
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-llm_service = LLMService()
+inflight = SingleFlight()
+
+
+def deadline_budget(deadline_ms: Optional[float]) -> Optional[float]:
+    """Seconds a request may spend on inference: the header value, else the configured default"""
+    if deadline_ms is None or deadline_ms <= 0:
+        deadline_ms = get_settings().request_deadline_ms
+    return deadline_ms / 1000 if deadline_ms > 0 else None
+
+
+async def recommend(
+    profession: str,
+    questions: str,
+    include_categories: bool = False,
+    budget: Optional[float] = None
+) -> RecommendationResult:
+    """
+    Serve from cache, or join an identical in-flight request, or run inference.
+    Raises InferenceQueueFullError when the inference queue is full or the
+    request cannot be answered within budget seconds.
+    """
+    llm_service = get_llm_service()
+    # Only the in-memory cache is checked on the event loop
+    memory_checked, result = llm_service.lookup_memory(profession, questions, include_categories)
+    if result is not None:
+        return result
+    # Mapping, the disk, answer table and semantic tiers run on a worker thread,
+    # outside the inference queue, so none of them can be rejected with 503
+    cache_key, result = await run_in_threadpool(
+        llm_service.lookup, profession, questions, include_categories, memory_checked
+    )
+    if result is not None:
+        return result
+    if cache_key is None:
+        # No rules match, so there is nothing to infer
+        return RecommendationResult([NO_RULES_MESSAGE])
+
+    async def run_inference() -> RecommendationResult:
+        return await get_inference_executor().run_within(
+            budget,
+            llm_service.recommend,
+            profession=profession,
+            questions=questions,
+            include_categories=include_categories,
+            cache_checked=True
+        )
+
+    # Identical concurrent requests share one inference. If it was shed for the
+    # first request's deadline, the others try again with their own budgets.
+    return await inflight.do(cache_key, run_inference, retry_on=(DeadlineExceededError,))
+
+def _cached_response(
+    result: RecommendationResult,
+    if_none_match: Optional[str],
+    accept_encoding: Optional[str],
+    cache_control: str
+) -> Response:
+    """
+    The result's stored body, or 304 when the client already has it. The ETag
+    hashes the body, which only changes with the rules, model or request.
+    """
+    if result.recommendations == [ERROR_MESSAGE]:
+        return JSONResponse({"recommendations": result.recommendations}, headers={"Cache-Control": "no-store"})
+    encoded = encode_result(result)
+    headers = {"ETag": encoded.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, encoded.etag):
+        return Response(status_code=304, headers=headers)
+    if encoded.gzipped is not None and accepts_gzip(accept_encoding):
+        # GZipMiddleware leaves responses that already have a Content-Encoding alone
+        headers["Content-Encoding"] = "gzip"
+        return Response(encoded.gzipped, media_type="application/json", headers=headers)
+    return Response(encoded.body, media_type="application/json", headers=headers)
+
 
-@router.post("/tax-relief", response_model=TaxResponse)
-async def get_tax_relief(request: TaxRequest):
+async def _recommend_or_503(request: TaxRequest, deadline_ms: Optional[float]) -> RecommendationResult:
+    try:
+        return await recommend(
+            request.profession,
+            request.questions_text,
+            request.include_categories,
+            budget=deadline_budget(deadline_ms)
+        )
+    except InferenceQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is busy. Please try again later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+@router.post("/tax-relief", response_model=TaxResponse, response_model_exclude_none=True)
+async def get_tax_relief(
+    request: TaxRequest,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    x_request_deadline_ms: Optional[float] = Header(None)
+):
     """
     Generate tax relief recommendations based on profession and questions.
+    Send the ETag of an earlier response in If-None-Match to get 304 if it is unchanged.
+    """
+    result = await _recommend_or_503(request, x_request_deadline_ms)
+    # POST responses are not stored by shared caches; clients revalidate with the ETag
+    return _cached_response(result, if_none_match, accept_encoding, "no-cache")
+
+
+@router.get("/tax-relief", response_model=TaxResponse, response_model_exclude_none=True)
+async def get_tax_relief_cacheable(
+    profession: str = Query(..., description="The profession to get tax relief recommendations for"),
+    questions: str = Query(..., description="Questions about tax relief eligibility"),
+    include_categories: bool = Query(False, description="Also score generic expense categories"),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    x_request_deadline_ms: Optional[float] = Header(None)
+):
+    """
+    The same recommendations as POST /tax-relief, with Cache-Control so
+    browsers, CDNs and reverse proxies can serve repeats.
     """
-    # Load tax rules
-    tax_rules = load_tax_rules()
-    
-    # Convert questions to string if it's a dictionary
-    questions = (
-        request.questions 
-        if isinstance(request.questions, str) 
-        else " ".join(request.questions.values())
+    try:
+        request = TaxRequest(profession=profession, questions=questions, include_categories=include_categories)
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("query", *error["loc"])} for error in e.errors(include_url=False)
+        ])
+    result = await _recommend_or_503(request, x_request_deadline_ms)
+    max_age = get_settings().http_cache_max_age
+    cache_control = f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+    return _cached_response(result, if_none_match, accept_encoding, cache_control)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _ndjson_event(event: str, data: dict) -> str:
+    return json.dumps({"event": event, **data}) + "\n"
+
+
+async def _stream_recommendations(
+    request: TaxRequest,
+    budget: Optional[float],
+    encode: Callable[[str, dict], str]
+) -> AsyncIterator[str]:
+    llm_service = get_llm_service()
+    deadline = time.perf_counter() + budget if budget is not None else None
+    # Resolving and the cache tiers can block, so they run off the event loop too
+    result = await run_in_threadpool(
+        llm_service.stream,
+        request.profession,
+        request.questions_text,
+        request.include_categories,
+        chunk_size=get_settings().stream_chunk_size
     )
-    
-    # Generate recommendations
-    recommendations = llm_service.generate_recommendations(
-        profession=request.profession,
-        questions=questions,
-        tax_rules=tax_rules
+    if isinstance(result, RecommendationStream):
+        stream = result
+        yield encode("recommendation", {"text": stream.intro})
+        matched = False
+        for index in range(len(stream.chunks)):
+            remaining = max(0.0, deadline - time.perf_counter()) if deadline is not None else None
+            try:
+                # A client disconnect cancels this await, so later chunks are never queued
+                matches = await get_inference_executor().run_within(
+                    remaining, stream.score_chunk, index, kind="stream"
+                )
+            except InferenceQueueFullError as e:
+                yield encode("error", {
+                    "detail": "Service is busy. Please try again later.",
+                    "retry_after": e.retry_after
+                })
+                return
+            except Exception as e:
+                logger.error(f"Error streaming recommendations: {str(e)}")
+                yield encode("error", {"detail": ERROR_MESSAGE})
+                return
+            for text in matches:
+                matched = True
+                yield encode("recommendation", {"text": text})
+        # Caching the result writes to disk, may encode it and gzips its body
+        result = await run_in_threadpool(stream.finish)
+        if not matched:
+            for text in result.recommendations[1:]:
+                yield encode("recommendation", {"text": text})
+    else:
+        for text in result.recommendations:
+            yield encode("recommendation", {"text": text})
+
+    done = {"recommendations": result.recommendations}
+    if result.categories is not None:
+        done["categories"] = result.categories
+    yield encode("done", done)
+
+
+@router.post("/tax-relief/stream")
+async def stream_tax_relief(
+    request: TaxRequest,
+    accept: Optional[str] = Header(None),
+    x_request_deadline_ms: Optional[float] = Header(None)
+):
+    """
+    Recommendations for one request, streamed as they are found: the intro
+    first, then matching rules in order of prefilter confidence, then a done
+    event with the complete response. Server-Sent Events by default, or
+    NDJSON when the client accepts application/x-ndjson.
+    """
+    budget = deadline_budget(x_request_deadline_ms)
+    if accept and "application/x-ndjson" in accept:
+        return StreamingResponse(
+            _stream_recommendations(request, budget, _ndjson_event), media_type="application/x-ndjson"
+        )
+    return StreamingResponse(
+        _stream_recommendations(request, budget, _sse_event),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    
-    return TaxResponse(recommendations=recommendations)
+
+
+# Times a bulk chunk waits for inference queue space before the job gives up
+MAX_CHUNK_RETRIES = 10
+
+
+async def recommend_chunk(
+    requests: List[TaxRequest],
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+) -> List[RecommendationResult]:
+    """
+    Recommendations for a chunk of requests in input order, scored together on
+    one inference worker. Bulk work waits for queue space instead of failing,
+    up to MAX_CHUNK_RETRIES times and only while the client is still connected;
+    after that the InferenceQueueFullError is raised.
+    """
+    if not requests:
+        return []
+    items = [(r.profession, r.questions_text, r.include_categories) for r in requests]
+    for attempt in range(MAX_CHUNK_RETRIES + 1):
+        try:
+            return await get_inference_executor().run(
+                get_llm_service().recommend_many,
+                items,
+                kind="bulk",
+                chunk_size=get_settings().batch_max_size
+            )
+        except InferenceQueueFullError as e:
+            if attempt == MAX_CHUNK_RETRIES or (is_disconnected is not None and await is_disconnected()):
+                raise
+            await asyncio.sleep(e.retry_after)
+    return []
+
+
+@router.post("/tax-relief/batch", response_model=List[TaxResponse], response_model_exclude_none=True)
+async def get_tax_relief_batch(request: Request, requests: List[TaxRequest] = Body(...)):
+    """
+    Generate tax relief recommendations for many requests, returned in input order.
+    """
+    settings = get_settings()
+    if len(requests) > settings.bulk_max_requests:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.bulk_max_requests} requests per batch; use /tax-relief/batch/stream for more."
+        )
+
+    size = max(1, settings.bulk_chunk_size)
+    responses = []
+    for start in range(0, len(requests), size):
+        try:
+            results = await recommend_chunk(requests[start:start + size], request.is_disconnected)
+        except InferenceQueueFullError as e:
+            raise HTTPException(
+                status_code=503,
+                detail="Service is busy. Please try again later.",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        for result in results:
+            responses.append(TaxResponse(recommendations=result.recommendations, categories=result.categories))
+    return responses
+
+
+def _parse_request(line: bytes) -> Union[TaxRequest, str]:
+    """A TaxRequest, or the reason the line is not one"""
+    try:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            return "Expected a JSON object"
+        return TaxRequest(**data)
+    except ValueError as e:
+        return str(e)
+
+
+async def _request_lines(request: Request) -> AsyncIterator[bytes]:
+    """The request body split into lines as it arrives, never held whole"""
+    pending = b""
+    async for chunk in request.stream():
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+async def _stream_batch(request: Request) -> AsyncIterator[str]:
+    size = max(1, get_settings().bulk_chunk_size)
+    entries: List[Union[TaxRequest, str]] = []
+    valid = 0
+    first_index = 0
+    upload_read = False
+
+    async def flush() -> AsyncIterator[str]:
+        valid_entries = [e for e in entries if isinstance(e, TaxRequest)]
+        # is_disconnected() reads from the request and discards upload chunks it
+        # gets, so until the upload is read a disconnect only shows in request.stream()
+        is_disconnected = request.is_disconnected if upload_read else None
+        results = iter(await recommend_chunk(valid_entries, is_disconnected))
+        for offset, entry in enumerate(entries):
+            line = {"index": first_index + offset}
+            if isinstance(entry, TaxRequest):
+                result = next(results)
+                line["recommendations"] = result.recommendations
+                if result.categories is not None:
+                    line["categories"] = result.categories
+            else:
+                line["error"] = entry
+            yield json.dumps(line) + "\n"
+
+    try:
+        async for line in _request_lines(request):
+            if not line.strip():
+                continue
+            entry = _parse_request(line)
+            entries.append(entry)
+            valid += isinstance(entry, TaxRequest)
+            if valid >= size:
+                async for output in flush():
+                    yield output
+                first_index += len(entries)
+                entries = []
+                valid = 0
+        upload_read = True
+        if entries:
+            async for output in flush():
+                yield output
+    except InferenceQueueFullError as e:
+        # Results up to first_index were sent; the client can resume from there
+        yield json.dumps({
+            "index": first_index,
+            "error": "Service is busy. Please try again later.",
+            "retry_after": e.retry_after
+        }) + "\n"
+    except ClientDisconnect:
+        logger.info(f"Client disconnected from a bulk stream after {first_index} results")
+
+
+class _UploadStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse whose body iterator is still reading the request.
+    StreamingResponse would otherwise read the same receive channel to watch
+    for disconnects, taking upload chunks away from the iterator. Disconnects
+    surface through request.stream() while uploading, and is_disconnected() after.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+@router.post("/tax-relief/batch/stream")
+async def stream_tax_relief_batch(request: Request):
+    """
+    Bulk recommendations as NDJSON: one request object per input line, one
+    result line per input in the same order, written as each chunk is scored.
+    The upload is read as it arrives, so its size is not limited by memory.
+    """
+    return _UploadStreamingResponse(_stream_batch(request), media_type="application/x-ndjson")
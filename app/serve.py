@@ -0,0 +1,123 @@
+"""
+Pre-fork server.
+
+Loads the rules snapshot and the NLI model once in a master process, then
+forks worker processes that inherit them copy-on-write, so model weights
+are held in memory once per node rather than once per worker. Every
+worker runs its own uvicorn server on the shared listening socket; the
+master restarts workers that die and stops them all on SIGTERM/SIGINT.
+
+    python -m app.serve --workers 4 --port 8000
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _preload():
+    """Build everything workers share before the first fork"""
+    from app.main import app
+    from app.services.llm_service import get_llm_service
+    from app.utils.data_loader import get_rules_loader
+
+    started = time.perf_counter()
+    get_rules_loader().snapshot
+    get_llm_service()
+    # Move everything loaded so far out of the collector's reach: a GC pass
+    # in a worker would otherwise write to, and so copy, the shared pages
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded model and rules in {time.perf_counter() - started:.1f}s")
+    return app
+
+
+def _run_worker(app, sock: socket.socket, log_level: str):
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, workers: int = 2, log_level: str = "info"):
+    app = _preload()
+    sock = _bind(host, port)
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock, log_level)
+            except BaseException:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"Serving on http://{host}:{port} with {workers} pre-forked workers")
+    for _ in range(max(1, workers)):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        # Back off if workers die straight after starting
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)
+        spawn()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+    serve(args.host, args.port, args.workers, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
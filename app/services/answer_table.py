@@ -0,0 +1,179 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TXANSWER"
+FORMAT_VERSION = 1
+# magic, format version, header length
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 8
+
+# Per row: key string, rules version string, first label/score slot, label count
+_ROW_DTYPE = np.dtype([("key", "<u4"), ("rules_version", "<u4"), ("start", "<u4"), ("count", "<u4")])
+
+
+def normalize(text: str) -> str:
+    """Case- and whitespace-insensitive form of a profession or question, as cache keys use"""
+    return " ".join(text.lower().split())
+
+
+def row_key(profession: str, questions: str) -> str:
+    return f"{normalize(profession)}\0{normalize(questions)}"
+
+
+def write_answer_table(
+    path: str,
+    model_id: str,
+    rules_snapshot: str,
+    rows: Iterable[Tuple[str, str, str, Sequence[str], Sequence[float]]]
+) -> dict:
+    """
+    Write rows of (profession, questions, rules version, labels, scores) as a
+    versioned binary answer table. The file is written next to path and renamed
+    into place, so running workers keep reading the old one until restarted.
+
+    Layout, little-endian, every section aligned to 8 bytes:
+        magic, format version, header length, JSON header
+        string offsets (uint32, one more than strings), UTF-8 string data
+        rows (key, rules version, start, count as uint32)
+        row labels (uint32 string ids), scores (float32), aligned with row labels
+    """
+    strings: Dict[str, int] = {}
+
+    def intern(text: str) -> int:
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    row_records, label_ids, scores = [], [], []
+    for profession, questions, rules_version, labels, label_scores in rows:
+        row_records.append((intern(row_key(profession, questions)), intern(rules_version), len(label_ids), len(labels)))
+        label_ids.extend(intern(label) for label in labels)
+        scores.extend(label_scores)
+
+    encoded = [text.encode() for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    sections = {
+        "string_offsets": offsets.tobytes(),
+        "string_data": b"".join(encoded),
+        "rows": np.array(row_records, dtype=_ROW_DTYPE).tobytes(),
+        "row_labels": np.array(label_ids, dtype="<u4").tobytes(),
+        "scores": np.array(scores, dtype="<f4").tobytes(),
+    }
+
+    header = {
+        "model_id": model_id,
+        "rules_snapshot": rules_snapshot,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "strings": len(encoded),
+        "rows": len(row_records),
+        "scores": len(scores),
+        "sections": {},
+    }
+    # Section offsets depend on the header length, so settle it first
+    header_bytes = b""
+    for _ in range(3):
+        position = _aligned(_PREAMBLE.size + len(header_bytes))
+        for name, data in sections.items():
+            header["sections"][name] = [position, len(data)]
+            position = _aligned(position + len(data))
+        header_bytes = json.dumps(header, sort_keys=True).encode()
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, data in sections.items():
+            offset, _ = header["sections"][name]
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    os.replace(temporary, path)
+    return header
+
+
+def _aligned(position: int) -> int:
+    return (position + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class AnswerTable:
+    """
+    Read-only, memory-mapped precomputed label scores for common requests.
+
+    The score and index arrays are numpy views onto the mapped file, so every
+    worker process shares the same physical pages. Only the string table and
+    the row index are decoded into memory when the table is opened.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an answer table")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has answer table format {version}, expected {FORMAT_VERSION}")
+        self.header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        self.model_id: str = self.header["model_id"]
+        self.rules_snapshot: str = self.header["rules_snapshot"]
+
+        offsets = self._section("string_offsets", "<u4")
+        data_start, _ = self.header["sections"]["string_data"]
+        self._strings: List[str] = [
+            self._mmap[data_start + int(start):data_start + int(end)].decode()
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+        self._rows = self._section("rows", _ROW_DTYPE)
+        self._row_labels = self._section("row_labels", "<u4")
+        self._scores = self._section("scores", "<f4")
+        self._index = {self._strings[key]: row for row, key in enumerate(self._rows["key"].tolist())}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _section(self, name: str, dtype) -> np.ndarray:
+        offset, length = self.header["sections"][name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._mmap, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def get(self, profession: str, questions: str, rules_version: str) -> Optional[Dict[str, float]]:
+        """Label scores for the request, or None if it is not in the table or its rules changed"""
+        row = self._index.get(row_key(profession, questions))
+        if row is not None:
+            key, version, start, count = self._rows[row].tolist()
+            if self._strings[version] == rules_version:
+                labels = self._row_labels[start:start + count].tolist()
+                scores = self._scores[start:start + count].tolist()
+                with self._lock:
+                    self.hits += 1
+                return {self._strings[label]: score for label, score in zip(labels, scores)}
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "model_id": self.model_id,
+            "created_at": self.header.get("created_at"),
+            "rows": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
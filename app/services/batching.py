@@ -0,0 +1,141 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence
+
+from app.services.metrics import add_request_timings, collect_timings
+from app.services.nli_scorer import NLIScorer, Pair
+from app.services.profiler import Profiler, current_profiler
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    __slots__ = ("pairs", "future", "timings", "profiler")
+
+    def __init__(self, pairs: Sequence[Pair]):
+        self.pairs = pairs
+        self.future: Future = Future()
+        self.timings: Dict[str, int] = {}
+        # Set when the caller's request was sampled for profiling
+        self.profiler: Optional[Profiler] = current_profiler()
+
+
+class BatchScheduler:
+    """
+    Coalesces NLI pairs from concurrent callers into shared forward passes.
+
+    The first waiting job opens a window of max_wait_ms; every job that arrives
+    before it closes, or until max_batch_size pairs are collected, is scored in
+    the same padded batch and the scores are scattered back to each caller.
+    """
+
+    def __init__(self, scorer: NLIScorer, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.scorer = scorer
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._batches = 0
+        self._pairs = 0
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_running(self):
+        """
+        Start the batching thread on first use, and again in a forked child,
+        which inherits the scheduler but not the parent's thread.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name="nli-batcher", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    @property
+    def model_id(self) -> str:
+        return self.scorer.model_id
+
+    def score(self, pairs: Sequence[Pair]) -> List[float]:
+        """Entailment probability for every pair, blocking until its batch has run"""
+        if not pairs:
+            return []
+        self._ensure_running()
+        job = _Job(pairs)
+        self._queue.put(job)
+        scores = job.future.result()
+        # The batch's tokenize and forward time counts towards every request in it
+        add_request_timings(job.timings)
+        return scores
+
+    def stats(self) -> dict:
+        return {
+            "batches": self._batches,
+            "pairs": self._pairs,
+            "avg_batch_size": self._pairs / self._batches if self._batches else 0.0,
+        }
+
+    def close(self):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: _Job) -> List[_Job]:
+        jobs = [first]
+        collected = len(first.pairs)
+        deadline = time.perf_counter() + self.max_wait
+        while collected < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                # Put the sentinel back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            jobs.append(job)
+            collected += len(job.pairs)
+        return jobs
+
+    def _score_batch(self, pairs: List[Pair]) -> List[float]:
+        scores: List[float] = []
+        for start in range(0, len(pairs), self.max_batch_size):
+            scores.extend(self.scorer.score(pairs[start:start + self.max_batch_size]))
+            self._batches += 1
+        return scores
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            jobs = self._collect(first)
+            pairs = [pair for job in jobs for pair in job.pairs]
+            # A batch holding any profiled request is profiled as a whole
+            profiler = next((job.profiler for job in jobs if job.profiler is not None), None)
+            try:
+                with collect_timings() as timings:
+                    if profiler is not None:
+                        scores = profiler.call(self._score_batch, pairs)
+                    else:
+                        scores = self._score_batch(pairs)
+                self._pairs += len(pairs)
+            except Exception as e:
+                logger.error(f"Batched NLI forward pass failed: {str(e)}")
+                for job in jobs:
+                    job.future.set_exception(e)
+                continue
+
+            offset = 0
+            for job in jobs:
+                job.timings = timings
+                job.future.set_result(scores[offset:offset + len(job.pairs)])
+                offset += len(job.pairs)
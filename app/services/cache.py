@@ -0,0 +1,308 @@
+import logging
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """Rough deep size in bytes of strings, numbers and containers"""
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    slots = getattr(type(value), "__slots__", None)
+    if slots:
+        return sys.getsizeof(value) + sum(estimate_size(getattr(value, name, None)) for name in slots)
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "tags")
+
+    def __init__(self, value: Any, size: int, expires_at: float, tags: tuple):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+class LRUPolicy:
+    """Evicts the least recently used entry"""
+
+    def __init__(self, max_entries: Optional[int]):
+        self._order: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def record(self, key: Hashable):
+        """Note a lookup of key, hit or miss"""
+
+    def on_hit(self, key: Hashable):
+        self._order.move_to_end(key)
+
+    def on_insert(self, key: Hashable):
+        self._order[key] = None
+
+    def on_remove(self, key: Hashable):
+        self._order.pop(key, None)
+
+    def victim(self) -> Hashable:
+        return next(iter(self._order))
+
+
+class _FrequencySketch:
+    """Count-min sketch of 4-bit counters, halved periodically so popularity ages"""
+
+    def __init__(self, capacity: int):
+        width = 64
+        while width < capacity:
+            width *= 2
+        self._mask = width - 1
+        self._rows = [[0] * width for _ in range(4)]
+        self._seeds = [random.getrandbits(32) for _ in range(4)]
+        self._additions = 0
+        self._sample_size = 10 * width
+
+    def increment(self, key: Hashable):
+        for row, seed in zip(self._rows, self._seeds):
+            index = hash((seed, key)) & self._mask
+            if row[index] < 15:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            for row in self._rows:
+                for i, count in enumerate(row):
+                    row[i] = count >> 1
+            self._additions //= 2
+
+    def frequency(self, key: Hashable) -> int:
+        return min(row[hash((seed, key)) & self._mask] for row, seed in zip(self._rows, self._seeds))
+
+
+class TinyLFUPolicy:
+    """
+    W-TinyLFU: new entries enter a small LRU window and overflow into the
+    probation segment of a segmented-LRU main area. When the cache must evict,
+    the newest arrival from the window is kept only if it has been requested
+    more often than the main area's oldest entry.
+    """
+
+    def __init__(self, max_entries: Optional[int]):
+        self._capacity = max_entries
+        self._window_share = 0.01
+        self._protected_share = 0.8
+        self._sketch = _FrequencySketch(max_entries or 10000)
+        self._window: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._probation: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._protected: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._candidate: Optional[Hashable] = None
+
+    def _size(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def _limit(self, share: float) -> int:
+        return max(1, int((self._capacity or self._size()) * share))
+
+    def record(self, key: Hashable):
+        self._sketch.increment(key)
+
+    def on_hit(self, key: Hashable):
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self._limit(self._protected_share):
+                demoted, _ = self._protected.popitem(last=False)
+                self._probation[demoted] = None
+
+    def on_insert(self, key: Hashable):
+        self._window[key] = None
+        if len(self._window) > self._limit(self._window_share):
+            overflow, _ = self._window.popitem(last=False)
+            self._probation[overflow] = None
+            self._candidate = overflow
+
+    def on_remove(self, key: Hashable):
+        self._window.pop(key, None)
+        self._probation.pop(key, None)
+        self._protected.pop(key, None)
+        if key == self._candidate:
+            self._candidate = None
+
+    def victim(self) -> Hashable:
+        candidate, self._candidate = self._candidate, None
+        if self._probation:
+            oldest = next(iter(self._probation))
+            if candidate is not None and candidate != oldest and candidate in self._probation:
+                # Admit the newcomer only if it is more popular than what it would replace
+                if self._sketch.frequency(candidate) > self._sketch.frequency(oldest):
+                    return oldest
+                return candidate
+            return oldest
+        if self._protected:
+            return next(iter(self._protected))
+        return next(iter(self._window))
+
+
+EVICTION_POLICIES = {
+    "lru": LRUPolicy,
+    "tinylfu": TinyLFUPolicy,
+}
+
+
+class BoundedCache:
+    """
+    Thread-safe in-memory cache bounded by entry count and/or total bytes,
+    with a per-entry TTL, pluggable eviction and tag-based invalidation.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = 10000,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        policy: str = "lru",
+        sizer: Callable[[Any], int] = estimate_size
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown cache eviction policy: {policy}")
+        self.max_entries = max_entries or None
+        self.max_bytes = max_bytes or None
+        self.ttl = ttl or None
+        self.policy_name = policy
+        self._policy = EVICTION_POLICIES[policy](self.max_entries)
+        self._sizer = sizer
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._bytes = 0
+        self._last_purge = time.monotonic()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, record=False) is not None
+
+    def get(self, key: Hashable, record: bool = True) -> Any:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            if record:
+                self._policy.record(key)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                if record:
+                    self._misses += 1
+                return None
+            if record:
+                self._hits += 1
+                self._policy.on_hit(key)
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = ()):
+        size = self._sizer(value)
+        if self.max_bytes and size > self.max_bytes:
+            logger.warning(f"Not caching {size} byte value larger than the cache itself")
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(value, size, expires_at, tuple(tags))
+            self._entries[key] = entry
+            self._bytes += size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._policy.on_insert(key)
+            self._evict()
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self._invalidations += 1
+            return True
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Drop every entry stored with the given tag"""
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "policy": self.policy_name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
+
+    def _over_limit(self) -> bool:
+        return bool(
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        )
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for key in [k for k, entry in self._entries.items() if entry.expires_at < now]:
+            self._remove(key)
+            self._expirations += 1
+
+    def _evict(self):
+        if not self._over_limit():
+            return
+        if self.ttl and time.monotonic() - self._last_purge > min(self.ttl / 10, 60):
+            # Expired entries go first, before anything still live is evicted
+            self._purge_expired()
+            self._last_purge = time.monotonic()
+        while self._over_limit():
+            self._remove(self._policy.victim())
+            self._evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        self._policy.on_remove(key)
@@ -0,0 +1,65 @@
+import json
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+from pydantic import ValidationError
+
+from app.models.tax_request import TaxRequest
+
+logger = logging.getLogger(__name__)
+
+
+def load_warm_list(path: str, top_n: int) -> List[dict]:
+    """
+    Read up to top_n requests to pre-warm, most popular first, from a JSON array
+    or JSON-lines file of {"profession", "questions", "include_categories"} objects.
+    """
+    text = Path(path).read_text()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        entries = json.loads(stripped)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return entries[:top_n] if top_n > 0 else entries
+
+
+def warm_cache(llm_service, path: str, top_n: int, compute_missing: bool = False) -> Counter:
+    """Load the top_n requests listed in path into the recommendation cache"""
+    try:
+        entries = load_warm_list(path, top_n)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read cache warm list {path}: {str(e)}")
+        return Counter()
+
+    outcomes = Counter()
+    for entry in entries:
+        try:
+            request = TaxRequest(**entry)
+            outcomes[llm_service.warm(
+                request.profession,
+                request.questions_text,
+                request.include_categories,
+                compute_missing=compute_missing
+            )] += 1
+        except ValidationError:
+            outcomes["invalid"] += 1
+        except Exception as e:
+            logger.error(f"Cache warming failed for {entry!r}: {str(e)}")
+            outcomes["failed"] += 1
+    logger.info(f"Warmed recommendation cache from {path}: {dict(outcomes)}")
+    return outcomes
+
+
+def start_cache_warming(llm_service, path: str, top_n: int, compute_missing: bool = False) -> threading.Thread:
+    """Warm the cache on a background thread so startup is not delayed"""
+    thread = threading.Thread(
+        target=warm_cache,
+        args=(llm_service, path, top_n, compute_missing),
+        name="cache-warmer",
+        daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,66 @@
+import logging
+import threading
+from typing import List, Sequence
+
+from app.services.nli_scorer import Pair
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeScorer:
+    """
+    Two-tier NLI scoring: every pair is scored by a small model first, and only
+    pairs whose score lies within band of the decision threshold are re-scored
+    by the large model. Clear-cut pairs keep the small model's score.
+
+    Escalated pairs from one call are scored by the large model together, so
+    the scheduler's micro-batches carry over to the second tier.
+    """
+
+    def __init__(self, small, large, threshold: float = 0.3, band: float = 0.15):
+        self.small = small
+        self.large = large
+        self.threshold = threshold
+        self.band = band
+        self._lock = threading.Lock()
+        self._pairs = 0
+        self._escalated = 0
+
+    @property
+    def model_id(self) -> str:
+        # Cascaded scores differ from either model's alone, so they get their own cache rows
+        return f"{self.small.model_id}>{self.large.model_id}@{self.band:g}"
+
+    def uncertain(self, score: float) -> bool:
+        """Whether a small-model score is too close to the threshold to trust"""
+        return abs(score - self.threshold) <= self.band
+
+    def score(self, pairs: Sequence[Pair]) -> List[float]:
+        """Entailment probability for every pair, in input order"""
+        if not pairs:
+            return []
+        scores = self.small.score(pairs)
+        escalate = [i for i, score in enumerate(scores) if self.uncertain(score)]
+        if escalate:
+            for i, score in zip(escalate, self.large.score([pairs[i] for i in escalate])):
+                scores[i] = score
+        with self._lock:
+            self._pairs += len(pairs)
+            self._escalated += len(escalate)
+        return scores
+
+    def stats(self) -> dict:
+        """Share of pairs settled by each tier"""
+        with self._lock:
+            pairs, escalated = self._pairs, self._escalated
+        return {
+            "small_model": self.small.model_id,
+            "large_model": self.large.model_id,
+            "threshold": self.threshold,
+            "band": self.band,
+            "pairs": pairs,
+            "small_final": pairs - escalated,
+            "escalated": escalated,
+            "small_hit_rate": (pairs - escalated) / pairs if pairs else 0.0,
+            "escalation_rate": escalated / pairs if pairs else 0.0,
+        }
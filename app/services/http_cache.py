@@ -0,0 +1,76 @@
+import gzip
+import hashlib
+import json
+from typing import Optional
+
+# Bodies smaller than this are sent uncompressed, as GZipMiddleware does
+GZIP_MINIMUM_SIZE = 1000
+
+
+class EncodedResponse:
+    """
+    The JSON body of a recommendation result, its ETag and, for large bodies,
+    a gzip copy. Built once per cached result so cache hits skip serialization
+    and compression.
+    """
+    __slots__ = ("body", "etag", "gzipped")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        # Weak, since the gzip and identity encodings share it
+        self.etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.gzipped: Optional[bytes] = None
+        if len(body) >= GZIP_MINIMUM_SIZE:
+            # mtime=0 keeps the compressed bytes identical across workers and restarts
+            self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def encode_result(result) -> EncodedResponse:
+    """The result's encoded response, built on first use and kept on the result"""
+    if result.encoded is None:
+        content = {"recommendations": result.recommendations}
+        if result.categories is not None:
+            content["categories"] = result.categories
+        # Same serialization as FastAPI's JSONResponse
+        body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+        result.encoded = EncodedResponse(body)
+    return result.encoded
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def _quality(params: str) -> float:
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip: listed with a non-zero
+    q-value, or not listed while `*` is, so `gzip;q=0` refuses it.
+    """
+    if not accept_encoding:
+        return False
+    wildcard = None
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding in ("gzip", "x-gzip"):
+            return _quality(params) > 0
+        if coding == "*":
+            wildcard = _quality(params) > 0
+    return bool(wildcard)
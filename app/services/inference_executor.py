@@ -0,0 +1,217 @@
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+from app.config import get_settings
+from app.services.metrics import record
+from app.services.profiler import call_profiled
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Jobs are timed per kind, since a bulk chunk or a stream chunk says little about
+# how long a single interactive request takes
+JOB_KINDS = ("interactive", "stream", "bulk")
+
+
+class InferenceQueueFullError(Exception):
+    """Raised when the inference queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(InferenceQueueFullError):
+    """Raised when a job is not expected to finish, or did not start, within its deadline"""
+
+    def __init__(self, retry_after: int):
+        Exception.__init__(self, "Inference cannot finish before the request deadline")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Bounded worker pool that keeps model inference off the event loop.
+
+    Admission estimates the wait as the expected service time of every queued
+    and running job, each by the recent average of its own kind, so a queue of
+    bulk work is weighed at bulk cost without making single requests look slow.
+    """
+
+    def __init__(self, workers: int = 1, max_queue: int = 64, intra_op_threads: Optional[int] = None):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.intra_op_threads = intra_op_threads
+        if intra_op_threads:
+            import torch
+            torch.set_num_threads(intra_op_threads)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._rejected = 0
+        self._shed = 0
+        self._expired = 0
+        self._cancelled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_ewma = 0.0
+        self._service_ewma: Dict[str, float] = {kind: 0.0 for kind in JOB_KINDS}
+        self._service_samples: Dict[str, int] = {kind: 0 for kind in JOB_KINDS}
+        # Expected seconds of work in queued and running jobs
+        self._backlog = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def estimated_wait(self) -> float:
+        """Rough seconds a newly submitted job would wait before starting"""
+        with self._lock:
+            return self._backlog / self.workers
+
+    async def run(self, fn: Callable[..., T], *args, kind: str = "interactive", **kwargs) -> T:
+        """Run fn on an inference worker, rejecting when the queue is full"""
+        return await self.run_within(None, fn, *args, kind=kind, **kwargs)
+
+    async def run_within(
+        self,
+        budget: Optional[float],
+        fn: Callable[..., T],
+        *args,
+        kind: str = "interactive",
+        **kwargs
+    ) -> T:
+        """
+        Run fn on an inference worker if it can finish within budget seconds.
+        Jobs expected to overrun are rejected up front, and jobs whose deadline
+        passes while queued are dropped instead of being run for nobody.
+        kind is one of JOB_KINDS and selects whose timings estimate this job.
+        """
+        with self._lock:
+            wait = self._backlog / self.workers
+            retry_after = max(1, math.ceil(wait))
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFullError(retry_after)
+            expected = self._service_ewma[kind]
+            if budget is not None and wait + expected > budget:
+                self._shed += 1
+                raise DeadlineExceededError(retry_after)
+            self._queued += 1
+            self._submitted += 1
+            self._backlog += expected
+        enqueued_at = time.perf_counter()
+        deadline = enqueued_at + budget if budget is not None else None
+        # Run in a copy of the caller's context so stage timings reach its request
+        context = contextvars.copy_context()
+        future = self._executor.submit(
+            context.run, self._run_timed, enqueued_at, deadline, kind, expected, fn, args, kwargs
+        )
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A caller that went away frees its queue slot; a job already running finishes
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+                    self._backlog = max(0.0, self._backlog - expected)
+                    self._cancelled += 1
+            raise
+
+    def _run_timed(
+        self,
+        enqueued_at: float,
+        deadline: Optional[float],
+        kind: str,
+        expected: float,
+        fn: Callable[..., T],
+        args,
+        kwargs
+    ) -> T:
+        started_at = time.perf_counter()
+        wait = started_at - enqueued_at
+        record("queue", int(wait * 1e9))
+        with self._lock:
+            self._queued -= 1
+            if deadline is not None and started_at > deadline:
+                self._expired += 1
+                self._backlog = max(0.0, self._backlog - expected)
+                raise DeadlineExceededError(max(1, math.ceil(self._wait_ewma)))
+            self._running += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._wait_ewma = wait if self._started == 0 else 0.8 * self._wait_ewma + 0.2 * wait
+            self._started += 1
+        try:
+            return call_profiled(fn, *args, **kwargs)
+        finally:
+            service = time.perf_counter() - started_at
+            record("inference", int(service * 1e9))
+            with self._lock:
+                self._running -= 1
+                # Clamped, since float error must not leave work behind on an idle pool
+                self._backlog = max(0.0, self._backlog - expected)
+                ewma = self._service_ewma[kind]
+                self._service_ewma[kind] = (
+                    service if self._service_samples[kind] == 0 else 0.8 * ewma + 0.2 * service
+                )
+                self._service_samples[kind] += 1
+                self._completed += 1
+
+    def stats(self) -> dict:
+        """Queue depth and wait-time counters for sizing the pool"""
+        with self._lock:
+            started = self._started
+            return {
+                "workers": self.workers,
+                "intra_op_threads": self.intra_op_threads,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "shed": self._shed,
+                "expired": self._expired,
+                "cancelled": self._cancelled,
+                "avg_wait_seconds": self._wait_total / started if started else 0.0,
+                "max_wait_seconds": self._wait_max,
+                "recent_wait_seconds": self._wait_ewma,
+                "recent_service_seconds": self._service_ewma["interactive"],
+                "recent_service_seconds_by_kind": dict(self._service_ewma),
+                "backlog_seconds": self._backlog,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_inference_executor: Optional[InferenceExecutor] = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """Get the process-wide InferenceExecutor, created from settings on first use"""
+    global _inference_executor
+    if _inference_executor is None:
+        settings = get_settings()
+        _inference_executor = InferenceExecutor(
+            workers=settings.inference_workers,
+            max_queue=settings.inference_queue_size,
+            intra_op_threads=settings.torch_threads,
+        )
+        logger.info(
+            f"Inference executor: {settings.inference_workers} workers, "
+            f"queue size {settings.inference_queue_size}, torch threads {settings.torch_threads or 'default'}"
+        )
+    return _inference_executor
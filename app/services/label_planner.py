@@ -0,0 +1,52 @@
+from typing import Dict, Iterable, Tuple
+
+from app.utils.data_loader import TaxRule
+
+# Broad expense categories, only scored when a caller asks for them
+GENERIC_CATEGORY_LABELS: Tuple[str, ...] = (
+    "work uniform expenses",
+    "professional equipment costs",
+    "vehicle and travel expenses",
+    "home office costs",
+    "professional memberships",
+    "training and education expenses",
+    "tools and supplies",
+    "licensing and registration fees",
+    "protective equipment",
+    "workspace rental",
+)
+
+
+def rule_label(rule: TaxRule) -> str:
+    """Candidate label text for a rule"""
+    return f"{rule.name}: {rule.criteria}"
+
+
+class LabelPlan:
+    """The exact set of candidate labels a request needs scored"""
+    __slots__ = ("rule_labels", "generic_labels")
+
+    def __init__(self, rule_labels: Tuple[str, ...], generic_labels: Tuple[str, ...] = ()):
+        self.rule_labels = rule_labels
+        self.generic_labels = generic_labels
+
+    @property
+    def labels(self) -> Tuple[str, ...]:
+        """Every label to score, each exactly once"""
+        return self.rule_labels + tuple(
+            label for label in self.generic_labels if label not in self.rule_labels
+        )
+
+    def rule_scores(self, scores: Dict[str, float]) -> Iterable[Tuple[str, float]]:
+        """(label, score) for every rule label, in rule order"""
+        return ((label, scores[label]) for label in self.rule_labels)
+
+    def generic_scores(self, scores: Dict[str, float]) -> Dict[str, float]:
+        return {label: scores[label] for label in self.generic_labels}
+
+
+def plan_labels(rules: Iterable[TaxRule], include_generic: bool = False) -> LabelPlan:
+    """Plan the labels whose scores a request will actually consume"""
+    rule_labels = tuple(dict.fromkeys(rule_label(rule) for rule in rules))
+    generic_labels = GENERIC_CATEGORY_LABELS if include_generic else ()
+    return LabelPlan(rule_labels, generic_labels)
@@ -1,134 +1,726 @@
-from typing import List, Dict, Optional
-from transformers import pipeline
+from typing import Hashable, List, Dict, NamedTuple, Optional, Set, Tuple, Union
 from fastapi import HTTPException
 import logging
-from functools import lru_cache
 import hashlib
 import json
+import threading
+from collections import OrderedDict
+from app.config import get_settings
+from app.services.answer_table import AnswerTable
+from app.services.batching import BatchScheduler
+from app.services.cache import BoundedCache
+from app.services.cascade import CascadeScorer
+from app.services.http_cache import EncodedResponse, encode_result
+from app.services.label_planner import LabelPlan, plan_labels, rule_label
+from app.services.metrics import span
+from app.services.nli_scorer import NLIScorer, Pair
+from app.services.persistent_cache import SQLiteResultCache
+from app.services.prefilter import RulePrefilter
+from app.services.semantic_cache import SemanticCache, create_encoder
 from app.services.profession_mapper import ProfessionMapper
-from app.utils.data_loader import TaxRulesLoader
+from app.utils.data_loader import RulesSnapshot, TaxRule, get_rules_loader
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+HYPOTHESIS_TEMPLATE = "This text describes {}"
+RELEVANCE_THRESHOLD = 0.3
+# Recently resolved professions kept for event-loop cache probes
+RESOLUTION_MEMO_SIZE = 4096
+NO_RULES_MESSAGE = "Sorry, we couldn't find any tax relief recommendations for your profession."
+ERROR_MESSAGE = "Sorry, there was an error processing your request. Please try again."
+NO_MATCH_MESSAGE = (
+    "While we have information about your profession, none of the "
+    "available tax relief options seem to directly match your situation. "
+    "Consider consulting with a tax professional for personalized advice."
+)
+
+
+def _premise(profession: str, questions: str) -> str:
+    """The NLI premise for a request"""
+    return (
+        f"I am a {profession} and want to know about tax relief for: {questions}. "
+        "This includes equipment, travel, uniforms, and professional expenses."
+    )
+
+
+def _intro(mapped_profession: str) -> str:
+    """Human readable intro, the first recommendation of every answered request"""
+    return (
+        f"Based on our data regarding the {mapped_profession} profession, "
+        "here are some potential tax relief opportunities you may be eligible for:\n\n"
+    )
+
+
+def _format_match(criteria: str, score: float) -> str:
+    return f"• {criteria}\n  (Relevance: {score:.0%})"
+
+
+# (mapped profession, candidate rules, version of those rules)
+Resolution = Tuple[str, Tuple[TaxRule, ...], str]
+
+
+class RequestKey(NamedTuple):
+    """A request as the cache tiers beyond the exact key see it"""
+    profession: str
+    questions: str
+    rules_version: str
+    include_categories: bool
+
+
+class RecommendationResult:
+    """Recommendations for one request, plus optional generic category scores"""
+    __slots__ = ("recommendations", "categories", "encoded")
+
+    def __init__(self, recommendations: List[str], categories: Optional[Dict[str, float]] = None):
+        self.recommendations = recommendations
+        self.categories = categories
+        # HTTP body, ETag and gzip copy, set before caching so hits reuse them
+        self.encoded: Optional[EncodedResponse] = None
+
+
 class LLMService:
-    def __init__(self):
+    def __init__(self, scorer=None, shared_tiers: bool = True):
+        """
+        scorer: anything with score(pairs) -> entailment probabilities.
+        Defaults to the configured NLI model, micro-batched across requests.
+        shared_tiers: open the configured persistent cache, semantic cache and
+        answer table; tools that only need rules resolution turn them off.
+        """
         try:
-            logger.info("Initializing LLM model...")
-            self.classifier = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli",
-                device=-1  # CPU
+            settings = get_settings()
+            self.cascade: Optional[CascadeScorer] = scorer if isinstance(scorer, CascadeScorer) else None
+            if scorer is None:
+                logger.info("Initializing LLM model...")
+                scorer = NLIScorer.from_pretrained(
+                    settings.model_name,
+                    backend=settings.inference_backend,
+                    onnx_path=settings.onnx_path,
+                    threads=settings.torch_threads
+                )
+                if settings.cascade_model:
+                    logger.info(f"Cascading from small model {settings.cascade_model}")
+                    small = NLIScorer.from_pretrained(
+                        settings.cascade_model,
+                        backend=settings.inference_backend,
+                        threads=settings.torch_threads
+                    )
+                    scorer = self.cascade = CascadeScorer(
+                        small, scorer, threshold=RELEVANCE_THRESHOLD, band=settings.cascade_band
+                    )
+                if settings.batching_enabled and settings.inference_workers > 1:
+                    scorer = BatchScheduler(
+                        scorer,
+                        max_batch_size=settings.batch_max_size,
+                        max_wait_ms=settings.batch_wait_ms
+                    )
+            self.scorer = scorer
+            self._cache = BoundedCache(
+                max_entries=settings.cache_max_entries,
+                max_bytes=settings.cache_max_bytes,
+                ttl=settings.cache_ttl,
+                policy=settings.cache_policy
             )
-            self._cache = {}
+            self.model_id = getattr(scorer, "model_id", "") or type(scorer).__name__
+            self._persistent_cache: Optional[SQLiteResultCache] = None
+            if shared_tiers and settings.persistent_cache_path:
+                self._persistent_cache = SQLiteResultCache(
+                    settings.persistent_cache_path,
+                    model_id=self.model_id,
+                    ttl=settings.persistent_cache_ttl,
+                    prune_interval=settings.persistent_cache_prune_interval
+                )
+                logger.info(f"Using persistent result cache at {settings.persistent_cache_path}")
+            self._semantic_cache: Optional[SemanticCache] = None
+            if shared_tiers and settings.semantic_cache != "none":
+                self._semantic_cache = SemanticCache(
+                    create_encoder(settings.semantic_cache, settings.semantic_cache_model),
+                    threshold=settings.semantic_cache_threshold,
+                    max_entries=settings.semantic_cache_max_entries
+                )
+                logger.info(f"Using {settings.semantic_cache} semantic cache, threshold {settings.semantic_cache_threshold}")
+            self._answer_table: Optional[AnswerTable] = None
+            if shared_tiers and settings.answer_table_path:
+                self._answer_table = self._open_answer_table(settings.answer_table_path)
             self.profession_mapper = ProfessionMapper()
-            self.rules_loader = TaxRulesLoader()
+            self.rules_loader = get_rules_loader()
+            self._resolutions: "OrderedDict[str, Tuple[RulesSnapshot, Resolution]]" = OrderedDict()
+            self._resolutions_lock = threading.Lock()
+            self.rules_loader.add_reload_listener(self._on_rules_reloaded)
+            self.include_related_rules = settings.related_rules
+            self.prefilter = RulePrefilter(settings.prefilter_backend, settings.prefilter_top_k)
+            self.prefilter.build(self.rules_loader.snapshot)
             logger.info("LLM model initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize LLM model: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
 
-    def _generate_cache_key(self, profession: str, questions: str) -> str:
+    def _open_answer_table(self, path: str) -> Optional[AnswerTable]:
+        """The answer table at path, if it was scored by the model this service uses"""
+        try:
+            table = AnswerTable(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not open answer table {path}: {str(e)}")
+            return None
+        if table.model_id != self.model_id:
+            logger.warning(
+                f"Ignoring answer table {path}: scored with {table.model_id}, serving {self.model_id}"
+            )
+            return None
+        logger.info(f"Using answer table {path} with {len(table)} precomputed requests")
+        return table
+
+    def _generate_cache_key(
+        self,
+        profession: str,
+        questions: str,
+        rules_version: str,
+        include_categories: bool = False
+    ) -> str:
         """Generate a unique cache key for the request"""
-        content = f"{profession.lower()}:{questions.lower()}"
+        profession = " ".join(profession.lower().split())
+        questions = " ".join(questions.lower().split())
+        content = f"{rules_version}:{profession}:{questions}"
+        if include_categories:
+            content += ":categories"
         return hashlib.md5(content.encode()).hexdigest()
 
-    @lru_cache(maxsize=1000)
-    def _classify_text(self, questions: str, criteria_tuple: tuple) -> dict:
-        """Cached classification method for zero-shot classification"""
-        # Add common tax relief phrases as candidate labels
-        candidate_labels = [
-            "work uniform expenses",
-            "professional equipment costs",
-            "vehicle and travel expenses",
-            "home office costs",
-            "professional memberships",
-            "training and education expenses",
-            "tools and supplies",
-            "licensing and registration fees",
-            "protective equipment",
-            "workspace rental"
-        ]
-        
-        # Add specific criteria from rules
-        candidate_labels.extend(criteria_tuple)
-        
-        return self.classifier(
-            sequences=questions,
-            candidate_labels=candidate_labels,
-            multi_label=True,
-            hypothesis_template="This text describes {}"
+    def _resolve_rules(self, profession: str) -> Resolution:
+        """
+        Map the profession and find its candidate rules.
+        Returns (mapped profession, rules, version of those rules).
+        """
+        snapshot = self.rules_loader.snapshot
+        resolution = self._recent_resolution(profession, snapshot)
+        if resolution is not None:
+            return resolution
+        with span("mapping"):
+            mapped_profession = self.profession_mapper.get_matching_profession(profession)
+        with span("rules"):
+            rules = self.rules_loader.load_rules_for_profession(mapped_profession, self.profession_mapper)
+            if rules and self.include_related_rules:
+                rules = self._with_related_rules(mapped_profession, rules, snapshot)
+            resolution = (mapped_profession, rules, self._rules_version(snapshot, mapped_profession, rules))
+        with self._resolutions_lock:
+            self._resolutions[profession] = (snapshot, resolution)
+            if len(self._resolutions) > RESOLUTION_MEMO_SIZE:
+                self._resolutions.popitem(last=False)
+        return resolution
+
+    def _recent_resolution(self, profession: str, snapshot: RulesSnapshot) -> Optional[Resolution]:
+        """The profession's resolution against this snapshot, if one was made recently"""
+        with self._resolutions_lock:
+            entry = self._resolutions.get(profession)
+            if entry is None or entry[0] is not snapshot:
+                return None
+            self._resolutions.move_to_end(profession)
+            return entry[1]
+
+    def _rules_version(self, snapshot: RulesSnapshot, mapped_profession: str, rules: Tuple[TaxRule, ...]) -> str:
+        """
+        Content hash of the rules a profession is scored against. Cache keys use it
+        instead of the snapshot version so a reload only misses for professions
+        whose rules changed.
+
+        The memo lives on the snapshot, and an entry is only reused for the
+        same rules, so a thread still resolving against a replaced snapshot
+        can never hand its hash to requests served from the new one.
+        """
+        key = ("rules_version", mapped_profession, self.include_related_rules)
+        memo = snapshot.memo.get(key)
+        if memo is not None and (memo[0] is rules or memo[0] == rules):
+            return memo[1]
+        digest = hashlib.sha1()
+        for rule in rules:
+            digest.update(f"{rule.profession}\0{rule.name}\0{rule.criteria}\n".encode())
+        version = digest.hexdigest()[:12]
+        snapshot.memo[key] = (rules, version)
+        return version
+
+    def cache_stats(self) -> dict:
+        """Hit, miss and eviction counters of the recommendation cache"""
+        stats = self._cache.stats()
+        if self._persistent_cache is not None:
+            stats["persistent"] = self._persistent_cache.stats()
+        if self._semantic_cache is not None:
+            stats["semantic"] = self._semantic_cache.stats()
+        if self._answer_table is not None:
+            stats["precomputed"] = self._answer_table.stats()
+        return stats
+
+    def _cache_tags(self, mapped_profession: str, rules: Tuple[TaxRule, ...]) -> Set[str]:
+        """Every profession whose rules a result was scored against"""
+        return {mapped_profession} | {rule.profession for rule in rules}
+
+    def _semantic_partition(self, mapped_profession: str, request: RequestKey) -> Hashable:
+        return mapped_profession, request.rules_version, request.include_categories
+
+    def _remember(self, request: Optional[RequestKey], mapped_profession: str, cache_key: str):
+        """Index the questions of a newly cached result in the semantic cache"""
+        if request is not None and self._semantic_cache is not None:
+            partition = self._semantic_partition(mapped_profession, request)
+            self._semantic_cache.add(partition, request.questions, cache_key)
+
+    def _lookup(
+        self,
+        cache_key: str,
+        mapped_profession: str,
+        rules: Tuple[TaxRule, ...],
+        record: bool = True,
+        request: Optional[RequestKey] = None
+    ) -> Optional[RecommendationResult]:
+        """
+        Check the in-memory cache, then the persistent one, promoting disk hits to
+        memory. Given the request itself, also check the precomputed answer table
+        and then the semantic cache for a near-identical question.
+        """
+        with span("cache"):
+            return self._lookup_tiers(cache_key, mapped_profession, rules, record, request)
+
+    def _lookup_tiers(
+        self,
+        cache_key: str,
+        mapped_profession: str,
+        rules: Tuple[TaxRule, ...],
+        record: bool,
+        request: Optional[RequestKey]
+    ) -> Optional[RecommendationResult]:
+        result = self._cache.get(cache_key, record=record)
+        if result is not None:
+            return result
+        if request is not None and self._answer_table is not None:
+            result = self._precomputed(cache_key, mapped_profession, rules, request)
+            if result is not None:
+                return result
+        if self._persistent_cache is not None:
+            stored = self._persistent_cache.get(cache_key)
+            if stored is not None:
+                result = RecommendationResult(*stored)
+                encode_result(result)
+                self._cache.set(cache_key, result, tags=self._cache_tags(mapped_profession, rules))
+                self._remember(request, mapped_profession, cache_key)
+                return result
+        if request is None or self._semantic_cache is None:
+            return None
+        return self._semantic_lookup(cache_key, mapped_profession, rules, request)
+
+    def _precomputed(
+        self,
+        cache_key: str,
+        mapped_profession: str,
+        rules: Tuple[TaxRule, ...],
+        request: RequestKey
+    ) -> Optional[RecommendationResult]:
+        """The result built from the answer table's scores, if it has every label the request needs"""
+        scores = self._answer_table.get(request.profession, request.questions, request.rules_version)
+        if scores is None:
+            return None
+        candidate_rules = self.prefilter.select(request.questions, rules, self.rules_loader.snapshot)
+        plan = plan_labels(candidate_rules, include_generic=request.include_categories)
+        if any(label not in scores for label in plan.labels):
+            return None
+        return self._finish(
+            cache_key, mapped_profession, rules, plan, scores, request.include_categories, request
+        )
+
+    def _semantic_lookup(
+        self,
+        cache_key: str,
+        mapped_profession: str,
+        rules: Tuple[TaxRule, ...],
+        request: RequestKey
+    ) -> Optional[RecommendationResult]:
+        """The result of the nearest earlier question, stored under this request's key too"""
+        partition = self._semantic_partition(mapped_profession, request)
+        match = self._semantic_cache.find(partition, request.questions)
+        if match is None:
+            return None
+        similar_key, similarity = match
+        result = self._cache.get(similar_key, record=False)
+        if result is None and self._persistent_cache is not None:
+            stored = self._persistent_cache.get(similar_key)
+            result = RecommendationResult(*stored) if stored is not None else None
+        if result is None:
+            # The matched result was evicted or invalidated since it was indexed
+            self._semantic_cache.discard(partition, similar_key)
+            return None
+        logger.info(f"Semantic cache hit for {mapped_profession} (similarity {similarity:.2f})")
+        # Repeats of this exact question are then plain cache hits
+        encode_result(result)
+        self._cache.set(cache_key, result, tags=self._cache_tags(mapped_profession, rules))
+        return result
+
+    def warm(self, profession: str, questions: str, include_categories: bool = False, compute_missing: bool = False) -> str:
+        """
+        Bring one request into the in-memory cache.
+        Returns 'memory', 'persistent', 'computed' or 'missing'.
+        """
+        mapped_profession, rules, rules_version = self._resolve_rules(profession)
+        if not rules:
+            return "missing"
+        cache_key = self._generate_cache_key(profession, questions, rules_version, include_categories)
+        if self._cache.get(cache_key, record=False) is not None:
+            return "memory"
+        if self._lookup(cache_key, mapped_profession, rules, record=False) is not None:
+            self._remember(RequestKey(profession, questions, rules_version, include_categories), mapped_profession, cache_key)
+            return "persistent"
+        if not compute_missing:
+            return "missing"
+        self.recommend(profession, questions, include_categories, cache_checked=True)
+        return "computed"
+
+    def invalidate_professions(self, professions: Set[str]) -> int:
+        """Drop cached recommendations that were scored against these professions' rules"""
+        if self._semantic_cache is not None:
+            self._semantic_cache.invalidate_professions(professions)
+        return sum(self._cache.invalidate_tag(profession) for profession in professions)
+
+    def _on_rules_reloaded(self, changed: Set[str], old_snapshot, new_snapshot):
+        # Keys carry the rules version, so this only frees memory early
+        dropped = self.invalidate_professions(changed)
+        logger.info(f"Invalidated {dropped} cached recommendations after rules reload")
+
+    def _with_related_rules(
+        self,
+        mapped_profession: str,
+        rules: Tuple[TaxRule, ...],
+        snapshot: RulesSnapshot
+    ) -> Tuple[TaxRule, ...]:
+        """Extend a profession's rules with those of its category and related categories"""
+        category = self.profession_mapper.get_profession_category(mapped_profession)
+        if category is None:
+            return rules
+        candidates = list(rules)
+        for name in [category] + self.profession_mapper.get_related_categories(category):
+            candidates.extend(snapshot.rules_for_category(name))
+        return tuple(dict.fromkeys(candidates))
+
+    def lookup_memory(
+        self,
+        profession: str,
+        questions: str,
+        include_categories: bool = False
+    ) -> Tuple[bool, Optional[RecommendationResult]]:
+        """
+        Check only the in-memory cache, without mapping the profession, touching
+        disk or encoding the question, so it is safe on the event loop.
+        Returns (whether the cache could be checked, result or None). It can
+        only be checked when the profession was resolved recently; a profession
+        known to have no rules gets the no-rules answer.
+        """
+        resolution = self._recent_resolution(profession, self.rules_loader.snapshot)
+        if resolution is None:
+            return False, None
+        mapped_profession, rules, rules_version = resolution
+        if not rules:
+            return True, RecommendationResult([NO_RULES_MESSAGE])
+        cache_key = self._generate_cache_key(profession, questions, rules_version, include_categories)
+        with span("cache"):
+            return True, self._cache.get(cache_key)
+
+    def lookup(
+        self,
+        profession: str,
+        questions: str,
+        include_categories: bool = False,
+        memory_checked: bool = False
+    ) -> Tuple[Optional[str], Optional[RecommendationResult]]:
+        """
+        Resolve the request's cache key and check the caches without running inference.
+        Returns (cache key, cached result or None); the key is None if no rules match.
+        Pass memory_checked=True after a lookup_memory() miss so it is not counted twice.
+        """
+        mapped_profession, rules, rules_version = self._resolve_rules(profession)
+        if not rules:
+            return None, None
+        cache_key = self._generate_cache_key(profession, questions, rules_version, include_categories)
+        request = RequestKey(profession, questions, rules_version, include_categories)
+        return cache_key, self._lookup(
+            cache_key, mapped_profession, rules, record=not memory_checked, request=request
         )
 
+    def get_cached(
+        self,
+        profession: str,
+        questions: str,
+        include_categories: bool = False
+    ) -> Optional[RecommendationResult]:
+        """Return a cached result without running inference, or None on a miss"""
+        return self.lookup(profession, questions, include_categories)[1]
+
+    def get_cached_recommendations(self, profession: str, questions: str) -> Optional[List[str]]:
+        """Return cached recommendations without running inference, or None on a miss"""
+        result = self.get_cached(profession, questions)
+        return result.recommendations if result is not None else None
+
     def generate_recommendations(
         self,
         profession: str,
         questions: str,
         tax_rules: List[Dict[str, str]] = None
     ) -> List[str]:
-        cache_key = self._generate_cache_key(profession, questions)
-        
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        return self.recommend(profession, questions).recommendations
+
+    def _prepare(
+        self,
+        profession: str,
+        questions: str,
+        mapped_profession: str,
+        rules: Tuple[TaxRule, ...],
+        include_categories: bool,
+        snapshot: RulesSnapshot
+    ) -> Tuple[List[Pair], LabelPlan]:
+        """The NLI pairs to score for one request, and the plan to read the scores back"""
+        # Enhanced user questions
+        enhanced_questions = _premise(profession, questions)
+
+        # Keep only the most plausible rules for the expensive NLI pass
+        with span("prefilter"):
+            candidate_rules = self.prefilter.select(questions, rules, snapshot)
+
+        # Only score labels whose results are used
+        plan = plan_labels(candidate_rules, include_generic=include_categories)
+        pairs = [(enhanced_questions, HYPOTHESIS_TEMPLATE.format(label)) for label in plan.labels]
+        return pairs, plan
+
+    def _finish(
+        self,
+        cache_key: str,
+        mapped_profession: str,
+        rules: Tuple[TaxRule, ...],
+        plan: LabelPlan,
+        scores: Dict[str, float],
+        include_categories: bool,
+        request: Optional[RequestKey] = None
+    ) -> RecommendationResult:
+        """Turn label scores into recommendations and cache them"""
+        # Generate recommendations
+        recommendations = [_intro(mapped_profession)]
 
-        # Map profession first
-        mapped_profession = self.profession_mapper.get_matching_profession(profession)
+        for criteria, score in plan.rule_scores(scores):
+            if score > RELEVANCE_THRESHOLD:
+                recommendations.append(_format_match(criteria, score))
+
+        if len(recommendations) == 1:  # Only has intro
+            recommendations.append(NO_MATCH_MESSAGE)
+
+        categories = plan.generic_scores(scores) if include_categories else None
+        result = RecommendationResult(recommendations, categories)
+        encode_result(result)
+        # Tag by every profession whose rules were scored, for reload invalidation
+        self._cache.set(cache_key, result, tags=self._cache_tags(mapped_profession, rules))
+        if self._persistent_cache is not None:
+            self._persistent_cache.set(cache_key, recommendations, categories)
+        self._remember(request, mapped_profession, cache_key)
+        return result
+
+    def recommend(
+        self,
+        profession: str,
+        questions: str,
+        include_categories: bool = False,
+        cache_checked: bool = False
+    ) -> RecommendationResult:
+        """
+        Score the mapped profession's rules against the questions.
+        Generic category labels are only scored when include_categories is set.
+        Pass cache_checked=True after a get_cached() miss so it is not counted twice.
+        """
+        snapshot = self.rules_loader.snapshot
+
+        # Map profession first, then load its rules
+        mapped_profession, relevant_tax_rules, rules_version = self._resolve_rules(profession)
         logger.info(f"Mapped profession '{profession}' to '{mapped_profession}'")
         
-        # Load relevant rules using mapped profession
-        relevant_tax_rules = self.rules_loader.load_rules_for_profession(
-            mapped_profession,  # Use mapped profession here
-            self.profession_mapper
-        )
-        
         if not relevant_tax_rules:
             logger.warning(f"No tax rules found for profession: {mapped_profession}")
-            return ["Sorry, we couldn't find any tax relief recommendations for your profession."]
+            return RecommendationResult([NO_RULES_MESSAGE])
+
+        cache_key = self._generate_cache_key(profession, questions, rules_version, include_categories)
+        request = RequestKey(profession, questions, rules_version, include_categories)
+        # After a lookup() miss only the exact key is checked again
+        cached = self._lookup(
+            cache_key, mapped_profession, relevant_tax_rules,
+            record=not cache_checked, request=None if cache_checked else request
+        )
+        if cached is not None:
+            return cached
 
         try:
-            # Generate human readable intro
-            intro = (
-                f"Based on our data regarding the {mapped_profession} profession, "
-                "here are some potential tax relief opportunities you may be eligible for:\n\n"
+            pairs, plan = self._prepare(
+                profession, questions, mapped_profession, relevant_tax_rules, include_categories, snapshot
             )
-
-            # Enhanced user questions
-            enhanced_questions = (
-                f"I am a {profession} and want to know about tax relief for: {questions}. "
-                "This includes equipment, travel, uniforms, and professional expenses."
+            scores = dict(zip(plan.labels, self.scorer.score(pairs)))
+            return self._finish(
+                cache_key, mapped_profession, relevant_tax_rules, plan, scores, include_categories, request
             )
-            
-            # Prepare criteria with enhanced context
-            criteria_texts = [
-                f"{rule['name']}: {rule['criteria']}"
-                for rule in relevant_tax_rules
+
+        except Exception as e:
+            logger.error(f"Error generating recommendations: {str(e)}")
+            return RecommendationResult([ERROR_MESSAGE])
+
+    def stream(
+        self,
+        profession: str,
+        questions: str,
+        include_categories: bool = False,
+        chunk_size: int = 4
+    ) -> Union[RecommendationResult, "RecommendationStream"]:
+        """
+        A cached or no-rules result when there is nothing to score, otherwise a
+        RecommendationStream that scores the request chunk_size labels at a time.
+        """
+        snapshot = self.rules_loader.snapshot
+        mapped_profession, rules, rules_version = self._resolve_rules(profession)
+        if not rules:
+            return RecommendationResult([NO_RULES_MESSAGE])
+        cache_key = self._generate_cache_key(profession, questions, rules_version, include_categories)
+        request = RequestKey(profession, questions, rules_version, include_categories)
+        cached = self._lookup(cache_key, mapped_profession, rules, request=request)
+        if cached is not None:
+            return cached
+
+        with span("prefilter"):
+            ranked = self.prefilter.ranked(questions, rules, snapshot)
+        # The plan matches recommend()'s, so the final result is cached as it would be
+        kept = set(ranked)
+        plan = plan_labels(tuple(rule for rule in rules if rule in kept), include_generic=include_categories)
+        labels = tuple(dict.fromkeys(rule_label(rule) for rule in ranked))
+        labels += tuple(label for label in plan.labels if label not in labels)
+        size = max(1, chunk_size)
+        chunks = [labels[start:start + size] for start in range(0, len(labels), size)]
+        return RecommendationStream(
+            self, cache_key, mapped_profession, rules, plan,
+            _premise(profession, questions), chunks, include_categories, request
+        )
+
+    def recommend_many(
+        self,
+        requests: List[Tuple[str, str, bool]],
+        chunk_size: int = 32
+    ) -> List[RecommendationResult]:
+        """
+        Recommendations for many (profession, questions, include_categories) requests.
+        Professions are resolved once each, identical requests are computed once,
+        and every uncached request's pairs are scored together in chunks of
+        chunk_size pairs. Results are returned in input order.
+        """
+        snapshot = self.rules_loader.snapshot
+        results: List[Optional[RecommendationResult]] = [None] * len(requests)
+        resolved: Dict[str, Tuple[str, Tuple[TaxRule, ...], str]] = {}
+        pending: Dict[str, List[int]] = {}
+        jobs = []
+
+        for index, (profession, questions, include_categories) in enumerate(requests):
+            if profession not in resolved:
+                resolved[profession] = self._resolve_rules(profession)
+            mapped_profession, rules, rules_version = resolved[profession]
+            if not rules:
+                results[index] = RecommendationResult([NO_RULES_MESSAGE])
+                continue
+            cache_key = self._generate_cache_key(profession, questions, rules_version, include_categories)
+            if cache_key in pending:
+                pending[cache_key].append(index)
+                continue
+            request = RequestKey(profession, questions, rules_version, include_categories)
+            cached = self._lookup(cache_key, mapped_profession, rules, request=request)
+            if cached is not None:
+                results[index] = cached
+                continue
+            pending[cache_key] = [index]
+            jobs.append((cache_key, mapped_profession, rules, profession, questions, include_categories, request))
+
+        # Score requests for the same profession next to each other
+        jobs.sort(key=lambda job: job[1])
+        try:
+            prepared = [
+                self._prepare(profession, questions, mapped_profession, rules, include_categories, snapshot)
+                for _, mapped_profession, rules, profession, questions, include_categories, _ in jobs
             ]
-            
-            result = self._classify_text(
-                enhanced_questions,
-                tuple(criteria_texts)
-            )
+            pairs = [pair for job_pairs, _ in prepared for pair in job_pairs]
+            scores: List[float] = []
+            for start in range(0, len(pairs), max(1, chunk_size)):
+                scores.extend(self.scorer.score(pairs[start:start + chunk_size]))
 
-            # Generate recommendations
-            recommendations = [intro]
-            
-            for score, criteria in zip(result['scores'], criteria_texts):
-                if score > 0.3:  # Confidence threshold
-                    recommendations.append(
-                        f"• {criteria}\n"
-                        f"  (Relevance: {score:.0%})"
-                    )
-            
-            if len(recommendations) == 1:  # Only has intro
-                recommendations.append(
-                    "While we have information about your profession, none of the "
-                    "available tax relief options seem to directly match your situation. "
-                    "Consider consulting with a tax professional for personalized advice."
+            offset = 0
+            for job, (job_pairs, plan) in zip(jobs, prepared):
+                cache_key, mapped_profession, rules, _, _, include_categories, request = job
+                job_scores = dict(zip(plan.labels, scores[offset:offset + len(job_pairs)]))
+                offset += len(job_pairs)
+                result = self._finish(
+                    cache_key, mapped_profession, rules, plan, job_scores, include_categories, request
                 )
-
-            self._cache[cache_key] = recommendations
-            return recommendations
+                for index in pending[cache_key]:
+                    results[index] = result
 
         except Exception as e:
-            logger.error(f"Error generating recommendations: {str(e)}")
-            return ["Sorry, there was an error processing your request. Please try again."]
+            logger.error(f"Error generating batch recommendations: {str(e)}")
+            for cache_key in pending:
+                for index in pending[cache_key]:
+                    if results[index] is None:
+                        results[index] = RecommendationResult([ERROR_MESSAGE])
+
+        return results
+
+
+class RecommendationStream:
+    """
+    One request's labels scored a chunk at a time, most plausible rules first,
+    so matches can be sent as soon as they are found. finish() caches and
+    returns the complete result, the same one recommend() would have given.
+    """
+
+    def __init__(
+        self,
+        service: LLMService,
+        cache_key: str,
+        mapped_profession: str,
+        rules: Tuple[TaxRule, ...],
+        plan: LabelPlan,
+        premise: str,
+        chunks: List[Tuple[str, ...]],
+        include_categories: bool,
+        request: RequestKey
+    ):
+        self.intro = _intro(mapped_profession)
+        self.chunks = chunks
+        self.scores: Dict[str, float] = {}
+        self._service = service
+        self._cache_key = cache_key
+        self._mapped_profession = mapped_profession
+        self._rules = rules
+        self._plan = plan
+        self._rule_labels = set(plan.rule_labels)
+        self._premise = premise
+        self._include_categories = include_categories
+        self._request = request
+
+    def score_chunk(self, index: int) -> List[str]:
+        """Score one chunk of labels; returns the recommendations it matched"""
+        labels = self.chunks[index]
+        pairs = [(self._premise, HYPOTHESIS_TEMPLATE.format(label)) for label in labels]
+        scores = self._service.scorer.score(pairs)
+        self.scores.update(zip(labels, scores))
+        return [
+            _format_match(label, score)
+            for label, score in zip(labels, scores)
+            if label in self._rule_labels and score > RELEVANCE_THRESHOLD
+        ]
+
+    def finish(self) -> RecommendationResult:
+        """The complete result once every chunk is scored"""
+        return self._service._finish(
+            self._cache_key, self._mapped_profession, self._rules, self._plan,
+            self.scores, self._include_categories, self._request
+        )
+
+
+_llm_service: Optional[LLMService] = None
+
+
+def get_llm_service() -> LLMService:
+    """Get the process-wide LLMService, loading the model on first use"""
+    global _llm_service
+    if _llm_service is None:
+        _llm_service = LLMService()
+    return _llm_service
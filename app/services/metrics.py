@@ -0,0 +1,151 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Histogram bucket upper bounds, 10µs to 10s
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Nanoseconds spent per stage by the request being handled in this context
+_request_timings: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of durations, one series per label tuple.
+    Durations are observed in nanoseconds so the hot path avoids float math.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._bounds_ns = [int(bound * 1e9) for bound in self.buckets]
+        self._series: Dict[Tuple[str, ...], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def observe_ns(self, duration_ns: int, *label_values: str):
+        index = bisect.bisect_left(self._bounds_ns, duration_ns)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # One count per bucket plus +Inf, then the sum in nanoseconds
+                series = self._series[label_values] = [0] * (len(self._bounds_ns) + 2)
+            series[index] += 1
+            series[-1] += duration_ns
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = _format_labels(labels + [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-1] / 1e9!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "tax_relief_stage_seconds",
+    "Time spent in each stage of handling a request.",
+    ("stage",),
+)
+REQUEST_SECONDS = Histogram(
+    "tax_relief_http_request_seconds",
+    "HTTP request latency by route and status.",
+    ("method", "route", "status"),
+)
+
+
+def record(stage: str, duration_ns: int):
+    """Add a stage duration to the stage histogram and the current request's timings"""
+    STAGE_SECONDS.observe_ns(duration_ns, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0) + duration_ns
+
+
+def add_request_timings(durations: Dict[str, int]):
+    """Credit stage durations measured elsewhere, such as a shared batch, to the current request"""
+    timings = _request_timings.get()
+    if timings is not None:
+        for stage, duration_ns in durations.items():
+            timings[stage] = timings.get(stage, 0) + duration_ns
+
+
+class span:
+    """Times the enclosed block as one stage: `with span("mapping"): ...`"""
+    __slots__ = ("stage", "_started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self._started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.stage, time.perf_counter_ns() - self._started)
+        return False
+
+
+class collect_timings:
+    """Collects the stage timings recorded inside the block into a fresh dict"""
+    __slots__ = ("timings", "_token")
+
+    def __enter__(self) -> Dict[str, int]:
+        self.timings = {}
+        self._token = _request_timings.set(self.timings)
+        return self.timings
+
+    def __exit__(self, exc_type, exc, tb):
+        _request_timings.reset(self._token)
+        return False
+
+
+def server_timing(timings: Dict[str, int], total_ns: Optional[int] = None) -> str:
+    """Server-Timing header value, durations in milliseconds"""
+    entries = [f"{stage};dur={duration_ns / 1e6:.3f}" for stage, duration_ns in timings.items()]
+    if total_ns is not None:
+        entries.append(f"total;dur={total_ns / 1e6:.3f}")
+    return ", ".join(entries)
+
+
+def expose(extra: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+    """
+    All metrics in Prometheus text exposition format. extra holds
+    (name, type, help, value) samples for counters and gauges read from
+    other components at scrape time.
+    """
+    lines = STAGE_SECONDS.expose() + REQUEST_SECONDS.expose()
+    for name, metric_type, help_text, value in extra:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
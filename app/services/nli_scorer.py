@@ -0,0 +1,310 @@
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.metrics import span
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str]
+
+# fp32: the model as saved. int8: torch dynamic quantization of Linear layers.
+# onnx / onnx-int8: an exported graph run with onnxruntime, optionally int8-quantized.
+INFERENCE_BACKENDS = ("fp32", "int8", "onnx", "onnx-int8")
+
+
+def _label_ids(config, model_id: str) -> Tuple[int, int]:
+    """(entailment, contradiction) logit indexes from the model config"""
+    entailment_id = -1
+    for label, index in config.label2id.items():
+        if label.lower().startswith("entail"):
+            entailment_id = index
+            break
+    if entailment_id == -1:
+        logger.warning(f"No 'entailment' label in {model_id} config, using the last logit")
+    return entailment_id, -1 if entailment_id == 0 else 0
+
+
+def quantize_int8(model):
+    """Dynamically quantize the model's Linear layers to int8 weights"""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def default_onnx_path(model_name_or_path: str, quantized: bool = False) -> Path:
+    """Where the exported graph is kept: next to a local model, else in the temp directory"""
+    name = "model-int8.onnx" if quantized else "model.onnx"
+    local = Path(model_name_or_path)
+    if local.is_dir():
+        return local / name
+    return Path(tempfile.gettempdir()) / "tax-relief-onnx" / model_name_or_path.replace("/", "--") / name
+
+
+def export_onnx(model_name_or_path: str, output_path: Path, quantized: bool = False) -> Path:
+    """Export the classifier's logits to ONNX with dynamic batch and sequence axes"""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_path.with_name(output_path.stem + "-fp32.onnx") if quantized else output_path
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name_or_path).eval()
+
+    class Logits(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask, use_cache=False).logits
+
+    sample = tokenizer(["I am a chef", "I am"], ["This text describes uniforms", "This text describes travel"],
+                       padding=True, return_tensors="pt")
+    logger.info(f"Exporting {model_name_or_path} to {fp32_path}")
+    torch.onnx.export(
+        Logits(model),
+        (sample["input_ids"], sample["attention_mask"]),
+        str(fp32_path),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=17,
+        dynamo=False,
+    )
+    if quantized:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(fp32_path), str(output_path), weight_type=QuantType.QInt8)
+        fp32_path.unlink()
+    return output_path
+
+
+class NLIScorer:
+    """
+    Scores (premise, hypothesis) pairs with an NLI sequence-classification model.
+
+    Each pair is scored independently as softmax(contradiction, entailment)[entailment],
+    the same as the zero-shot-classification pipeline with multi_label=True.
+    """
+
+    def __init__(self, model, tokenizer, model_id: str = ""):
+        self.model = model.eval()
+        self.tokenizer = tokenizer
+        self.model_id = model_id or getattr(model.config, "name_or_path", "")
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self._init_pair_encoder()
+
+        self.entailment_id, self.contradiction_id = _label_ids(model.config, self.model_id)
+
+    @classmethod
+    def from_pretrained(
+        cls,
+        model_name_or_path: str,
+        backend: str = "fp32",
+        onnx_path: Optional[str] = None,
+        threads: Optional[int] = None
+    ) -> "NLIScorer":
+        """
+        Load a scorer for the given inference backend. The model id records a
+        non-fp32 backend, since its scores differ slightly from the fp32 ones.
+        """
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+        model_id = model_name_or_path if backend == "fp32" else f"{model_name_or_path}@{backend}"
+        tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
+        if backend in ("onnx", "onnx-int8"):
+            return ONNXNLIScorer.from_pretrained(
+                model_name_or_path, tokenizer, backend == "onnx-int8", onnx_path, threads, model_id
+            )
+        if threads:
+            import torch
+
+            # torch's thread pool is per process, so this covers every forward pass
+            torch.set_num_threads(threads)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name_or_path)
+        if backend == "int8":
+            model = quantize_int8(model.eval())
+        return cls(model, tokenizer, model_id=model_id)
+
+    # Tensor type the tokenizer returns for forward()
+    return_tensors = "pt"
+
+    # Tokenized hypotheses kept for reuse. They only depend on the rules, so
+    # the limit is never reached in practice; the cache is cleared if it is.
+    hypothesis_cache_size = 16384
+
+    def _init_pair_encoder(self):
+        """
+        Set up pair encoding from cached token ids, for fast tokenizers. A
+        private copy of the backend tokenizer is used so truncation and padding
+        settings left on the shared one by tokenizer() calls do not apply.
+        """
+        self._hypothesis_ids: Dict[str, object] = {}
+        self._backend = None
+        if getattr(self.tokenizer, "is_fast", False):
+            from tokenizers import Tokenizer
+
+            self._backend = Tokenizer.from_str(self.tokenizer.backend_tokenizer.to_str())
+            self._backend.no_truncation()
+            self._backend.no_padding()
+            self._special_tokens = self.tokenizer.num_special_tokens_to_add(pair=True)
+
+    def _encode_hypothesis(self, hypothesis: str):
+        encoding = self._hypothesis_ids.get(hypothesis)
+        if encoding is None:
+            if len(self._hypothesis_ids) >= self.hypothesis_cache_size:
+                self._hypothesis_ids = {}
+            encoding = self._backend.encode(hypothesis, add_special_tokens=False)
+            self._hypothesis_ids[hypothesis] = encoding
+        return encoding
+
+    def tokenize(self, pairs: Sequence[Pair]):
+        """
+        Tokenize pairs into one padded batch, truncating premises only.
+
+        Each distinct premise is tokenized once per batch and hypotheses come
+        from the cache; the token ids are then joined with the model's special
+        tokens exactly as tokenizer(premises, hypotheses) would join them.
+        """
+        if self._backend is None:
+            return self._tokenize_pairs(pairs)
+        max_length = self.tokenizer.model_max_length
+        premises = {}
+        encodings = []
+        for premise, hypothesis in pairs:
+            hypothesis_ids = self._encode_hypothesis(hypothesis)
+            premise_ids = premises.get(premise)
+            if premise_ids is None:
+                premise_ids = premises[premise] = self._backend.encode(premise, add_special_tokens=False)
+            overflow = len(premise_ids) + len(hypothesis_ids) + self._special_tokens - max_length
+            if 0 < overflow < len(premise_ids):
+                # Truncate a fresh copy; the shared one serves the other pairs
+                premise_ids = self._backend.encode(premise, add_special_tokens=False)
+                premise_ids.truncate(len(premise_ids) - overflow)
+            encodings.append(self._backend.post_process(premise_ids, hypothesis_ids, add_special_tokens=True))
+        return self._pad(encodings)
+
+    def _pad(self, encodings):
+        """Right- or left-pad encodings into one batch of the model's input names"""
+        import numpy as np
+        from transformers import BatchEncoding
+
+        width = max(len(encoding.ids) for encoding in encodings)
+        left = self.tokenizer.padding_side == "left"
+        fields = {
+            "input_ids": ("ids", self.tokenizer.pad_token_id),
+            "attention_mask": ("attention_mask", 0),
+            "token_type_ids": ("type_ids", self.tokenizer.pad_token_type_id),
+        }
+        data = {}
+        for name in self.tokenizer.model_input_names:
+            if name not in fields:
+                continue
+            attribute, pad = fields[name]
+            batch = np.full((len(encodings), width), pad, dtype=np.int64)
+            for row, encoding in zip(batch, encodings):
+                values = getattr(encoding, attribute)
+                if left:
+                    row[width - len(values):] = values
+                else:
+                    row[:len(values)] = values
+            data[name] = batch
+        return BatchEncoding(data, tensor_type=self.return_tensors)
+
+    def _tokenize_pairs(self, pairs: Sequence[Pair]):
+        """Tokenize pairs with a plain tokenizer() call"""
+        premises = [premise for premise, _ in pairs]
+        hypotheses = [hypothesis for _, hypothesis in pairs]
+        try:
+            return self.tokenizer(
+                premises, hypotheses,
+                padding=True, truncation="only_first", return_tensors=self.return_tensors
+            )
+        except Exception as e:
+            # Tokenizers complain when asked to truncate inputs that are already short enough
+            if "too short" not in str(e):
+                raise
+            return self.tokenizer(premises, hypotheses, padding=True, return_tensors=self.return_tensors)
+
+    def forward(self, inputs) -> List[float]:
+        """Run one forward pass over a tokenized batch and return entailment scores"""
+        import torch
+
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits
+            entail_contr = logits[:, [self.contradiction_id, self.entailment_id]]
+            return entail_contr.softmax(dim=-1)[:, 1].tolist()
+
+    def score(self, pairs: Sequence[Pair]) -> List[float]:
+        """Entailment probability for every pair, in input order"""
+        if not pairs:
+            return []
+        with span("tokenize"):
+            inputs = self.tokenize(pairs)
+        with span("forward"):
+            return self.forward(inputs)
+
+
+class ONNXNLIScorer(NLIScorer):
+    """NLIScorer running an exported ONNX graph with onnxruntime instead of torch"""
+
+    return_tensors = "np"
+
+    def __init__(self, session, tokenizer, config, model_id: str = ""):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.model_id = model_id
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self._input_names = {i.name for i in session.get_inputs()}
+        self._init_pair_encoder()
+        self.entailment_id, self.contradiction_id = _label_ids(config, model_id)
+
+    @classmethod
+    def from_pretrained(
+        cls,
+        model_name_or_path: str,
+        tokenizer,
+        quantized: bool = False,
+        onnx_path: Optional[str] = None,
+        threads: Optional[int] = None,
+        model_id: str = ""
+    ) -> "ONNXNLIScorer":
+        """Load the exported graph, exporting it first if it is not there yet"""
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx inference backends need the onnxruntime package")
+        from transformers import AutoConfig
+
+        path = Path(onnx_path) if onnx_path else default_onnx_path(model_name_or_path, quantized)
+        if not path.exists():
+            export_onnx(model_name_or_path, path, quantized)
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        session = onnxruntime.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        logger.info(f"Loaded ONNX graph {path}")
+        config = AutoConfig.from_pretrained(model_name_or_path)
+        return cls(session, tokenizer, config, model_id or f"{model_name_or_path}@onnx")
+
+    def forward(self, inputs) -> List[float]:
+        """Run one forward pass over a tokenized batch and return entailment scores"""
+        import numpy as np
+
+        feeds = {name: inputs[name].astype(np.int64) for name in self._input_names}
+        logits = self.session.run(["logits"], feeds)[0]
+        entail_contr = logits[:, [self.contradiction_id, self.entailment_id]]
+        entail_contr = np.exp(entail_contr - entail_contr.max(axis=1, keepdims=True))
+        return (entail_contr[:, 1] / entail_contr.sum(axis=1)).tolist()
@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    model_id TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    recommendations TEXT NOT NULL,
+    categories TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (model_id, cache_key)
+) WITHOUT ROWID
+"""
+
+
+class SQLiteResultCache:
+    """
+    On-disk result cache shared by every worker on a node and kept across restarts.
+
+    SQLite in WAL mode lets readers proceed while another process writes. Each
+    thread gets its own connection. Rows are keyed by model id plus the same
+    cache key the in-memory tier uses, which already carries the rules version
+    and normalised input.
+
+    Expired rows are pruned at startup and then every prune_interval seconds on
+    a background thread, which also recounts the rows so stats() never queries.
+    """
+
+    def __init__(self, path: str, model_id: str, ttl: Optional[float] = None, prune_interval: float = 3600.0):
+        self.path = Path(path)
+        self.model_id = model_id
+        self.ttl = ttl or None
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self._entries = 0
+        self._count_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pruner: Optional[threading.Thread] = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(SCHEMA)
+        self.prune()
+        if self.ttl and prune_interval > 0:
+            self._pruner = threading.Thread(target=self._run_pruner, name="persistent-cache-pruner", daemon=True)
+            self._pruner.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # SQLite connections must not be shared with a forked child
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, cache_key: str) -> Optional[Tuple[List[str], Optional[Dict[str, float]]]]:
+        """(recommendations, categories) for the key, or None on a miss"""
+        try:
+            row = self._connection().execute(
+                "SELECT recommendations, categories, created_at FROM results "
+                "WHERE model_id = ? AND cache_key = ?",
+                (self.model_id, cache_key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Persistent cache read failed: {str(e)}")
+            return None
+        if row is None or (self.ttl and row[2] + self.ttl < time.time()):
+            self.misses += 1
+            return None
+        recommendations, categories, _ = row
+        self.hits += 1
+        return json.loads(recommendations), json.loads(categories) if categories else None
+
+    def set(self, cache_key: str, recommendations: List[str], categories: Optional[Dict[str, float]] = None):
+        values = (
+            json.dumps(recommendations),
+            json.dumps(categories) if categories is not None else None,
+            time.time(),
+            self.model_id,
+            cache_key,
+        )
+        try:
+            conn = self._connection()
+            # Insert and update separately so the row count can be kept without querying it
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO results "
+                "(recommendations, categories, created_at, model_id, cache_key) VALUES (?, ?, ?, ?, ?)",
+                values
+            ).rowcount
+            if not inserted:
+                conn.execute(
+                    "UPDATE results SET recommendations = ?, categories = ?, created_at = ? "
+                    "WHERE model_id = ? AND cache_key = ?",
+                    values
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Persistent cache write failed: {str(e)}")
+            return
+        if inserted:
+            with self._count_lock:
+                self._entries += 1
+
+    def prune(self) -> int:
+        """Delete rows older than the TTL and recount the rows left"""
+        pruned = 0
+        if self.ttl:
+            try:
+                pruned = self._connection().execute(
+                    "DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl,)
+                ).rowcount
+            except sqlite3.Error as e:
+                logger.error(f"Persistent cache prune failed: {str(e)}")
+        try:
+            entries = len(self)
+        except sqlite3.Error as e:
+            logger.error(f"Persistent cache count failed: {str(e)}")
+        else:
+            with self._count_lock:
+                self._entries = entries
+        return pruned
+
+    def _run_pruner(self):
+        while not self._stop.wait(self.prune_interval):
+            pruned = self.prune()
+            if pruned:
+                logger.info(f"Pruned {pruned} expired persistent cache rows")
+
+    def stats(self) -> dict:
+        """Counters only, without querying: entries is the row count at the last prune plus this process's inserts"""
+        return {"path": str(self.path), "entries": self._entries, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM results WHERE model_id = ?", (self.model_id,)
+        ).fetchone()[0]
+
+    def close(self):
+        self._stop.set()
+        if self._pruner is not None and self._pruner is not threading.current_thread():
+            self._pruner.join(timeout=5)
+            self._pruner = None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
@@ -0,0 +1,148 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.utils.data_loader import RulesSnapshot, TaxRule
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from i in is it my of on or our the this to we with "
+    "e.g etc other own".split()
+)
+_WORD_RE = re.compile(r"\w+")
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _trigrams(text: str) -> Counter:
+    grams = Counter()
+    for word in _words(text):
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _rule_text(rule: TaxRule) -> str:
+    return f"{rule.name} {rule.criteria}"
+
+
+class BM25Index:
+    """Okapi BM25 over rule name and criteria text"""
+
+    def __init__(self, rules: Sequence[TaxRule], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[TaxRule, Tuple[Counter, int]] = {}
+        document_frequency = Counter()
+        for rule in rules:
+            words = _words(_rule_text(rule))
+            self._docs[rule] = (Counter(words), len(words))
+            document_frequency.update(set(words))
+        count = len(self._docs) or 1
+        self._avg_length = sum(length for _, length in self._docs.values()) / count or 1.0
+        self._idf = {
+            word: math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for word, df in document_frequency.items()
+        }
+
+    def scores(self, query: str, rules: Iterable[TaxRule]) -> Dict[TaxRule, float]:
+        query_words = [word for word in set(_words(query)) if word in self._idf]
+        results = {}
+        for rule in rules:
+            doc = self._docs.get(rule)
+            if doc is None:
+                results[rule] = 0.0
+                continue
+            term_counts, length = doc
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+            score = 0.0
+            for word in query_words:
+                tf = term_counts.get(word)
+                if tf:
+                    score += self._idf[word] * tf * (self.k1 + 1) / (tf + norm)
+            results[rule] = score
+        return results
+
+
+class TrigramIndex:
+    """Cosine similarity of character-trigram vectors, tolerant of word forms"""
+
+    def __init__(self, rules: Sequence[TaxRule]):
+        self._vectors: Dict[TaxRule, Tuple[Counter, float]] = {}
+        for rule in rules:
+            grams = _trigrams(_rule_text(rule))
+            self._vectors[rule] = (grams, math.sqrt(sum(v * v for v in grams.values())) or 1.0)
+
+    def scores(self, query: str, rules: Iterable[TaxRule]) -> Dict[TaxRule, float]:
+        query_grams = _trigrams(query)
+        query_norm = math.sqrt(sum(v * v for v in query_grams.values())) or 1.0
+        results = {}
+        for rule in rules:
+            vector = self._vectors.get(rule)
+            if vector is None:
+                results[rule] = 0.0
+                continue
+            grams, norm = vector
+            dot = sum(count * grams.get(gram, 0) for gram, count in query_grams.items())
+            results[rule] = dot / (norm * query_norm)
+        return results
+
+
+PREFILTER_BACKENDS = {
+    "bm25": BM25Index,
+    "trigram": TrigramIndex,
+}
+
+
+class RulePrefilter:
+    """
+    Cheap candidate generation in front of NLI scoring.
+
+    Ranks candidate rules against the question with a lexical index built once
+    per rules snapshot, and keeps only the top_k for the expensive reranker.
+    """
+
+    def __init__(self, backend: str = "bm25", top_k: int = 8):
+        if backend != "none" and backend not in PREFILTER_BACKENDS:
+            raise ValueError(f"Unknown prefilter backend: {backend}")
+        self.backend = backend
+        self.top_k = top_k
+        self._index = None
+        self._index_version: Optional[str] = None
+
+    def build(self, snapshot: RulesSnapshot):
+        """Index every rule in the snapshot"""
+        if self.backend == "none":
+            return
+        self._index = PREFILTER_BACKENDS[self.backend](snapshot.rules)
+        self._index_version = snapshot.version
+        logger.info(f"Built {self.backend} prefilter index over {len(snapshot)} rules")
+
+    def rank(self, question: str, rules: Sequence[TaxRule], snapshot: RulesSnapshot) -> List[Tuple[TaxRule, float]]:
+        """All rules with their prefilter score, best first; ties keep rule order"""
+        if self.backend == "none":
+            return [(rule, 0.0) for rule in rules]
+        if self._index_version != snapshot.version:
+            self.build(snapshot)
+        scores = self._index.scores(question, rules)
+        order = sorted(range(len(rules)), key=lambda i: -scores[rules[i]])
+        return [(rules[i], scores[rules[i]]) for i in order]
+
+    def ranked(self, question: str, rules: Sequence[TaxRule], snapshot: RulesSnapshot) -> Tuple[TaxRule, ...]:
+        """The same rules select() keeps, best first"""
+        ranking = [rule for rule, _ in self.rank(question, rules, snapshot)]
+        if self.backend == "none" or self.top_k <= 0:
+            return tuple(ranking)
+        return tuple(ranking[:self.top_k])
+
+    def select(self, question: str, rules: Sequence[TaxRule], snapshot: RulesSnapshot) -> Tuple[TaxRule, ...]:
+        """The top_k most plausible rules, returned in their original order"""
+        if self.backend == "none" or self.top_k <= 0 or len(rules) <= self.top_k:
+            return tuple(rules)
+        kept = {rule for rule, _ in self.rank(question, rules, snapshot)[:self.top_k]}
+        return tuple(rule for rule in rules if rule in kept)
@@ -1,10 +1,212 @@
-from typing import Dict, Set, List
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from collections import Counter, OrderedDict
 import difflib
-from app.utils.data_loader import load_tax_rules
+import threading
+from app.utils.data_loader import get_rules_loader
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _quick_ratio_bound(counts: Counter, length: int, other_counts: Counter, other_length: int) -> float:
+    """Upper bound on SequenceMatcher.ratio(), as computed by quick_ratio()"""
+    total = length + other_length
+    if not total:
+        return 1.0
+    matches = sum((counts & other_counts).values())
+    return 2.0 * matches / total
+
+
+class _Candidate:
+    __slots__ = ("order", "profession", "lower", "counts", "lower_counts", "group")
+
+    def __init__(self, order: int, profession: str, group: Optional[str] = None):
+        self.order = order
+        self.profession = profession
+        self.lower = profession.lower()
+        self.counts = Counter(profession)
+        self.lower_counts = Counter(self.lower)
+        self.group = group
+
+
+class ProfessionResolver:
+    """
+    Precomputed index behind ProfessionMapper.get_matching_profession.
+
+    Exact and alias lookups are hash maps. Fuzzy stages visit candidates from a
+    character-trigram inverted index, most shared trigrams first, and skip any
+    candidate whose quick_ratio() bound cannot beat the current best, so the
+    result is identical to scoring every profession with difflib. Resolved
+    inputs are memoised in a bounded LRU.
+    """
+
+    def __init__(
+        self,
+        valid_professions: Iterable[str],
+        profession_groups: Mapping[str, Set[str]],
+        profession_aliases: Mapping[str, List[str]],
+        version: str = "",
+        memo_size: int = 4096
+    ):
+        self.version = version
+        self.valid_professions = frozenset(valid_professions)
+        valid = self.valid_professions
+
+        # First main profession (in alias table order) wins, as in the linear scan
+        self._aliases: Dict[str, str] = {}
+        for main_profession, aliases in profession_aliases.items():
+            if main_profession not in valid:
+                continue
+            for alias in aliases:
+                self._aliases.setdefault(alias.lower(), main_profession)
+
+        # Valid group members in scan order; the earliest occurrence wins ties
+        self._group_candidates: List[_Candidate] = []
+        seen = set()
+        for group_name, professions in profession_groups.items():
+            for profession in professions:
+                if profession in valid and profession not in seen:
+                    seen.add(profession)
+                    self._group_candidates.append(
+                        _Candidate(len(self._group_candidates), profession, group_name)
+                    )
+
+        # Word -> groups index for the group-restricted fuzzy stage
+        self._group_names = list(profession_groups)
+        self._groups_by_word: Dict[str, Set[str]] = {}
+        self._valid_group_members: Dict[str, List[_Candidate]] = {}
+        for group_name, professions in profession_groups.items():
+            for word in " ".join(professions).lower().split():
+                self._groups_by_word.setdefault(word, set()).add(group_name)
+            self._valid_group_members[group_name] = [
+                _Candidate(i, p) for i, p in enumerate(professions) if p in valid
+            ]
+
+        self._all_candidates = [_Candidate(i, p) for i, p in enumerate(sorted(valid))]
+
+        self._trigram_index: Dict[str, List[int]] = {}
+        for candidate in self._group_candidates:
+            for gram in _trigrams(candidate.lower):
+                self._trigram_index.setdefault(gram, []).append(candidate.order)
+
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._memo_size = memo_size
+        self._memo_lock = threading.Lock()
+
+    def resolve(self, input_profession: str) -> str:
+        with self._memo_lock:
+            mapped = self._memo.get(input_profession)
+            if mapped is not None:
+                self._memo.move_to_end(input_profession)
+                return mapped
+
+        mapped = self._resolve(input_profession)
+
+        with self._memo_lock:
+            self._memo[input_profession] = mapped
+            if len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        return mapped
+
+    def _resolve(self, input_profession: str) -> str:
+        input_lower = input_profession.lower()
+
+        # 1. Direct match
+        if input_profession in self.valid_professions:
+            return input_profession
+
+        # 2. Check aliases
+        main_profession = self._aliases.get(input_lower)
+        if main_profession is not None:
+            logger.info(f"Alias matched '{input_profession}' to '{main_profession}'")
+            return main_profession
+
+        # 3. Closest group member, if similar enough
+        best, highest_ratio = self._closest_group_member(input_lower)
+        if highest_ratio > 0.8:
+            logger.info(f"Found close match '{input_profession}' to '{best.profession}' ({highest_ratio:.2f}) via {best.group} group")
+            return best.profession
+
+        # 4. Fuzzy matching within groups sharing a word with the input
+        input_words = set(input_lower.split())
+        matching_groups = set()
+        for word in input_words:
+            matching_groups |= self._groups_by_word.get(word, set())
+        for group_name in self._group_names:
+            if group_name not in matching_groups:
+                continue
+            match = self._close_match(input_profession, self._valid_group_members[group_name], cutoff=0.6)
+            if match:
+                logger.info(f"Group fuzzy matched '{input_profession}' to '{match}' via {group_name}")
+                return match
+
+        # 5. Fall back to general fuzzy matching with higher cutoff
+        match = self._close_match(input_profession, self._all_candidates, cutoff=0.7)
+        if match:
+            logger.info(f"General fuzzy matched '{input_profession}' to '{match}'")
+            return match
+
+        logger.warning(f"No profession mapping found for '{input_profession}'")
+        return input_profession
+
+    def _ordered_group_candidates(self, input_lower: str) -> List[_Candidate]:
+        """Group members ordered by trigrams shared with the input, most first"""
+        shared = Counter()
+        for gram in _trigrams(input_lower):
+            for order in self._trigram_index.get(gram, ()):
+                shared[order] += 1
+        ranked = [self._group_candidates[order] for order, _ in shared.most_common()]
+        ranked.extend(c for c in self._group_candidates if c.order not in shared)
+        return ranked
+
+    def _closest_group_member(self, input_lower: str) -> Tuple[Optional[_Candidate], float]:
+        """Same result as scanning every group member with SequenceMatcher(input, member)"""
+        input_counts = Counter(input_lower)
+        input_length = len(input_lower)
+        best: Optional[_Candidate] = None
+        highest_ratio = 0.0
+        matcher = difflib.SequenceMatcher(None, input_lower)
+        for candidate in self._ordered_group_candidates(input_lower):
+            bound = _quick_ratio_bound(input_counts, input_length, candidate.lower_counts, len(candidate.lower))
+            if bound <= 0.8 or bound < highest_ratio:
+                continue
+            if best is not None and bound == highest_ratio and candidate.order > best.order:
+                continue
+            matcher.set_seq2(candidate.lower)
+            ratio = matcher.ratio()
+            if ratio > highest_ratio or (best is not None and ratio == highest_ratio and candidate.order < best.order):
+                highest_ratio = ratio
+                best = candidate
+        return best, highest_ratio
+
+    def _close_match(self, word: str, candidates: List[_Candidate], cutoff: float) -> Optional[str]:
+        """Same result as difflib.get_close_matches(word, candidates, n=1, cutoff=cutoff)"""
+        word_counts = Counter(word)
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(word)
+        best_score = -1.0
+        best: Optional[str] = None
+        for candidate in candidates:
+            bound = _quick_ratio_bound(word_counts, len(word), candidate.counts, len(candidate.profession))
+            if bound < cutoff or bound < best_score:
+                continue
+            if bound == best_score and candidate.profession <= best:
+                continue
+            matcher.set_seq1(candidate.profession)
+            score = matcher.ratio()
+            if score < cutoff:
+                continue
+            if score > best_score or (score == best_score and candidate.profession > best):
+                best_score = score
+                best = candidate.profession
+        return best
+
+
 class ProfessionMapper:
     def __init__(self):
         self.profession_groups = {
@@ -140,74 +342,44 @@ class ProfessionMapper:
             "Security_Emergency": ["Medical_Healthcare"]
         }
 
-    def get_matching_profession(self, input_profession: str) -> str:
-        tax_rules = load_tax_rules()
-        valid_professions = {rule["profession"] for rule in tax_rules}
-        input_lower = input_profession.lower()
-        
-        # 1. Direct match
-        if input_profession in valid_professions:
-            return input_profession
-        
-        # 2. Check aliases
-        for main_profession, aliases in self.profession_aliases.items():
-            if input_lower in [alias.lower() for alias in aliases]:
-                if main_profession in valid_professions:
-                    logger.info(f"Alias matched '{input_profession}' to '{main_profession}'")
-                    return main_profession
-        
-        # Improve group matching
-        best_match = None
-        highest_ratio = 0
-        matched_group = None
-        
-        # First try exact group matches
+        # First group listing each profession, keyed both ways the lookups normalise names
+        self._group_by_lower: Dict[str, str] = {}
+        self._group_by_normalized: Dict[str, str] = {}
         for group_name, professions in self.profession_groups.items():
             for profession in professions:
-                ratio = difflib.SequenceMatcher(None, input_lower, profession.lower()).ratio()
-                if ratio > highest_ratio and profession in valid_professions:
-                    highest_ratio = ratio
-                    best_match = profession
-                    matched_group = group_name
-        
-        # If we found a good match (over 0.8 similarity)
-        if highest_ratio > 0.8:
-            logger.info(f"Found close match '{input_profession}' to '{best_match}' ({highest_ratio:.2f}) via {matched_group} group")
-            return best_match
-        
-        # If no good match, try fuzzy matching within appropriate groups
-        potential_groups = []
-        for group_name, professions in self.profession_groups.items():
-            group_words = set(' '.join(professions).lower().split())
-            input_words = set(input_lower.split())
-            if len(input_words & group_words) > 0:  # If any words overlap
-                potential_groups.append(group_name)
-        
-        # Try fuzzy matching only within relevant groups
-        if potential_groups:
-            for group_name in potential_groups:
-                valid_group_profs = [p for p in self.profession_groups[group_name] if p in valid_professions]
-                matches = difflib.get_close_matches(input_profession, valid_group_profs, n=1, cutoff=0.6)
-                if matches:
-                    logger.info(f"Group fuzzy matched '{input_profession}' to '{matches[0]}' via {group_name}")
-                    return matches[0]
-        
-        # Fall back to general fuzzy matching with higher cutoff
-        matches = difflib.get_close_matches(input_profession, valid_professions, n=1, cutoff=0.7)
-        if matches:
-            logger.info(f"General fuzzy matched '{input_profession}' to '{matches[0]}'")
-            return matches[0]
-        
-        logger.warning(f"No profession mapping found for '{input_profession}'")
-        return input_profession
+                self._group_by_lower.setdefault(profession.lower(), group_name)
+                self._group_by_normalized.setdefault(self._normalize_profession_name(profession), group_name)
+
+        self._resolver: Optional[ProfessionResolver] = None
+        self._resolver_lock = threading.Lock()
+
+    @property
+    def resolver(self) -> ProfessionResolver:
+        """Resolver for the current rules snapshot, rebuilt after a rules reload"""
+        snapshot = get_rules_loader().snapshot
+        resolver = self._resolver
+        if resolver is None or resolver.version != snapshot.version:
+            with self._resolver_lock:
+                if self._resolver is None or self._resolver.version != snapshot.version:
+                    self._resolver = ProfessionResolver(
+                        snapshot.professions,
+                        self.profession_groups,
+                        self.profession_aliases,
+                        version=snapshot.version
+                    )
+                resolver = self._resolver
+        return resolver
+
+    def get_matching_profession(self, input_profession: str) -> str:
+        return self.resolver.resolve(input_profession)
 
     def get_related_professions(self, profession: str) -> Set[str]:
         """Get related professions from the same group"""
         # Find which group the profession belongs to
-        for group_name, professions in self.profession_groups.items():
-            if any(p.lower() == profession.lower() for p in professions):
-                logger.info(f"Found related professions in {group_name} group")
-                return professions
+        group_name = self._group_by_lower.get(profession.lower())
+        if group_name is not None:
+            logger.info(f"Found related professions in {group_name} group")
+            return self.profession_groups[group_name]
 
         # If no group found, return empty set
         logger.warning(f"No related professions found for {profession}")
@@ -215,13 +387,7 @@ class ProfessionMapper:
 
     def get_profession_category(self, profession: str) -> str:
         """Get the category for a profession"""
-        normalized_prof = self._normalize_profession_name(profession)
-        
-        for category, professions in self.profession_groups.items():
-            if any(self._normalize_profession_name(p) == normalized_prof 
-                  for p in professions):
-                return category
-        return None
+        return self._group_by_normalized.get(self._normalize_profession_name(profession))
         
     def get_related_categories(self, category: str) -> List[str]:
         """Get related categories for a given category"""
@@ -229,4 +395,4 @@ class ProfessionMapper:
 
     def _normalize_profession_name(self, profession: str) -> str:
         """Normalize the profession name for comparison"""
-        return profession.lower().replace(" ", "")
\ No newline at end of file
+        return profession.lower().replace(" ", "")
@@ -0,0 +1,395 @@
+import contextvars
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAX_DURATION = 600.0
+# Frames kept per sampled stack, counted from the outermost
+MAX_STACK_DEPTH = 128
+# Stack samples past the distinct-stack limit are counted under this name
+TRUNCATED_STACK = "[other stacks]"
+# How long a profiled call on a worker thread waits for the enabled profile of
+# its own request's event loop step to be switched off
+CALL_ENABLE_TIMEOUT = 0.1
+
+# The profiler collecting for the request being handled in this context, if it was sampled
+_profiling: contextvars.ContextVar[Optional["Profiler"]] = contextvars.ContextVar("profiling", default=None)
+
+
+def _short_path(filename: str) -> str:
+    """Installed packages relative to site-packages, this app relative to the working directory"""
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    cwd = os.getcwd() + os.sep
+    return filename[len(cwd):] if filename.startswith(cwd) else os.path.basename(filename)
+
+
+class _ProfiledCoroutine:
+    """
+    Runs a coroutine with profile enabled only while that coroutine's own steps
+    execute, so other requests interleaved on the event loop are not included.
+    """
+    __slots__ = ("coro", "profile", "profiler")
+
+    def __init__(self, coro, profile: cProfile.Profile, profiler: "Profiler"):
+        self.coro = coro
+        self.profile = profile
+        self.profiler = profiler
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            enabled = False
+            try:
+                enabled = self.profiler._enable(self.profile)
+                yielded = self.coro.send(value) if error is None else self.coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if enabled:
+                    self.profiler._disable(self.profile)
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                self.coro.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+class Profiler:
+    """
+    On-demand profiling for a time window.
+
+    - cpu: cProfile of a random fraction of requests, covering both their
+      event loop steps and their inference jobs, merged into one pstats table.
+      One request is profiled at a time and at most one cProfile is enabled
+      in the process at once, as Python 3.12+ requires; sampled requests that
+      arrive while another is profiled run unprofiled and count as skipped.
+    - stacks: a background thread samples every thread's stack each interval
+      and counts collapsed stacks, at most max_stacks distinct ones.
+    - memory: tracemalloc runs for the window; allocations still live at the
+      end are kept as the max_memory_sites largest allocating stacks.
+
+    When no session is active the only cost is checking `active` per request.
+    Results stay available after a session ends until the next one starts.
+    """
+
+    def __init__(self, max_stacks: int = 10000, max_memory_sites: int = 200, memory_frames: int = 32):
+        self.max_stacks = max_stacks
+        self.max_memory_sites = max_memory_sites
+        self.memory_frames = memory_frames
+        self.active = False
+        self._lock = threading.Lock()
+        self._session = 0
+        self._settings: dict = {}
+        self._started_at: Optional[float] = None
+        self._ends_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        self._fraction = 0.0
+        self._cpu = False
+        self._stats: Optional[pstats.Stats] = None
+        self._profiled_requests = 0
+        self._skipped_requests = 0
+        self._skipped_profiles = 0
+        # Whether a request holds the profiling slot, and whether any cProfile is enabled
+        self._request_profiling = False
+        self._profile_enabled = False
+        self._profile_disabled = threading.Condition(self._lock)
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._labels: Dict[object, str] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+        self._timer: Optional[threading.Timer] = None
+        self._tracing_memory = False
+        self._memory_sites: List[Tuple[str, int, int]] = []
+        self._memory_peak = 0
+
+    def start(
+        self,
+        duration: float = 60.0,
+        fraction: float = 0.1,
+        cpu: bool = True,
+        stacks: bool = True,
+        memory: bool = False,
+        interval_ms: float = 10.0
+    ) -> dict:
+        """Start a new session, discarding the previous session's results"""
+        self.stop()
+        duration = min(max(duration, 0.1), MAX_DURATION)
+        with self._lock:
+            self._session += 1
+            session = self._session
+            self._settings = {
+                "duration": duration, "fraction": fraction, "cpu": cpu,
+                "stacks": stacks, "memory": memory, "interval_ms": interval_ms,
+            }
+            self._started_at = time.time()
+            self._ends_at = self._started_at + duration
+            self._stopped_at = None
+            self._fraction = min(max(fraction, 0.0), 1.0)
+            self._cpu = cpu
+            self._stats = None
+            self._profiled_requests = 0
+            self._skipped_requests = 0
+            self._skipped_profiles = 0
+            self._stacks = Counter()
+            self._samples = 0
+            self._labels = {}
+            self._memory_sites = []
+            self._memory_peak = 0
+            if memory and not tracemalloc.is_tracing():
+                tracemalloc.start(self.memory_frames)
+                self._tracing_memory = True
+            if stacks:
+                self._stop_sampling = threading.Event()
+                self._sampler = threading.Thread(
+                    target=self._sample_stacks,
+                    args=(max(interval_ms, 1.0) / 1000, self._stop_sampling),
+                    name="profiler-sampler",
+                    daemon=True
+                )
+                self._sampler.start()
+            self._timer = threading.Timer(duration, self._expire, args=(session,))
+            self._timer.daemon = True
+            self._timer.start()
+            self.active = True
+        logger.info(f"Profiling started for {duration:g}s: {self._settings}")
+        return self.status()
+
+    def _expire(self, session: int):
+        if self._session == session:
+            self.stop()
+
+    def stop(self) -> dict:
+        """End the current session, if any, keeping its results"""
+        with self._lock:
+            if not self.active:
+                return self._status()
+            self.active = False
+            self._stopped_at = time.time()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            sampler, self._sampler = self._sampler, None
+            self._stop_sampling.set()
+        if sampler is not None and sampler is not threading.current_thread():
+            sampler.join()
+        if self._tracing_memory:
+            self._collect_memory()
+        logger.info("Profiling stopped")
+        return self.status()
+
+    def _collect_memory(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            # Leave out what profiling itself allocated, such as merged pstats tables
+            tracemalloc.Filter(False, __file__, all_frames=True),
+        ))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self._tracing_memory = False
+        sites = []
+        for statistic in snapshot.statistics("traceback")[:self.max_memory_sites]:
+            # Frames are listed oldest first, as collapsed stacks expect
+            stack = ";".join(f"{_short_path(frame.filename)}:{frame.lineno}" for frame in statistic.traceback)
+            sites.append((stack, statistic.size, statistic.count))
+        with self._lock:
+            self._memory_sites = sites
+            self._memory_peak = peak
+
+    def sample_request(self) -> bool:
+        """
+        Whether to profile the request being started. A True result takes the
+        profiling slot, which profile_request releases, so it must follow.
+        """
+        if not self.active or not self._cpu or random.random() >= self._fraction:
+            return False
+        with self._lock:
+            if self._request_profiling:
+                self._skipped_requests += 1
+                return False
+            self._request_profiling = True
+            return True
+
+    async def profile_request(self, coro):
+        """Await a request's coroutine with its own steps and its inference jobs profiled"""
+        profile = cProfile.Profile()
+        token = _profiling.set(self)
+        try:
+            return await _ProfiledCoroutine(coro, profile, self)
+        finally:
+            _profiling.reset(token)
+            with self._lock:
+                self._request_profiling = False
+            self.add_profile(profile, request=True)
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Call fn on this thread under its own cProfile, merged in afterwards"""
+        profile = cProfile.Profile()
+        enabled = False
+        try:
+            enabled = self._enable(profile, wait=CALL_ENABLE_TIMEOUT)
+            return fn(*args, **kwargs)
+        finally:
+            if enabled:
+                self._disable(profile)
+                self.add_profile(profile)
+
+    def _enable(self, profile: cProfile.Profile, wait: float = 0.0) -> bool:
+        """
+        Enable profile unless another one still is after wait seconds, which
+        Python 3.12+ would reject with ValueError. The work then runs unprofiled.
+        Event loop steps never wait; worker threads may.
+        """
+        with self._profile_disabled:
+            if self._profile_enabled and wait > 0:
+                self._profile_disabled.wait_for(lambda: not self._profile_enabled, wait)
+            if not self._profile_enabled:
+                try:
+                    profile.enable()
+                    self._profile_enabled = True
+                    return True
+                except ValueError:
+                    # Some other profiler, such as a debugger, is active
+                    pass
+            self._skipped_profiles += 1
+            return False
+
+    def _disable(self, profile: cProfile.Profile):
+        profile.disable()
+        with self._profile_disabled:
+            self._profile_enabled = False
+            self._profile_disabled.notify()
+
+    def add_profile(self, profile: cProfile.Profile, request: bool = False):
+        """Merge a finished profile into the session's table"""
+        stats = pstats.Stats(profile)
+        with self._lock:
+            if self._stats is None:
+                self._stats = stats
+            else:
+                self._stats.add(stats)
+            if request:
+                self._profiled_requests += 1
+
+    def _frame_label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _sample_stacks(self, interval: float, stop: threading.Event):
+        own = threading.get_ident()
+        while not stop.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            samples = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(frame.f_code)
+                    frame = frame.f_back
+                labels = [names.get(ident, str(ident))]
+                labels.extend(self._frame_label(code) for code in reversed(frames[-MAX_STACK_DEPTH:]))
+                samples.append(";".join(labels))
+            with self._lock:
+                for stack in samples:
+                    if stack in self._stacks or len(self._stacks) < self.max_stacks:
+                        self._stacks[stack] += 1
+                    else:
+                        self._stacks[TRUNCATED_STACK] += 1
+                self._samples += 1
+
+    def collapsed_stacks(self) -> str:
+        """Stack samples as `thread;outer;...;inner count` lines, the input of flamegraph tools"""
+        with self._lock:
+            stacks = list(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks))
+
+    def collapsed_memory(self) -> str:
+        """Live bytes allocated during the session, by allocating stack, in collapsed format"""
+        with self._lock:
+            sites = list(self._memory_sites)
+        return "".join(f"{stack} {size}\n" for stack, size, _ in sites)
+
+    def pstats_dump(self) -> Optional[bytes]:
+        """The merged cProfile table in the file format `pstats.Stats` reads, or None if empty"""
+        with self._lock:
+            if self._stats is None:
+                return None
+            return marshal.dumps(self._stats.stats)
+
+    def top_functions(self, limit: int = 20) -> str:
+        """The merged cProfile table as text, by cumulative time"""
+        with self._lock:
+            if self._stats is None:
+                return ""
+            output = io.StringIO()
+            self._stats.stream = output
+            self._stats.sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+    def _status(self) -> dict:
+        return {
+            "active": self.active,
+            "session": self._session,
+            "settings": self._settings,
+            "started_at": self._started_at,
+            "ends_at": self._ends_at if self.active else self._stopped_at,
+            "profiled_requests": self._profiled_requests,
+            "skipped_requests": self._skipped_requests,
+            "skipped_profiles": self._skipped_profiles,
+            "profiled_functions": len(self._stats.stats) if self._stats is not None else 0,
+            "stack_samples": self._samples,
+            "distinct_stacks": len(self._stacks),
+            "truncated_samples": self._stacks.get(TRUNCATED_STACK, 0),
+            "memory_sites": len(self._memory_sites),
+            "memory_peak_bytes": self._memory_peak,
+        }
+
+    def status(self) -> dict:
+        with self._lock:
+            return self._status()
+
+
+def current_profiler() -> Optional[Profiler]:
+    """The profiler collecting for the request being handled, if it was sampled"""
+    return _profiling.get()
+
+
+def call_profiled(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Call fn, profiling it if the current request was sampled"""
+    profiler = _profiling.get()
+    if profiler is None:
+        return fn(*args, **kwargs)
+    return profiler.call(fn, *args, **kwargs)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Profiler:
+    """Get the process-wide Profiler"""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
@@ -0,0 +1,40 @@
+import logging
+import threading
+from typing import Optional
+
+from app.utils.data_loader import TaxRulesLoader
+
+logger = logging.getLogger(__name__)
+
+
+class RulesReloader:
+    """Background poller that hot-reloads tax rules when their files change"""
+
+    def __init__(self, rules_loader: TaxRulesLoader, interval: float = 30.0):
+        self.rules_loader = rules_loader
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rules-reloader", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching tax rules for changes every {self.interval:g}s")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 5)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.rules_loader.has_changed():
+                    self.rules_loader.reload()
+            except Exception as e:
+                logger.error(f"Tax rules poll failed: {str(e)}")
@@ -0,0 +1,215 @@
+import logging
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no meaning for matching; negations are deliberately kept
+STOPWORDS = frozenset(
+    "a an and are as at be by for from i in is it its me my myself of on or our ours the this "
+    "to we with own also just".split()
+)
+
+# Common paraphrases in expense questions, mapped to one canonical word
+SYNONYMS = {
+    "clean": "wash", "cleaning": "wash", "launder": "wash", "laundry": "wash", "washing": "wash",
+    "purchase": "buy", "purchased": "buy", "bought": "buy", "buying": "buy",
+    "uniforms": "uniform", "whites": "uniform", "workwear": "uniform", "clothing": "uniform",
+    "fees": "fee", "subscription": "membership", "subscriptions": "membership",
+    "laptop": "computer", "pc": "computer",
+    "travelling": "travel", "traveling": "travel", "commute": "travel",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_question(text: str) -> List[str]:
+    """Lowercased words with possessives, stopwords and common paraphrases folded"""
+    text = text.lower().replace("n't", " not").replace("'s", "").replace("’s", "")
+    words = []
+    for word in _WORD_RE.findall(text):
+        if word in STOPWORDS:
+            continue
+        word = SYNONYMS.get(word, word)
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = SYNONYMS.get(word[:-1], word[:-1])
+        words.append(word)
+    return words
+
+
+class HashingEncoder:
+    """
+    Dependency-free question embedding: word unigrams, word bigrams and
+    character trigrams hashed into a fixed-size signed vector, L2-normalised.
+    Lexical only, so paraphrases must share most of their content words.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float):
+        h = zlib.crc32(feature.encode())
+        vector[h % self.dim] += weight if h & 0x80000000 else -weight
+
+    def encode(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = normalize_question(text)
+        for word in words:
+            self._add(vector, f"w:{word}", 1.0)
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                self._add(vector, f"c:{padded[i:i + 3]}", 0.25)
+        for first, second in zip(words, words[1:]):
+            self._add(vector, f"b:{first} {second}", 0.5)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEncoder:
+    """A small sentence-transformers model, for paraphrases that share few words"""
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("The sentence-transformers semantic cache encoder needs the sentence-transformers package")
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, text: str) -> np.ndarray:
+        text = " ".join(normalize_question(text))
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+SEMANTIC_ENCODERS = {
+    "hashing": HashingEncoder,
+    "sentence-transformers": SentenceTransformerEncoder,
+}
+
+
+def create_encoder(name: str, model_name: Optional[str] = None):
+    """Build the semantic cache encoder named by configuration"""
+    if name not in SEMANTIC_ENCODERS:
+        raise ValueError(f"Unknown semantic cache encoder: {name}")
+    if name == "sentence-transformers" and model_name:
+        return SentenceTransformerEncoder(model_name)
+    return SEMANTIC_ENCODERS[name]()
+
+
+class _Partition:
+    """Question vectors and the cache keys of their results, oldest first once full"""
+    __slots__ = ("vectors", "keys", "size", "next")
+
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.keys: List[Optional[str]] = [None] * capacity
+        self.size = 0
+        self.next = 0
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour index from question embeddings to result cache keys.
+
+    Entries are partitioned by (mapped profession, rules version,
+    include_categories), so a question only ever reuses a result scored
+    against the same rules. A lookup returns the cache key of the most
+    similar earlier question if its cosine similarity reaches threshold;
+    the result itself stays in the result cache, so its TTL, eviction and
+    invalidation apply unchanged. Each partition keeps at most
+    max_entries questions, overwriting the oldest.
+    """
+
+    def __init__(self, encoder, threshold: float = 0.9, max_entries: int = 1000, max_partitions: int = 1000):
+        self.encoder = encoder
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.max_partitions = max(1, max_partitions)
+        self._partitions: "OrderedDict[Hashable, _Partition]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def find(self, partition: Hashable, questions: str) -> Optional[Tuple[str, float]]:
+        """(cache key, similarity) of the closest earlier question at or above the threshold"""
+        with self._lock:
+            index = self._partitions.get(partition)
+            if index is None or index.size == 0:
+                self._misses += 1
+                return None
+        vector = self.encoder.encode(questions)
+        with self._lock:
+            # The partition may have been evicted or invalidated while encoding
+            if self._partitions.get(partition) is not index:
+                self._misses += 1
+                return None
+            similarities = index.vectors[:index.size] @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._partitions.move_to_end(partition)
+            return index.keys[best], similarity
+
+    def add(self, partition: Hashable, questions: str, cache_key: str):
+        """Remember that cache_key holds the result for these questions"""
+        vector = self.encoder.encode(questions)
+        with self._lock:
+            index = self._partitions.get(partition)
+            if index is None:
+                index = self._partitions[partition] = _Partition(len(vector), min(16, self.max_entries))
+                if len(self._partitions) > self.max_partitions:
+                    self._partitions.popitem(last=False)
+            else:
+                self._partitions.move_to_end(partition)
+            if index.size == len(index.keys) and index.size < self.max_entries:
+                # Grow geometrically up to max_entries
+                capacity = min(self.max_entries, index.size * 2)
+                vectors = np.zeros((capacity, index.vectors.shape[1]), dtype=np.float32)
+                vectors[:index.size] = index.vectors
+                index.vectors = vectors
+                index.keys.extend([None] * (capacity - index.size))
+            slot = index.next if index.size == self.max_entries else index.size
+            index.vectors[slot] = vector
+            index.keys[slot] = cache_key
+            index.size = min(index.size + 1, self.max_entries)
+            index.next = (slot + 1) % self.max_entries
+
+    def discard(self, partition: Hashable, cache_key: str):
+        """Forget a cache key whose result is no longer cached"""
+        with self._lock:
+            index = self._partitions.get(partition)
+            if index is None:
+                return
+            for slot in range(index.size):
+                if index.keys[slot] == cache_key:
+                    # Zero the vector so it can never be the nearest match again
+                    index.vectors[slot] = 0.0
+                    index.keys[slot] = None
+
+    def invalidate_professions(self, professions: Set[str]) -> int:
+        """Drop the partitions of these mapped professions"""
+        with self._lock:
+            stale = [p for p in self._partitions if isinstance(p, tuple) and p and p[0] in professions]
+            for partition in stale:
+                del self._partitions[partition]
+            return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "partitions": len(self._partitions),
+                "entries": sum(index.size for index in self._partitions.values()),
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one in-flight execution.
+
+    The first caller starts the work as its own task; callers that arrive while
+    it runs await the same task instead of starting another. Because the work
+    is a separate task, a caller that disconnects does not cancel it for others.
+
+    Joiners share the first caller's outcome, errors included, and so also any
+    limit that only applied to the first caller, such as its deadline. Errors
+    of a type given in retry_on instead make a joiner run its own fn once more.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.retried = 0
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        retry_on: Tuple[Type[BaseException], ...] = ()
+    ) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+            return await asyncio.shield(task)
+        self.coalesced += 1
+        try:
+            return await asyncio.shield(task)
+        except retry_on:
+            # Start a new flight with this caller's fn, or join one another joiner started
+            self.retried += 1
+            return await self.do(key, fn)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "retried": self.retried,
+        }
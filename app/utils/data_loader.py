@@ -1,75 +1,278 @@
 from pathlib import Path
+import hashlib
 import json
 import logging
-from typing import Dict, List
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, Hashable, List, Mapping, Optional, Set, Tuple
 from difflib import SequenceMatcher
 
 logger = logging.getLogger(__name__)
 
+RULES_DIR = Path(__file__).resolve().parent.parent / "data" / "tax_rules"
+
+
+class TaxRule:
+    """Compact, read-only record for a single tax relief rule"""
+    __slots__ = ("profession", "name", "criteria", "category")
+
+    def __init__(self, profession: str, name: str, criteria: str, category: str):
+        object.__setattr__(self, "profession", profession)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "criteria", criteria)
+        object.__setattr__(self, "category", category)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("TaxRule is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, TaxRule):
+            return NotImplemented
+        return (
+            self.profession == other.profession
+            and self.name == other.name
+            and self.criteria == other.criteria
+            and self.category == other.category
+        )
+
+    def __hash__(self):
+        return hash((self.profession, self.name, self.criteria, self.category))
+
+    def __repr__(self):
+        return f"TaxRule(profession={self.profession!r}, name={self.name!r})"
+
+    def to_dict(self) -> Dict[str, str]:
+        """Return the rule in its original JSON shape"""
+        return {
+            "profession": self.profession,
+            "name": self.name,
+            "criteria": self.criteria,
+        }
+
+
+class RulesSnapshot:
+    """Immutable, pre-indexed view of every tax rule loaded from disk"""
+    __slots__ = (
+        "rules", "by_profession", "by_category", "professions", "version",
+        "file_hashes", "loaded_at", "memo", "_by_profession_lower"
+    )
+
+    def __init__(self, rules: Tuple[TaxRule, ...], file_hashes: Optional[Dict[str, str]] = None):
+        by_profession: Dict[str, List[TaxRule]] = {}
+        by_category: Dict[str, List[TaxRule]] = {}
+        for rule in rules:
+            by_profession.setdefault(rule.profession, []).append(rule)
+            by_category.setdefault(rule.category, []).append(rule)
+
+        by_profession_lower: Dict[str, List[TaxRule]] = {}
+        for profession, profession_rules in by_profession.items():
+            by_profession_lower.setdefault(profession.lower(), []).extend(profession_rules)
+
+        self.rules: Tuple[TaxRule, ...] = tuple(rules)
+        self.by_profession: Mapping[str, Tuple[TaxRule, ...]] = MappingProxyType(
+            {k: tuple(v) for k, v in by_profession.items()}
+        )
+        self.by_category: Mapping[str, Tuple[TaxRule, ...]] = MappingProxyType(
+            {k: tuple(v) for k, v in by_category.items()}
+        )
+        self.professions: FrozenSet[str] = frozenset(by_profession)
+        self._by_profession_lower = MappingProxyType(
+            {k: tuple(v) for k, v in by_profession_lower.items()}
+        )
+        self.file_hashes: Mapping[str, str] = MappingProxyType(dict(file_hashes or {}))
+        version = hashlib.sha256()
+        for name, digest in sorted(self.file_hashes.items()):
+            version.update(f"{name}:{digest}\n".encode())
+        self.version: str = version.hexdigest()[:12]
+        self.loaded_at: float = time.time()
+        # Values that users of this snapshot derive from it, dropped along with it
+        self.memo: Dict[Hashable, object] = {}
+
+    @classmethod
+    def from_directory(cls, rules_dir: Path) -> "RulesSnapshot":
+        """Parse every *_rules.json file in rules_dir into a snapshot"""
+        rules = []
+        file_hashes = {}
+        for file_path in sorted(rules_dir.glob("*_rules.json")):
+            category = file_path.name[: -len("_rules.json")]
+            content = file_path.read_bytes()
+            file_hashes[file_path.name] = hashlib.sha256(content).hexdigest()
+            for rule in json.loads(content):
+                rules.append(TaxRule(
+                    profession=rule["profession"],
+                    name=rule["name"],
+                    criteria=rule["criteria"],
+                    category=category,
+                ))
+        return cls(tuple(rules), file_hashes)
+
+    def changed_professions(self, other: "RulesSnapshot") -> Set[str]:
+        """Professions whose rules differ between this snapshot and another"""
+        professions = self.professions | other.professions
+        return {
+            profession for profession in professions
+            if self.by_profession.get(profession) != other.by_profession.get(profession)
+        }
+
+    def rules_for_profession(self, profession: str) -> Tuple[TaxRule, ...]:
+        """Rules whose profession matches exactly (case-insensitive)"""
+        rules = self.by_profession.get(profession)
+        if rules is not None:
+            return rules
+        return self._by_profession_lower.get(profession.lower(), ())
+
+    def rules_for_category(self, category: str) -> Tuple[TaxRule, ...]:
+        """Rules from a category file, e.g. 'it_digital' or 'IT_Digital'"""
+        return self.by_category.get(category.lower(), ())
+
+    def __len__(self):
+        return len(self.rules)
+
+
+ReloadListener = Callable[[Set[str], RulesSnapshot, RulesSnapshot], None]
+
+
 class TaxRulesLoader:
-    def __init__(self):
-        self.rules_dir = Path("app/data/tax_rules")
+    def __init__(self, rules_dir: Optional[Path] = None):
+        self.rules_dir = Path(rules_dir) if rules_dir else RULES_DIR
         self.cache = {}
-        
+        self._snapshot: Optional[RulesSnapshot] = None
+        self._fingerprint: Optional[Dict[str, Tuple[int, int]]] = None
+        self._lock = threading.Lock()
+        self._listeners: List[ReloadListener] = []
+
+    @property
+    def snapshot(self) -> RulesSnapshot:
+        """The compiled rules snapshot, built on first access"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build_snapshot()
+                snapshot = self._snapshot
+        return snapshot
+
+    def _build_snapshot(self) -> RulesSnapshot:
+        try:
+            fingerprint = self._stat_files()
+            snapshot = RulesSnapshot.from_directory(self.rules_dir)
+            # Only a successful parse is recorded, so has_changed() keeps retrying a failed one
+            self._fingerprint = fingerprint
+            logger.info(f"Compiled {len(snapshot)} tax rules for {len(snapshot.professions)} professions")
+            return snapshot
+        except Exception as e:
+            logger.error(f"Error loading tax rules: {str(e)}")
+            return RulesSnapshot(())
+
+    def _stat_files(self) -> Dict[str, Tuple[int, int]]:
+        """Cheap change fingerprint: (mtime_ns, size) for every rules file"""
+        fingerprint = {}
+        for file_path in self.rules_dir.glob("*_rules.json"):
+            stat = file_path.stat()
+            fingerprint[file_path.name] = (stat.st_mtime_ns, stat.st_size)
+        return fingerprint
+
+    def has_changed(self) -> bool:
+        """Whether any rules file was added, removed or touched since the last load"""
+        try:
+            return self._stat_files() != self._fingerprint
+        except OSError as e:
+            logger.error(f"Error checking tax rules for changes: {str(e)}")
+            return False
+
+    def add_reload_listener(self, listener: ReloadListener):
+        """Register a callback run as listener(changed_professions, old, new) after a swap"""
+        self._listeners.append(listener)
+
+    def reload(self, force: bool = False) -> Set[str]:
+        """
+        Rebuild the snapshot if the rules files changed and atomically swap it in.
+        Returns the professions whose rules changed.
+        """
+        with self._lock:
+            old_snapshot = self._snapshot
+            if old_snapshot is not None and not force and not self.has_changed():
+                return set()
+
+            try:
+                fingerprint = self._stat_files()
+                new_snapshot = RulesSnapshot.from_directory(self.rules_dir)
+            except Exception as e:
+                # Keep serving the previous snapshot rather than an empty one
+                logger.error(f"Error reloading tax rules, keeping current snapshot: {str(e)}")
+                return set()
+
+            self._fingerprint = fingerprint
+            if old_snapshot is None:
+                self._snapshot = new_snapshot
+                return set(new_snapshot.professions)
+            if new_snapshot.version == old_snapshot.version:
+                logger.info("Tax rules files touched but content unchanged")
+                return set()
+
+            changed = old_snapshot.changed_professions(new_snapshot)
+            self._snapshot = new_snapshot
+            self.cache = {}
+
+        logger.info(
+            f"Reloaded tax rules {old_snapshot.version} -> {new_snapshot.version}, "
+            f"{len(changed)} professions changed"
+        )
+        for listener in list(self._listeners):
+            try:
+                listener(changed, old_snapshot, new_snapshot)
+            except Exception as e:
+                logger.error(f"Tax rules reload listener failed: {str(e)}")
+        return changed
+
     def _similarity_score(self, a: str, b: str) -> float:
         """Calculate string similarity score"""
         return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
-    def load_rules_for_profession(self, profession: str, profession_mapper=None) -> List[Dict]:
+    def load_rules_for_profession(self, profession: str, profession_mapper=None) -> Tuple[TaxRule, ...]:
         """Load rules specific to a profession"""
         # First try loading from cache
-        if profession in self.cache:
-            return self.cache[profession]
-            
-        # Load all rules
-        all_rules = self.load_all_rules()
-        
+        cache = self.cache
+        if profession in cache:
+            return cache[profession]
+
+        snapshot = self.snapshot
+
         # Get mapped profession if available
         mapped_profession = profession
         if profession_mapper:
             mapped_profession = profession_mapper.get_matching_profession(profession)
-            
+
         logger.info(f"Looking for rules for profession: {profession} (mapped to: {mapped_profession})")
-        
+
         # Try exact match first
-        relevant_rules = [
-            rule for rule in all_rules
-            if rule["profession"].lower() == mapped_profession.lower()
-        ]
-        
+        relevant_rules = snapshot.rules_for_profession(mapped_profession)
+
         # If no exact match, try fuzzy matching
         if not relevant_rules:
             threshold = 0.85  # Adjust this threshold as needed
-            for rule in all_rules:
-                similarity = self._similarity_score(rule["profession"], mapped_profession)
+            matched = set()
+            for candidate in snapshot.professions:
+                similarity = self._similarity_score(candidate, mapped_profession)
                 if similarity >= threshold:
-                    logger.info(f"Found fuzzy match: {rule['profession']} for {mapped_profession} (score: {similarity:.2f})")
-                    if rule not in relevant_rules:
-                        relevant_rules.append(rule)
-        
+                    logger.info(f"Found fuzzy match: {candidate} for {mapped_profession} (score: {similarity:.2f})")
+                    matched.add(candidate)
+            relevant_rules = tuple(rule for rule in snapshot.rules if rule.profession in matched)
+
         # Log the results
         if relevant_rules:
             logger.info(f"Found {len(relevant_rules)} rules for {mapped_profession}")
         else:
             logger.warning(f"No rules found for {mapped_profession}")
-            
+
         # Cache the results
-        self.cache[profession] = relevant_rules
+        cache[profession] = relevant_rules
         return relevant_rules
 
     def load_all_rules(self) -> List[Dict]:
-        """Load all tax rules from all category files"""
-        all_rules = []
-        
-        try:
-            for file_path in self.rules_dir.glob("*_rules.json"):
-                with open(file_path) as f:
-                    rules = json.load(f)
-                    all_rules.extend(rules)
-            return all_rules
-        except Exception as e:
-            logger.error(f"Error loading tax rules: {str(e)}")
-            return []
+        """Return all tax rules as plain dicts"""
+        return [rule.to_dict() for rule in self.snapshot.rules]
 
     def clear_cache(self):
         """Clear the rules cache"""
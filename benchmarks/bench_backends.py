@@ -0,0 +1,129 @@
+"""
+Accuracy parity, latency and memory of the inference backends against fp32.
+
+Each backend is loaded in its own process so its resident memory (RSS
+after loading and scoring) is measured in isolation. All backends score
+the same (question, rule) pairs; parity is the largest score difference
+from fp32 and the share of pairs on the same side of the relevance
+threshold. Exits non-zero if any backend agrees with
+fp32 on fewer than --min-agreement of the decisions.
+
+    python -m benchmarks.bench_backends --model /models/bart-large-mnli
+    python -m benchmarks.bench_backends          # tiny random model, smoke test only
+"""
+import argparse
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.label_planner import rule_label
+from app.services.llm_service import HYPOTHESIS_TEMPLATE, RELEVANCE_THRESHOLD
+from app.services.nli_scorer import INFERENCE_BACKENDS, NLIScorer, export_onnx
+from app.services.profession_mapper import ProfessionMapper
+from app.utils.data_loader import get_rules_loader
+from benchmarks.eval_prefilter import CORPUS
+from benchmarks.tiny_nli import build_tiny_nli_model
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _requests():
+    """One list of NLI pairs per corpus entry, as LLMService.recommend builds them"""
+    mapper = ProfessionMapper()
+    snapshot = get_rules_loader().snapshot
+    requests = []
+    for profession, question in CORPUS:
+        rules = snapshot.rules_for_profession(mapper.get_matching_profession(profession))
+        premise = (
+            f"I am a {profession} and want to know about tax relief for: {question}. "
+            "This includes equipment, travel, uniforms, and professional expenses."
+        )
+        requests.append([(premise, HYPOTHESIS_TEMPLATE.format(rule_label(rule))) for rule in rules])
+    return requests
+
+
+def _measure(model_path: str, backend: str, onnx_dir: str, repeats: int, threads: int, results):
+    import torch
+
+    torch.set_num_threads(threads)
+    started = time.perf_counter()
+    onnx_path = str(Path(onnx_dir) / f"{backend}.onnx") if backend.startswith("onnx") else None
+    scorer = NLIScorer.from_pretrained(model_path, backend=backend, onnx_path=onnx_path, threads=threads)
+    load_seconds = time.perf_counter() - started
+
+    requests = _requests()
+    scores = [score for pairs in requests for score in scorer.score(pairs)]
+    latencies = []
+    for _ in range(repeats):
+        for pairs in requests:
+            started = time.perf_counter()
+            scorer.score(pairs)
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    results.put({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "rss_mb": _rss_mb(),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "scores": scores,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="saved NLI model directory (default: build a tiny random one)")
+    parser.add_argument("--backends", default=",".join(INFERENCE_BACKENDS))
+    parser.add_argument("--repeats", type=int, default=5, help="passes over the corpus per backend")
+    parser.add_argument("--threads", type=int, default=1, help="intra-op threads")
+    parser.add_argument("--threshold", type=float, default=RELEVANCE_THRESHOLD)
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    model_path = str(args.model or build_tiny_nli_model(
+        Path(tempfile.gettempdir()) / "tax-relief-tiny-nli-256", d_model=256, layers=4
+    ))
+    backends = ["fp32"] + [b for b in args.backends.split(",") if b and b != "fp32"]
+    context = multiprocessing.get_context("spawn")
+    reports = {}
+    with tempfile.TemporaryDirectory() as onnx_dir:
+        for backend in backends:
+            if backend.startswith("onnx"):
+                # Export up front so the measured process only loads the graph
+                export_onnx(model_path, Path(onnx_dir) / f"{backend}.onnx", quantized=backend == "onnx-int8")
+            results = context.Queue()
+            process = context.Process(
+                target=_measure, args=(model_path, backend, onnx_dir, args.repeats, args.threads, results)
+            )
+            process.start()
+            reports[backend] = results.get()
+            process.join()
+
+    reference = reports["fp32"]["scores"]
+    failed = False
+    print(f"{len(reference)} pairs, threshold {args.threshold}")
+    print(f"{'backend':<10} {'load s':>7} {'rss MB':>8} {'p50 ms':>8} {'p99 ms':>8} {'max diff':>9} {'agree':>7}")
+    for backend, report in reports.items():
+        diffs = [abs(a - b) for a, b in zip(report["scores"], reference)]
+        agree = sum(
+            (a > args.threshold) == (b > args.threshold) for a, b in zip(report["scores"], reference)
+        ) / len(reference)
+        failed |= agree < args.min_agreement
+        print(
+            f"{backend:<10} {report['load_seconds']:>7.2f} {report['rss_mb']:>8.0f} "
+            f"{report['p50_ms']:>8.2f} {report['p99_ms']:>8.2f} {max(diffs):>9.4f} {agree:>7.1%}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
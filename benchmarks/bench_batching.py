@@ -0,0 +1,101 @@
+"""
+Throughput and tail latency of NLI scoring with micro-batching on and off.
+
+Concurrent clients each score one premise against a request-sized set of
+hypotheses, the way LLMService.recommend does. Uses a random-weight
+model built locally by benchmarks.tiny_nli, so it runs offline.
+
+    python -m benchmarks.bench_batching --clients 8 --requests 40
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app.services.batching import BatchScheduler
+from app.services.llm_service import HYPOTHESIS_TEMPLATE
+from app.services.nli_scorer import NLIScorer
+from app.utils.data_loader import get_rules_loader
+from benchmarks.tiny_nli import build_tiny_nli_model
+
+QUESTIONS = [
+    "I clean my own uniform and buy kitchen knives",
+    "I pay for professional body membership fees every year",
+    "I travel to client sites and buy my own laptop",
+    "I buy protective equipment and tools for work",
+]
+
+
+def _request_pairs(i: int, labels_per_request: int):
+    rules = get_rules_loader().snapshot.rules
+    labels = [f"{rule.name}: {rule.criteria}" for rule in rules]
+    start = (i * labels_per_request) % len(labels)
+    chosen = (labels * 2)[start:start + labels_per_request]
+    premise = QUESTIONS[i % len(QUESTIONS)]
+    return [(premise, HYPOTHESIS_TEMPLATE.format(label)) for label in chosen]
+
+
+def _run(scorer, clients: int, requests_per_client: int, labels_per_request: int):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(client_id: int):
+        for n in range(requests_per_client):
+            pairs = _request_pairs(client_id * requests_per_client + n, labels_per_request)
+            started = time.perf_counter()
+            scorer.score(pairs)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": len(latencies) / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="saved NLI model directory (default: build a tiny random one)")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=40, help="requests per client")
+    parser.add_argument("--labels", type=int, default=16, help="hypotheses per request")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model_path = args.model or build_tiny_nli_model(
+        Path(tempfile.gettempdir()) / "tax-relief-tiny-nli-256", d_model=256, layers=4
+    )
+    scorer = NLIScorer.from_pretrained(str(model_path))
+    scorer.score(_request_pairs(0, args.labels))  # warm up
+
+    results = {"off": _run(scorer, args.clients, args.requests, args.labels)}
+    batcher = BatchScheduler(scorer, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    results["on"] = _run(batcher, args.clients, args.requests, args.labels)
+    stats = batcher.stats()
+    batcher.close()
+
+    print(f"{args.clients} clients x {args.requests} requests x {args.labels} labels")
+    for mode, result in results.items():
+        print(
+            f"batching {mode:3}: {result['requests_per_second']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms"
+        )
+    print(f"average batch size with batching on: {stats['avg_batch_size']:.1f} pairs")
+
+
+if __name__ == "__main__":
+    main()
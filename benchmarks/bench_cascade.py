@@ -0,0 +1,83 @@
+"""
+Agreement and latency of the small/large model cascade against the large
+model alone.
+
+Every corpus request is scored by the large model (the reference) and by
+the cascade at each uncertainty band. Agreement is the share of pairs on
+the same side of the relevance threshold as the reference; escalated is
+the share of pairs the cascade sent to the large model. Latency is per
+request. A band of 0 trusts the small model everywhere; a band covering
+[0, 1] always escalates.
+
+    python -m benchmarks.bench_cascade --small /models/distilbart-mnli --large /models/bart-large-mnli
+    python -m benchmarks.bench_cascade          # two tiny random models, smoke test only
+"""
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.cascade import CascadeScorer
+from app.services.llm_service import RELEVANCE_THRESHOLD
+from app.services.nli_scorer import NLIScorer
+from benchmarks.bench_backends import _requests
+from benchmarks.tiny_nli import build_tiny_nli_model
+
+
+def _timed(scorer, requests, repeats: int):
+    """Scores for every pair, and per-request latencies in milliseconds"""
+    scores = [score for pairs in requests for score in scorer.score(pairs)]
+    latencies = []
+    for _ in range(repeats):
+        for pairs in requests:
+            started = time.perf_counter()
+            scorer.score(pairs)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return scores, sorted(latencies)
+
+
+def _p99(latencies):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small", help="small NLI model directory (default: tiny random model)")
+    parser.add_argument("--large", help="large NLI model directory (default: larger tiny random model)")
+    parser.add_argument("--bands", default="0,0.05,0.1,0.15,0.2,0.3")
+    parser.add_argument("--threshold", type=float, default=RELEVANCE_THRESHOLD)
+    parser.add_argument("--repeats", type=int, default=3, help="timed passes over the corpus")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    tmp = Path(tempfile.gettempdir())
+    small_path = args.small or str(build_tiny_nli_model(tmp / "tax-relief-tiny-nli"))
+    large_path = args.large or str(build_tiny_nli_model(tmp / "tax-relief-tiny-nli-256", d_model=256, layers=4))
+    small = NLIScorer.from_pretrained(small_path)
+    large = NLIScorer.from_pretrained(large_path)
+    requests = _requests()
+
+    reference, large_latencies = _timed(large, requests, args.repeats)
+    large_p50 = statistics.median(large_latencies)
+    print(f"{len(reference)} pairs in {len(requests)} requests, threshold {args.threshold}")
+    print(f"small {small_path}\nlarge {large_path}")
+    print(f"{'band':>6} {'escalated':>10} {'agree':>7} {'max diff':>9} {'p50 ms':>8} {'p99 ms':>8} {'speedup':>8}")
+    print(f"{'large':>6} {1:>10.1%} {1:>7.1%} {0:>9.4f} {large_p50:>8.2f} {_p99(large_latencies):>8.2f} {1:>7.2f}x")
+    for band in (float(b) for b in args.bands.split(",")):
+        cascade = CascadeScorer(small, large, threshold=args.threshold, band=band)
+        scores, latencies = _timed(cascade, requests, args.repeats)
+        agree = sum(
+            (a > args.threshold) == (b > args.threshold) for a, b in zip(scores, reference)
+        ) / len(reference)
+        max_diff = max(abs(a - b) for a, b in zip(scores, reference))
+        p50 = statistics.median(latencies)
+        print(
+            f"{band:>6.2f} {cascade.stats()['escalation_rate']:>10.1%} {agree:>7.1%} {max_diff:>9.4f} "
+            f"{p50:>8.2f} {_p99(latencies):>8.2f} {large_p50 / p50:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
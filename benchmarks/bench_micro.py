@@ -0,0 +1,136 @@
+"""
+Microbenchmarks for the per-request hot path that runs before inference:
+profession mapping, rules lookup and the result cache.
+
+Each case is called once per request in the recorded corpus, round after
+round, timing every call. Allocations are measured in a separate pass
+under tracemalloc (peak bytes allocated during one call) so tracing does
+not distort the timings. "cold" cases clear the memo or cache before each
+call; "warm" cases run against the populated one. Sub-microsecond cases
+time FAST_REPEAT calls per sample, since a single call is near the
+resolution of the clock. The rounds are split into TRIALS and the best
+trial is reported, so a burst of machine noise does not decide the result.
+
+    python -m benchmarks.bench_micro
+    python -m benchmarks.bench_micro --rounds 200 --json micro.json
+"""
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.services.cache import BoundedCache
+from app.services.cache_warmer import load_warm_list
+from app.services.llm_service import LLMService
+from app.services.profession_mapper import ProfessionMapper
+from app.utils.data_loader import TaxRulesLoader
+from benchmarks.report import best, print_table, summarise
+from benchmarks.stub_scorer import StubScorer
+
+DEFAULT_CORPUS = Path(__file__).parent / "corpus.jsonl"
+FAST_REPEAT = 20
+TRIALS = 5
+
+
+def _measure(
+    fn: Callable,
+    args: List[tuple],
+    rounds: int,
+    setup: Callable = None,
+    repeat: int = 1
+) -> Dict[str, float]:
+    """
+    Time fn(*a) for every a in args, rounds times, then measure its allocations.
+    With repeat > 1 each sample is the mean of that many calls in a row.
+    """
+    for a in args:
+        fn(*a)
+    clock = time.perf_counter_ns
+    calls = range(repeat)
+    trials = []
+    for _ in range(min(TRIALS, rounds)):
+        latencies = []
+        started = clock()
+        for _ in range(max(1, rounds // TRIALS)):
+            for a in args:
+                if setup is not None:
+                    setup()
+                call_started = clock()
+                for _ in calls:
+                    fn(*a)
+                latencies.append((clock() - call_started) // repeat)
+        trials.append((latencies, (clock() - started) / 1e9))
+
+    tracemalloc.start()
+    allocated = 0
+    try:
+        for a in args:
+            if setup is not None:
+                setup()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn(*a)
+            allocated += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return best([summarise(latencies, elapsed, allocated / len(args), repeat) for latencies, elapsed in trials])
+
+
+def run(corpus_path: Path = DEFAULT_CORPUS, rounds: int = 100) -> Dict[str, dict]:
+    """Run every microbenchmark case; returns results by case name"""
+    corpus = load_warm_list(str(corpus_path), 0)
+    professions = [(entry["profession"],) for entry in corpus]
+    requests = [
+        (entry["profession"], entry["questions"], entry.get("include_categories", False)) for entry in corpus
+    ]
+    results = {}
+
+    mapper = ProfessionMapper()
+    resolver = mapper.resolver
+    results["mapper.warm"] = _measure(mapper.get_matching_profession, professions, rounds, repeat=FAST_REPEAT)
+    results["mapper.cold"] = _measure(
+        mapper.get_matching_profession, professions, max(1, rounds // 2), setup=resolver._memo.clear
+    )
+
+    loader = TaxRulesLoader()
+    loader.snapshot
+    load_rules = lambda profession: loader.load_rules_for_profession(profession, mapper)
+    results["rules_loader.warm"] = _measure(load_rules, professions, rounds, repeat=FAST_REPEAT)
+    results["rules_loader.cold"] = _measure(load_rules, professions, max(1, rounds // 2), setup=loader.clear_cache)
+
+    cache = BoundedCache(max_entries=1000)
+    keys = [(f"key-{i}",) for i in range(len(corpus))]
+    for (key,) in keys:
+        cache.set(key, ["recommendation"])
+    results["cache.hit"] = _measure(cache.get, keys, rounds, repeat=FAST_REPEAT)
+    results["cache.miss"] = _measure(
+        cache.get, [(f"missing-{i}",) for i in range(len(corpus))], rounds, repeat=FAST_REPEAT
+    )
+
+    # Key generation, rules resolution and the cache tiers together, as the router does it
+    service = LLMService(scorer=StubScorer())
+    for request in requests:
+        service.recommend(*request)
+    results["llm_service.lookup_hit"] = _measure(service.lookup, requests, rounds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--rounds", type=int, default=100, help="passes over the corpus per case")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = run(args.corpus, args.rounds)
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Microbenchmark for the rules lookup overhead of a single /api/tax-relief request.
+
+The legacy path re-read and parsed every rules file four times per request
+(router, two ProfessionMapper calls and load_rules_for_profession). The
+snapshot path reads the compiled, in-memory index instead.
+
+Run from the repository root:
+    python -m benchmarks.bench_rules
+"""
+import json
+import timeit
+
+from app.services.profession_mapper import ProfessionMapper
+from app.utils.data_loader import RULES_DIR, RulesSnapshot, get_rules_loader
+
+PROFESSIONS = ["Chef", "Software Engineer", "Accountant", "Nurse", "Electrician"]
+
+
+def _legacy_load_all_rules():
+    all_rules = []
+    for file_path in RULES_DIR.glob("*_rules.json"):
+        with open(file_path) as f:
+            all_rules.extend(json.load(f))
+    return all_rules
+
+
+def legacy_request_overhead(profession: str):
+    _legacy_load_all_rules()  # router
+    for _ in range(2):  # generate_recommendations + load_rules_for_profession
+        valid_professions = {rule["profession"] for rule in _legacy_load_all_rules()}
+        profession in valid_professions
+    all_rules = _legacy_load_all_rules()
+    return [rule for rule in all_rules if rule["profession"].lower() == profession.lower()]
+
+
+def snapshot_request_overhead(profession: str):
+    snapshot = get_rules_loader().snapshot
+    for _ in range(2):
+        profession in snapshot.professions
+    return snapshot.rules_for_profession(profession)
+
+
+def _per_call_us(fn, number: int) -> float:
+    timer = timeit.Timer(lambda: [fn(p) for p in PROFESSIONS])
+    best = min(timer.repeat(repeat=5, number=number))
+    return best / (number * len(PROFESSIONS)) * 1e6
+
+
+def main():
+    # Make sure both paths agree before timing them
+    ProfessionMapper()
+    for profession in PROFESSIONS:
+        legacy = [rule["name"] for rule in legacy_request_overhead(profession)]
+        compiled = [rule.name for rule in snapshot_request_overhead(profession)]
+        assert sorted(legacy) == sorted(compiled), profession
+
+    build_us = min(timeit.repeat(lambda: RulesSnapshot.from_directory(RULES_DIR), repeat=5, number=20)) / 20 * 1e6
+    legacy_us = _per_call_us(legacy_request_overhead, number=50)
+    snapshot_us = _per_call_us(snapshot_request_overhead, number=5000)
+
+    print(f"snapshot build (once at startup): {build_us:10.1f} us")
+    print(f"legacy per-request rules overhead: {legacy_us:10.1f} us")
+    print(f"snapshot per-request overhead:     {snapshot_us:10.3f} us")
+    print(f"speedup:                           {legacy_us / snapshot_us:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
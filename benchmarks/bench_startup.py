@@ -0,0 +1,127 @@
+"""
+Startup time and per-worker memory: plain `uvicorn --workers` against the
+pre-fork server (python -m app.serve).
+
+Each mode is started with N workers. Startup time is measured until every
+worker has logged "Application startup complete". Memory is read from
+/proc/<pid>/smaps_rollup for the master and each worker. RSS counts shared
+pages in full for every process; PSS splits them between the processes
+sharing them, so total PSS is the real memory cost of the deployment.
+Linux only.
+
+    python -m benchmarks.bench_startup --workers 4 --model /models/bart-large-mnli
+    python -m benchmarks.bench_startup --workers 4      # tiny random model
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.tiny_nli import build_tiny_nli_model
+
+READY_LINE = "Application startup complete"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        text = (task / "children").read_text().split()
+        children.extend(int(child) for child in text)
+    return children
+
+
+def _memory_mb(pid: int) -> Dict[str, float]:
+    values = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        values[name] = int(value.split()[0]) / 1024
+    return {
+        "rss": values.get("Rss", 0.0),
+        "pss": values.get("Pss", 0.0),
+        "private": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0),
+    }
+
+
+def _run(mode: str, workers: int, model: str, timeout: float) -> dict:
+    port = _free_port()
+    if mode == "uvicorn":
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--workers", str(workers), "--port", str(port)]
+    else:
+        command = [sys.executable, "-m", "app.serve", "--workers", str(workers), "--port", str(port)]
+    env = dict(os.environ, TAX_RELIEF_MODEL=model, TAX_RELIEF_RULES_RELOAD_INTERVAL="0")
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    ready = threading.Event()
+    ready_count = 0
+
+    def watch():
+        nonlocal ready_count
+        for line in process.stderr:
+            if READY_LINE in line:
+                ready_count += 1
+                if ready_count == workers:
+                    ready.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    try:
+        if not ready.wait(timeout):
+            raise RuntimeError(f"{mode}: only {ready_count} of {workers} workers started within {timeout}s")
+        startup = time.perf_counter() - started
+        # Give the processes a moment to settle after startup
+        time.sleep(1.0)
+        master = _memory_mb(process.pid)
+        worker_memory = [_memory_mb(pid) for pid in _children(process.pid)]
+        # uvicorn may run helper processes; its workers are the largest children
+        worker_memory = sorted(worker_memory, key=lambda m: m["rss"], reverse=True)[:workers]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    return {
+        "mode": mode,
+        "startup_seconds": startup,
+        "worker_rss_mb": sum(m["rss"] for m in worker_memory) / len(worker_memory),
+        "worker_private_mb": sum(m["private"] for m in worker_memory) / len(worker_memory),
+        "total_pss_mb": master["pss"] + sum(m["pss"] for m in worker_memory),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="saved NLI model directory (default: build a tiny random one)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    model = str(args.model or build_tiny_nli_model(
+        Path(tempfile.gettempdir()) / "tax-relief-tiny-nli-256", d_model=256, layers=4
+    ))
+    print(f"{args.workers} workers, model {model}")
+    print(f"{'mode':<8} {'startup s':>10} {'worker RSS MB':>14} {'worker private MB':>18} {'total PSS MB':>13}")
+    for mode in ("uvicorn", "prefork"):
+        result = _run(mode, args.workers, model, args.timeout)
+        print(
+            f"{result['mode']:<8} {result['startup_seconds']:>10.1f} {result['worker_rss_mb']:>14.0f} "
+            f"{result['worker_private_mb']:>18.0f} {result['total_pss_mb']:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Per-request tokenization time with and without cached hypothesis token ids.
+
+Each request scores one premise against every IT & digital rule (the
+candidate set a profession gets with related rules turned on). The plain
+path calls tokenizer(premises, hypotheses), re-tokenizing the premise and
+every hypothesis for each pair. The cached path tokenizes the premise once
+and reuses the hypotheses' token ids. Both must produce identical batches.
+
+    python -m benchmarks.bench_tokenize --model facebook/bart-large-mnli
+    python -m benchmarks.bench_tokenize          # tiny word-level tokenizer
+"""
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.label_planner import plan_labels
+from app.services.llm_service import HYPOTHESIS_TEMPLATE
+from app.services.nli_scorer import NLIScorer
+from app.utils.data_loader import get_rules_loader
+from benchmarks.eval_prefilter import CORPUS
+from benchmarks.tiny_nli import build_tiny_nli_model
+
+
+def _requests():
+    snapshot = get_rules_loader().snapshot
+    it_rules = [rule for rule in snapshot.rules if rule.category == "IT_Digital"] or list(snapshot.rules)
+    labels = plan_labels(it_rules).labels
+    requests = []
+    for profession, question in CORPUS:
+        premise = (
+            f"I am a {profession} and want to know about tax relief for: {question}. "
+            "This includes equipment, travel, uniforms, and professional expenses."
+        )
+        requests.append([(premise, HYPOTHESIS_TEMPLATE.format(label)) for label in labels])
+    return requests
+
+
+def _time_ms(fn, requests, repeats: int):
+    latencies = []
+    for _ in range(repeats):
+        for pairs in requests:
+            started = time.perf_counter()
+            fn(pairs)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="NLI model id or path (default: tiny random model)")
+    parser.add_argument("--repeats", type=int, default=20, help="passes over the corpus")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    model_path = args.model or str(build_tiny_nli_model(Path(tempfile.gettempdir()) / "tax-relief-tiny-nli"))
+    scorer = NLIScorer.from_pretrained(model_path)
+    requests = _requests()
+
+    for pairs in requests:
+        plain, cached = scorer._tokenize_pairs(pairs), scorer.tokenize(pairs)
+        for name in plain:
+            assert (plain[name] == cached[name]).all(), f"{name} differs"
+
+    plain_p50, plain_p99 = _time_ms(scorer._tokenize_pairs, requests, args.repeats)
+    cached_p50, cached_p99 = _time_ms(scorer.tokenize, requests, args.repeats)
+    print(f"{len(requests)} requests x {len(requests[0])} pairs, {model_path}")
+    print(f"{'path':<8} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'plain':<8} {plain_p50:>8.3f} {plain_p99:>8.3f}")
+    print(f"{'cached':<8} {cached_p50:>8.3f} {cached_p99:>8.3f}")
+    print(f"saved {plain_p50 - cached_p50:.3f} ms per request at p50 ({plain_p50 / cached_p50:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Offline recall@K of the lexical prefilter against the full NLI ranking.
+
+For every (profession, question) pair in the corpus, all candidate rules
+(the profession's rules plus its category and related categories) are
+scored with the NLI model. Rules above the relevance threshold are the
+reference set; recall@K is the fraction of them the prefilter keeps in its
+top K. Use the smallest K with a recall of 1.0.
+
+    python -m benchmarks.eval_prefilter --model facebook/bart-large-mnli
+    python -m benchmarks.eval_prefilter          # tiny random model, smoke test only
+"""
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+from app.services.label_planner import rule_label
+from app.services.llm_service import HYPOTHESIS_TEMPLATE, RELEVANCE_THRESHOLD
+from app.services.nli_scorer import NLIScorer
+from app.services.prefilter import PREFILTER_BACKENDS, RulePrefilter
+from app.services.profession_mapper import ProfessionMapper
+from app.utils.data_loader import get_rules_loader
+from benchmarks.tiny_nli import build_tiny_nli_model
+
+CORPUS = [
+    ("Software Engineer", "I pay for cloud certification exams and buy my own laptop"),
+    ("Software Engineer", "I am a member of the BCS and attend training courses"),
+    ("Web Developer", "I pay for hosting, domains and design software subscriptions"),
+    ("Data Scientist", "I rent GPU compute in the cloud and buy datasets"),
+    ("UI/UX Designer", "I pay for Figma and Adobe licences and a drawing tablet"),
+    ("Nurse", "I wash my own nursing uniform and pay my NMC registration"),
+    ("Doctor", "I pay GMC fees and medical indemnity insurance"),
+    ("Chef", "I clean my own chef whites and buy kitchen knives"),
+    ("Electrician", "I buy my own tools and protective boots"),
+    ("Accountant", "I pay ICAEW membership and CPD course fees"),
+    ("Journalist", "I buy camera equipment and travel to interviews"),
+    ("Personal Trainer", "I pay for gym equipment and first aid certification"),
+]
+
+
+def _candidates(mapper, snapshot, profession):
+    mapped = mapper.get_matching_profession(profession)
+    rules = list(snapshot.rules_for_profession(mapped))
+    category = mapper.get_profession_category(mapped)
+    if category:
+        for name in [category] + mapper.get_related_categories(category):
+            rules.extend(snapshot.rules_for_category(name))
+    return mapped, tuple(dict.fromkeys(rules))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="NLI model id or path (default: tiny random model)")
+    parser.add_argument("--corpus", help="JSONL file of {profession, questions} objects")
+    parser.add_argument("--max-k", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=RELEVANCE_THRESHOLD)
+    args = parser.parse_args()
+
+    corpus = CORPUS
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = [(row["profession"], row["questions"]) for row in map(json.loads, f) if row]
+
+    model_path = args.model or str(build_tiny_nli_model(Path(tempfile.gettempdir()) / "tax-relief-tiny-nli"))
+    scorer = NLIScorer.from_pretrained(model_path)
+    snapshot = get_rules_loader().snapshot
+    mapper = ProfessionMapper()
+
+    reference = []
+    for profession, question in corpus:
+        mapped, rules = _candidates(mapper, snapshot, profession)
+        premise = (
+            f"I am a {profession} and want to know about tax relief for: {question}. "
+            "This includes equipment, travel, uniforms, and professional expenses."
+        )
+        scores = scorer.score([(premise, HYPOTHESIS_TEMPLATE.format(rule_label(rule))) for rule in rules])
+        relevant = {rule for rule, score in zip(rules, scores) if score > args.threshold}
+        reference.append((question, rules, relevant))
+
+    pool = sum(len(rules) for _, rules, _ in reference) / len(reference)
+    print(f"{len(reference)} queries, {pool:.1f} candidate rules per query on average")
+    for backend in PREFILTER_BACKENDS:
+        prefilter = RulePrefilter(backend, top_k=args.max_k)
+        prefilter.build(snapshot)
+        rankings = [
+            ([rule for rule, _ in prefilter.rank(question, rules, snapshot)], relevant)
+            for question, rules, relevant in reference
+        ]
+        smallest = None
+        print(f"\n{backend}")
+        for k in range(1, args.max_k + 1):
+            found = sum(len(relevant & set(ranked[:k])) for ranked, relevant in rankings)
+            total = sum(len(relevant) for _, relevant in rankings)
+            recall = found / total if total else 1.0
+            print(f"  recall@{k:<3} {recall:.3f}")
+            if smallest is None and recall >= 1.0:
+                smallest = k
+        print(f"  smallest K with no recall loss: {smallest if smallest is not None else f'> {args.max_k}'}")
+
+
+if __name__ == "__main__":
+    main()
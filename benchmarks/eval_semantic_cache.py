@@ -0,0 +1,125 @@
+"""
+Offline hit ratio and false-reuse rate of the semantic cache.
+
+The corpus is replayed in order as live traffic would arrive. Every
+request is also scored with the NLI model to get its true result. A
+request is an exact hit if the same question was seen before, and a
+semantic hit if the cache returns an earlier, similar question's result.
+A semantic hit is a false reuse when the reused recommendations name a
+different set of rules from the true result. Pick the lowest threshold
+whose false-reuse rate is acceptable.
+
+    python -m benchmarks.eval_semantic_cache --model facebook/bart-large-mnli
+    python -m benchmarks.eval_semantic_cache --encoder sentence-transformers --model <path>
+    python -m benchmarks.eval_semantic_cache          # tiny random model, smoke test only
+"""
+import argparse
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import FrozenSet, List
+
+from app.services.llm_service import LLMService, RecommendationResult
+from app.services.nli_scorer import NLIScorer
+from app.services.semantic_cache import SEMANTIC_ENCODERS, SemanticCache, create_encoder
+from benchmarks.tiny_nli import build_tiny_nli_model
+
+# Paraphrases of a few common scenarios, interleaved as they would arrive
+CORPUS = [
+    ("Chef", "I wash my own chef uniform"),
+    ("Chef", "I buy my own kitchen knives"),
+    ("Chef", "I clean my chef's uniform myself"),
+    ("Nurse", "I wash my own nursing uniform"),
+    ("Chef", "I purchase my own kitchen knives"),
+    ("Nurse", "I launder my nursing uniform at home"),
+    ("Software Engineer", "I pay for cloud certification exams"),
+    ("Nurse", "I pay my NMC registration fee"),
+    ("Chef", "I wash my chef whites at home"),
+    ("Software Engineer", "I pay for my cloud certification exam"),
+    ("Nurse", "I pay the NMC registration fees"),
+    ("Software Engineer", "I bought my own laptop for work"),
+    ("Electrician", "I buy my own tools and protective boots"),
+    ("Software Engineer", "I buy my own laptop for work"),
+    ("Electrician", "I purchase my own tools and protective boots"),
+    ("Electrician", "I don't buy my own tools"),
+    ("Chef", "I wash my own chef uniform"),
+    ("Accountant", "I pay ICAEW membership fees"),
+    ("Accountant", "I pay my ICAEW membership fee"),
+    ("Accountant", "I pay for CPD courses"),
+    ("Teacher", "I buy classroom supplies with my own money"),
+    ("Teacher", "I purchase classroom supplies with my own money"),
+    ("Teacher", "I pay NEU membership"),
+    ("Nurse", "I buy compression socks for shifts"),
+    ("Nurse", "I travel between patients in my own car"),
+    ("Nurse", "I travel between patients by car"),
+]
+
+
+def _rule_set(result: RecommendationResult) -> FrozenSet[str]:
+    """The rules a result recommends, ignoring their relevance percentages"""
+    return frozenset(line.split("\n")[0] for line in result.recommendations if line.startswith("•"))
+
+
+def evaluate(service: LLMService, corpus: List[tuple], encoder, threshold: float) -> dict:
+    cache = SemanticCache(encoder, threshold=threshold)
+    seen = {}
+    exact = semantic = false_reuse = 0
+    for profession, questions in corpus:
+        mapped, rules, version = service._resolve_rules(profession)
+        if not rules:
+            continue
+        cache_key = service._generate_cache_key(profession, questions, version)
+        truth = service.recommend(profession, questions)
+        if cache_key in seen:
+            exact += 1
+            continue
+        partition = (mapped, version, False)
+        match = cache.find(partition, questions)
+        if match is not None:
+            semantic += 1
+            false_reuse += _rule_set(seen[match[0]]) != _rule_set(truth)
+            continue
+        seen[cache_key] = truth
+        cache.add(partition, questions, cache_key)
+    total = len(corpus)
+    return {
+        "threshold": threshold,
+        "exact_hit_ratio": exact / total,
+        "semantic_hit_ratio": semantic / total,
+        "hit_ratio": (exact + semantic) / total,
+        "false_reuse_rate": false_reuse / semantic if semantic else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="NLI model id or path (default: tiny random model)")
+    parser.add_argument("--corpus", help="JSONL file of {profession, questions} objects, in arrival order")
+    parser.add_argument("--encoder", default="hashing", choices=sorted(SEMANTIC_ENCODERS))
+    parser.add_argument("--encoder-model", help="sentence-transformers model name or path")
+    parser.add_argument("--thresholds", default="0.7,0.8,0.85,0.9,0.95")
+    args = parser.parse_args()
+
+    corpus = CORPUS
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = [(row["profession"], row["questions"]) for row in map(json.loads, f) if row]
+
+    logging.disable(logging.WARNING)
+    model_path = args.model or str(build_tiny_nli_model(Path(tempfile.gettempdir()) / "tax-relief-tiny-nli"))
+    service = LLMService(scorer=NLIScorer.from_pretrained(model_path))
+    encoder = create_encoder(args.encoder, args.encoder_model)
+
+    print(f"{len(corpus)} requests, {args.encoder} encoder")
+    print(f"{'threshold':>9} {'exact hits':>11} {'semantic hits':>14} {'all hits':>9} {'false reuse':>12}")
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        report = evaluate(service, corpus, encoder, threshold)
+        print(
+            f"{report['threshold']:>9.2f} {report['exact_hit_ratio']:>11.1%} {report['semantic_hit_ratio']:>14.1%} "
+            f"{report['hit_ratio']:>9.1%} {report['false_reuse_rate']:>12.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
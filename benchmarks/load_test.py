@@ -0,0 +1,120 @@
+"""
+End-to-end load generator: replays a recorded request corpus against the
+ASGI app in-process, through every middleware, router and cache, with a
+deterministic stub in place of the NLI model so a CPU-only run finishes in
+seconds.
+
+--concurrency clients each send the corpus requests in turn, offset so they
+do not move in lockstep, for --rounds passes. Latency is measured per
+request from the client side. A second, shorter pass runs under tracemalloc
+to report allocations per request. Rate limiting is turned off.
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --concurrency 32 --delay-per-pair-ms 0.5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_CORPUS = Path(__file__).parent / "corpus.jsonl"
+
+
+def _load_app(delay_per_pair_ms: float):
+    """Import the app with rate limiting off and the stub scorer installed"""
+    os.environ["TAX_RELIEF_RATE_LIMIT_PER_MINUTE"] = "0"
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+    from app.main import app
+    from app.services import llm_service
+    from benchmarks.stub_scorer import StubScorer
+
+    llm_service._llm_service = llm_service.LLMService(scorer=StubScorer(delay_per_pair_ms))
+    return app
+
+
+async def _replay(client, corpus: List[dict], concurrency: int, rounds: int) -> List[int]:
+    latencies = []
+    failures = []
+
+    async def worker(offset: int):
+        for i in range(rounds * len(corpus)):
+            entry = corpus[(offset + i) % len(corpus)]
+            started = time.perf_counter_ns()
+            response = await client.post("/api/tax-relief", json=entry)
+            latencies.append(time.perf_counter_ns() - started)
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    stride = max(1, len(corpus) // concurrency)
+    await asyncio.gather(*(worker(n * stride) for n in range(concurrency)))
+    if failures:
+        raise RuntimeError(f"{len(failures)} requests failed, status codes {sorted(set(failures))}")
+    return latencies
+
+
+async def _run(app, corpus: List[dict], concurrency: int, rounds: int) -> Dict[str, float]:
+    import httpx
+
+    from benchmarks.report import summarise
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # One pass to fill the caches the way a running server would have
+            await _replay(client, corpus, 1, 1)
+            started = time.perf_counter()
+            latencies = await _replay(client, corpus, concurrency, rounds)
+            elapsed = time.perf_counter() - started
+
+            tracemalloc.start()
+            try:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                await _replay(client, corpus, 1, 1)
+                allocated = tracemalloc.get_traced_memory()[1] - before
+            finally:
+                tracemalloc.stop()
+    return summarise(latencies, elapsed, allocated / len(corpus))
+
+
+def run(
+    corpus_path: Path = DEFAULT_CORPUS,
+    concurrency: int = 16,
+    rounds: int = 5,
+    delay_per_pair_ms: float = 0.0
+) -> Dict[str, dict]:
+    """Replay the corpus; returns results by case name"""
+    from app.services.cache_warmer import load_warm_list
+
+    corpus = load_warm_list(str(corpus_path), 0)
+    app = _load_app(delay_per_pair_ms)
+    return {f"load.c{concurrency}": asyncio.run(_run(app, corpus, concurrency, rounds))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the corpus per client")
+    parser.add_argument("--delay-per-pair-ms", type=float, default=0.0, help="simulated model cost")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    from benchmarks.report import print_table
+
+    logging.disable(logging.WARNING)
+    results = run(args.corpus, args.concurrency, args.rounds, args.delay_per_pair_ms)
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Shared result format for the benchmark suite: latency percentiles,
+throughput and allocations per case, and comparison against a baseline.
+"""
+import json
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+# Case fields where a larger value is a regression, and where a smaller one is
+HIGHER_IS_WORSE = ("p50_us", "p95_us", "p99_us", "alloc_bytes_per_op")
+LOWER_IS_WORSE = ("ops_per_sec",)
+# Cases whose baseline p50 is below this are mostly timer and scheduling
+# noise, so they are reported but never counted as regressions
+NOISE_FLOOR_US = 1.0
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def best(summaries: List[Dict[str, float]]) -> Dict[str, float]:
+    """The trial with the lowest p50, as timeit keeps the best of its repeats"""
+    return min(summaries, key=lambda summary: summary["p50_us"])
+
+
+def summarise(
+    latencies_ns: List[int],
+    elapsed_s: float,
+    alloc_bytes_per_op: float,
+    repeat: int = 1
+) -> Dict[str, float]:
+    """
+    One case's result: throughput, latency percentiles in microseconds and
+    allocations. Each latency may be the mean of repeat back-to-back calls.
+    """
+    latencies_ns = sorted(latencies_ns)
+    ops = len(latencies_ns) * repeat
+    return {
+        "ops": ops,
+        "ops_per_sec": ops / elapsed_s if elapsed_s else 0.0,
+        "p50_us": percentile(latencies_ns, 0.50) / 1000,
+        "p95_us": percentile(latencies_ns, 0.95) / 1000,
+        "p99_us": percentile(latencies_ns, 0.99) / 1000,
+        "alloc_bytes_per_op": alloc_bytes_per_op,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Regressions of results against baseline, as readable lines. A field
+    regresses when it is worse than the baseline by more than tolerance
+    (a fraction, 0.25 = 25%). Cases missing from either side are skipped, and
+    so are cases with a baseline p50 under NOISE_FLOOR_US.
+    """
+    regressions = []
+    for case, base in sorted(baseline.items()):
+        current = results.get(case)
+        if current is None or base.get("p50_us", NOISE_FLOOR_US) < NOISE_FLOOR_US:
+            continue
+        for field in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+            if field not in base or field not in current or not base[field]:
+                continue
+            change = (current[field] - base[field]) / base[field]
+            if field in LOWER_IS_WORSE:
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f"{case}: {field} {base[field]:.1f} -> {current[field]:.1f} ({change:+.0%} worse)"
+                )
+    return regressions
+
+
+def load(path: Path) -> Dict[str, dict]:
+    return json.loads(Path(path).read_text())["cases"]
+
+
+def print_table(results: Dict[str, dict]):
+    print(f"{'case':<32} {'ops/s':>11} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'alloc B/op':>11}")
+    for case, result in results.items():
+        print(
+            f"{case:<32} {result['ops_per_sec']:>11.0f} {result['p50_us']:>9.1f} {result['p95_us']:>9.1f} "
+            f"{result['p99_us']:>9.1f} {result['alloc_bytes_per_op']:>11.0f}"
+        )
@@ -0,0 +1,29 @@
+"""
+A deterministic stand-in for the NLI model, so the request path can be
+benchmarked on CPU-only machines in seconds.
+
+Scores are derived from a hash of each (premise, hypothesis) pair, so the
+same request always gets the same recommendations. delay_per_pair_ms adds a
+fixed cost per pair to mimic a model of known speed.
+"""
+import hashlib
+import time
+from typing import List, Sequence, Tuple
+
+
+class StubScorer:
+    model_id = "stub"
+
+    def __init__(self, delay_per_pair_ms: float = 0.0):
+        self.delay_per_pair_ms = delay_per_pair_ms
+        self.pairs_scored = 0
+
+    def score(self, pairs: Sequence[Tuple[str, str]]) -> List[float]:
+        scores = []
+        for premise, hypothesis in pairs:
+            digest = hashlib.blake2b(f"{premise}\x00{hypothesis}".encode(), digest_size=4).digest()
+            scores.append(int.from_bytes(digest, "big") / 0xFFFFFFFF)
+        self.pairs_scored += len(pairs)
+        if self.delay_per_pair_ms:
+            time.sleep(self.delay_per_pair_ms * len(pairs) / 1000)
+        return scores
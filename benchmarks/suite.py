@@ -0,0 +1,74 @@
+"""
+The benchmark suite run before deploy: the hot-path microbenchmarks plus
+the in-process load test, written as one JSON report and compared against
+a stored baseline.
+
+Every case reports throughput (ops/s), p50/p95/p99 latency in microseconds
+and bytes allocated per operation. A case regresses when any of these is
+worse than the baseline by more than --tolerance; the suite then exits 1.
+Baselines are only comparable on the same machine, so none is committed:
+create benchmarks/baseline.json with --update-baseline on the machine that
+runs the gate, and refresh it when the hardware changes or a slowdown is
+accepted. Latencies under a microsecond are not gated (see report.py).
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --output report.json --tolerance 0.5
+    python -m benchmarks.suite --update-baseline
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+from pathlib import Path
+
+from benchmarks import bench_micro, load_test
+from benchmarks.report import compare, load, print_table
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=bench_micro.DEFAULT_CORPUS)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown as a fraction")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--micro-rounds", type=int, default=100)
+    parser.add_argument("--load-rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    cases = bench_micro.run(args.corpus, args.micro_rounds)
+    cases.update(load_test.run(args.corpus, args.concurrency, args.load_rounds))
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": cases,
+    }
+    print_table(cases)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+    regressions = compare(cases, load(args.baseline), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regressions beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Builds a small, randomly initialised BART NLI model and tokenizer on disk.
+
+Benchmarks use it to exercise the real tokenization and forward-pass code
+paths offline, without downloading facebook/bart-large-mnli. Scores from a
+random-weight model are meaningless; only timings and shapes matter.
+
+    python -m benchmarks.tiny_nli /tmp/tiny-nli
+"""
+import re
+import sys
+from pathlib import Path
+from typing import Optional
+
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>"]
+EXTRA_WORDS = (
+    "i am a and want to know about tax relief for this includes equipment travel "
+    "uniforms professional expenses text describes my own work"
+)
+
+
+def _vocabulary():
+    from app.utils.data_loader import get_rules_loader
+
+    words = set(EXTRA_WORDS.split())
+    for rule in get_rules_loader().snapshot.rules:
+        text = f"{rule.profession} {rule.name} {rule.criteria}".lower()
+        words.update(re.findall(r"\w+|[^\w\s]", text))
+    return SPECIAL_TOKENS + sorted(words)
+
+
+def build_tiny_nli_model(
+    path: Path,
+    d_model: int = 64,
+    layers: int = 2,
+    seed: int = 0,
+    max_positions: Optional[int] = 512,
+) -> Path:
+    """Save a random-weight BartForSequenceClassification and tokenizer to path"""
+    import torch
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import BartConfig, BartForSequenceClassification, PreTrainedTokenizerFast
+
+    path = Path(path)
+    if (path / "config.json").exists():
+        return path
+
+    vocab = {token: i for i, token in enumerate(_vocabulary())}
+    tokenizer = Tokenizer(models.WordLevel(vocab=vocab, unk_token="<unk>"))
+    tokenizer.normalizer = normalizers.Lowercase()
+    tokenizer.pre_tokenizer = pre_tokenizers.Sequence([
+        pre_tokenizers.Whitespace(), pre_tokenizers.Punctuation()
+    ])
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>",
+        pair="<s> $A </s> </s> $B </s>",
+        special_tokens=[("<s>", vocab["<s>"]), ("</s>", vocab["</s>"])],
+    )
+    fast_tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        bos_token="<s>", eos_token="</s>", pad_token="<pad>", unk_token="<unk>",
+        model_max_length=max_positions,
+    )
+
+    torch.manual_seed(seed)
+    config = BartConfig(
+        vocab_size=len(vocab),
+        d_model=d_model,
+        encoder_layers=layers,
+        decoder_layers=layers,
+        encoder_attention_heads=4,
+        decoder_attention_heads=4,
+        encoder_ffn_dim=d_model * 4,
+        decoder_ffn_dim=d_model * 4,
+        max_position_embeddings=max_positions,
+        pad_token_id=vocab["<pad>"],
+        bos_token_id=vocab["<s>"],
+        eos_token_id=vocab["</s>"],
+        decoder_start_token_id=vocab["</s>"],
+        forced_eos_token_id=vocab["</s>"],
+        num_labels=3,
+        id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+        label2id={"contradiction": 0, "neutral": 1, "entailment": 2},
+    )
+    model = BartForSequenceClassification(config).eval()
+
+    path.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(path)
+    fast_tokenizer.save_pretrained(path)
+    return path
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else "/tmp/tiny-nli")
+    print(build_tiny_nli_model(target))
@@ -0,0 +1,66 @@
+from app.services.answer_table import AnswerTable, write_answer_table
+from app.services.label_planner import plan_labels
+from app.services.llm_service import LLMService
+
+
+class CountingScorer:
+    model_id = "counting"
+
+    def __init__(self):
+        self.pairs = 0
+
+    def score(self, pairs):
+        self.pairs += len(pairs)
+        return [0.5] * len(pairs)
+
+
+def test_table_round_trips_and_checks_rules_version(tmp_path):
+    path = tmp_path / "answers.bin"
+    write_answer_table(str(path), "model-a", "snapshot-1", [
+        ("Chef", "I buy my own knives", "v1", ["knives", "uniform"], [0.75, 0.125]),
+        ("Nurse", "I wash my uniform", "v2", ["uniform"], [0.5]),
+    ])
+
+    table = AnswerTable(str(path))
+    assert table.model_id == "model-a" and len(table) == 2
+    assert table.get("  chef ", "I BUY my own  knives", "v1") == {"knives": 0.75, "uniform": 0.125}
+    assert table.get("Nurse", "I wash my uniform", "v2") == {"uniform": 0.5}
+    assert table.get("Nurse", "I wash my uniform", "v3") is None
+    assert table.get("Teacher", "I wash my uniform", "v2") is None
+    assert table.stats()["hits"] == 2 and table.stats()["misses"] == 2
+
+
+def test_service_answers_from_table_without_scoring(tmp_path):
+    scorer = CountingScorer()
+    service = LLMService(scorer=scorer)
+    profession, questions = "Chef", "I buy my own knife set and safety shoes"
+    _, rules, rules_version = service._resolve_rules(profession)
+    labels = plan_labels(rules, include_generic=True).labels
+    path = tmp_path / "answers.bin"
+    write_answer_table(str(path), scorer.model_id, service.rules_loader.snapshot.version, [
+        (profession, questions, rules_version, labels, [0.75] * len(labels)),
+    ])
+    service._answer_table = AnswerTable(str(path))
+
+    result = service.recommend(profession, questions, include_categories=True)
+    assert scorer.pairs == 0
+    assert len(result.recommendations) > 1 and "Relevance: 75%" in result.recommendations[1]
+    assert set(result.categories.values()) == {0.75}
+    assert service.cache_stats()["precomputed"]["hits"] == 1
+
+    service.recommend(profession, "I pay for my own food hygiene course")
+    assert scorer.pairs > 0
+
+
+def test_service_without_shared_tiers_opens_no_cache_files(tmp_path, monkeypatch):
+    from app.config import get_settings
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "persistent_cache_path", str(tmp_path / "results.db"))
+    monkeypatch.setattr(settings, "answer_table_path", str(tmp_path / "answers.bin"))
+    monkeypatch.setattr(settings, "semantic_cache", "hashing")
+
+    service = LLMService(scorer=CountingScorer(), shared_tiers=False)
+    assert service._persistent_cache is None and service._semantic_cache is None
+    assert service._answer_table is None
+    assert list(tmp_path.iterdir()) == []
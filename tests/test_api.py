@@ -1,3 +1,5 @@
+import json
+
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -11,4 +13,215 @@ def test_tax_relief_endpoint():
     
     response = client.post("/api/tax-relief", json=request_payload)
     assert response.status_code == 200
-    assert "recommendations" in response.json() 
\ No newline at end of file
+    assert "recommendations" in response.json() 
+
+def test_tax_relief_stream_ends_with_full_response():
+    request_payload = {
+        "profession": "Chef",
+        "questions": "I wash my chef whites and pay for food hygiene training"
+    }
+
+    response = client.post(
+        "/api/tax-relief/stream", json=request_payload, headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert events[-1]["event"] == "done"
+    streamed = [event["text"] for event in events if event["event"] == "recommendation"]
+    assert streamed[0] == events[-1]["recommendations"][0]
+    assert sorted(streamed) == sorted(events[-1]["recommendations"])
+
+def test_tax_relief_etag_revalidation_and_get_variant():
+    request_payload = {
+        "profession": "Chef",
+        "questions": "I buy my own knife set and safety shoes"
+    }
+
+    first = client.post("/api/tax-relief", json=request_payload)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    revalidated = client.post("/api/tax-relief", json=request_payload, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+
+    cacheable = client.get("/api/tax-relief", params=request_payload)
+    assert cacheable.status_code == 200
+    assert cacheable.headers["Cache-Control"].startswith("public, max-age=")
+    assert cacheable.headers["ETag"] == etag
+    assert cacheable.json() == first.json()
+    assert client.get("/api/tax-relief", params={"profession": "C", "questions": "x"}).status_code == 422
+
+def test_cache_hits_and_no_rules_answers_skip_the_inference_queue(monkeypatch):
+    from app.routers import tax_relief
+    from app.services.inference_executor import InferenceQueueFullError
+    from app.services.llm_service import NO_RULES_MESSAGE, get_llm_service
+
+    class FullExecutor:
+        async def run_within(self, *args, **kwargs):
+            raise InferenceQueueFullError(1)
+
+    questions = "I buy my own chef knives and wash my whites"
+    assert client.post("/api/tax-relief", json={"profession": "Chef", "questions": questions}).status_code == 200
+    monkeypatch.setattr(tax_relief, "get_inference_executor", lambda: FullExecutor())
+
+    response = client.post("/api/tax-relief", json={"profession": "Zookeeper Trainee", "questions": questions})
+    assert response.status_code == 200
+    assert response.json()["recommendations"] == [NO_RULES_MESSAGE]
+    assert client.post("/api/tax-relief", json={"profession": "Chef", "questions": questions}).status_code == 200
+
+    # Once resolved, the event loop probe needs no profession mapping
+    service = get_llm_service()
+    monkeypatch.setattr(service.profession_mapper, "get_matching_profession", None)
+    checked, result = service.lookup_memory("Chef", questions)
+    assert checked and result is not None
+    assert service.lookup_memory("Zookeeper Trainee", questions)[1].recommendations == [NO_RULES_MESSAGE]
+    assert service.lookup_memory("Baker", questions) == (False, None)
+
+def test_batch_keeps_input_order_across_chunks_and_limits_size(monkeypatch):
+    from app.config import get_settings
+    from app.services.llm_service import NO_RULES_MESSAGE, get_llm_service
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "bulk_chunk_size", 2)
+    service = get_llm_service()
+    chunks = []
+    recommend_many = service.recommend_many
+
+    def spy(items, **kwargs):
+        chunks.append(len(items))
+        return recommend_many(items, **kwargs)
+
+    monkeypatch.setattr(service, "recommend_many", spy)
+    chef = {"profession": "Chef", "questions": "I wash my own chef whites"}
+    unknown = {"profession": "Zookeeper Trainee", "questions": "I buy my own boots"}
+    payload = [chef, unknown, chef, chef, unknown]
+
+    response = client.post("/api/tax-relief/batch", json=payload)
+    assert response.status_code == 200
+    no_rules = [result["recommendations"] == [NO_RULES_MESSAGE] for result in response.json()]
+    assert no_rules == [False, True, False, False, True]
+    assert chunks == [2, 2, 1]
+
+    monkeypatch.setattr(settings, "bulk_max_requests", 4)
+    assert client.post("/api/tax-relief/batch", json=payload).status_code == 413
+
+def test_batch_stream_reads_lines_as_they_arrive_and_reports_bad_lines(monkeypatch):
+    from app.config import get_settings
+    from app.services.llm_service import NO_RULES_MESSAGE
+
+    monkeypatch.setattr(get_settings(), "bulk_chunk_size", 2)
+    # Lines split across upload chunks, a blank line and two bad lines
+    upload = [
+        b'{"profession": "Chef", "questions": "I wash my own chef whites"}\n{"profe',
+        b'ssion": "Zookeeper Trainee", "questions": "I buy my own boots"}\n\nnot json\n',
+        b'[1, 2]\n{"profession": "Chef", "questions": "I buy my own knives"}',
+    ]
+    response = client.post("/api/tax-relief/batch/stream", content=iter(upload))
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3, 4]
+    assert lines[1]["recommendations"] == [NO_RULES_MESSAGE]
+    assert "error" in lines[2] and lines[3]["error"] == "Expected a JSON object"
+    assert "recommendations" in lines[0] and "recommendations" in lines[4]
+
+def test_bulk_gives_up_when_the_queue_stays_full(monkeypatch):
+    from app.routers import tax_relief
+    from app.services.inference_executor import InferenceQueueFullError
+
+    class FullExecutor:
+        async def run(self, *args, **kwargs):
+            raise InferenceQueueFullError(7)
+
+    monkeypatch.setattr(tax_relief, "get_inference_executor", lambda: FullExecutor())
+    monkeypatch.setattr(tax_relief, "MAX_CHUNK_RETRIES", 0)
+    payload = [{"profession": "Chef", "questions": "I wash my own chef whites"}]
+
+    response = client.post("/api/tax-relief/batch", json=payload)
+    assert response.status_code == 503 and response.headers["Retry-After"] == "7"
+
+    response = client.post("/api/tax-relief/batch/stream", content=json.dumps(payload[0]))
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"index": 0, "error": "Service is busy. Please try again later.", "retry_after": 7}
+    ]
+
+def test_stream_finishes_off_the_event_loop(monkeypatch):
+    import asyncio
+
+    from app.services.llm_service import RecommendationStream
+
+    on_loop = []
+    finish = RecommendationStream.finish
+
+    def spy(self):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return finish(self)
+
+    monkeypatch.setattr(RecommendationStream, "finish", spy)
+    request_payload = {"profession": "Chef", "questions": "I pay for my own chef whites laundry each week"}
+    response = client.post(
+        "/api/tax-relief/stream", json=request_payload, headers={"Accept": "application/x-ndjson"}
+    )
+    assert json.loads(response.text.splitlines()[-1])["event"] == "done"
+    assert on_loop == [False]
+
+def test_batch_stream_retries_a_full_queue_without_losing_upload_lines(monkeypatch):
+    import asyncio
+
+    from app.config import get_settings
+    from app.routers import tax_relief
+    from app.services.inference_executor import InferenceQueueFullError, get_inference_executor
+
+    executor = get_inference_executor()
+    attempts = []
+
+    class FillingExecutor:
+        async def run(self, *args, **kwargs):
+            # Every chunk first finds the queue full, as if other jobs had filled it
+            attempts.append(len(args[1]))
+            if len(attempts) % 2:
+                raise InferenceQueueFullError(0)
+            return await executor.run(*args, **kwargs)
+
+    monkeypatch.setattr(tax_relief, "get_inference_executor", lambda: FillingExecutor())
+    # The first chunk is scored while the rest of the upload is still arriving
+    monkeypatch.setattr(get_settings(), "bulk_chunk_size", 3)
+    lines = [
+        json.dumps({"profession": "Chef", "questions": f"I wash my own chef whites {n}"}).encode() + b"\n"
+        for n in range(5)
+    ]
+    uploads = [b"".join(lines[:3]), lines[3], lines[4]]
+
+    async def call():
+        messages = [
+            {"type": "http.request", "body": body, "more_body": n < len(uploads) - 1}
+            for n, body in enumerate(uploads)
+        ]
+        sent = []
+
+        async def receive():
+            # Upload chunks are available at once, as a non-blocking receive would find them
+            if messages:
+                return messages.pop(0)
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": "/api/tax-relief/batch/stream",
+            "raw_path": b"/api/tax-relief/batch/stream", "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"testserver")], "client": ("10.0.0.1", 1234), "server": ("testserver", 80),
+        }
+        await app(scope, receive, send)
+        return b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+
+    results = [json.loads(line) for line in asyncio.run(call()).splitlines()]
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert all("recommendations" in result for result in results)
+    assert attempts == [3, 3, 2, 2]
@@ -0,0 +1,55 @@
+import threading
+
+from app.services.batching import BatchScheduler
+from app.services.llm_service import LLMService
+
+
+class RecordingScorer:
+    model_id = "recording"
+
+    def __init__(self):
+        self.batches = []
+
+    def score(self, pairs):
+        self.batches.append(list(pairs))
+        return [float(len(premise)) for premise, _ in pairs]
+
+
+def test_concurrent_callers_share_one_forward_pass():
+    scorer = RecordingScorer()
+    # A long window that only a full batch closes early
+    batcher = BatchScheduler(scorer, max_batch_size=8, max_wait_ms=10_000)
+    callers = 4
+    start = threading.Barrier(callers)
+    results = {}
+
+    def call(n):
+        pairs = [("x" * (n + 1), "a"), ("x" * (n + 1), "b")]
+        start.wait()
+        results[n] = batcher.score(pairs)
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    batcher.close()
+
+    assert len(scorer.batches) == 1 and len(scorer.batches[0]) == 8
+    assert results == {n: [float(n + 1)] * 2 for n in range(callers)}
+    assert batcher.stats() == {"batches": 1, "pairs": 8, "avg_batch_size": 8.0}
+
+
+def test_batching_needs_more_than_one_inference_worker(monkeypatch):
+    from app.config import get_settings
+    from app.services import nli_scorer
+
+    monkeypatch.setattr(nli_scorer.NLIScorer, "from_pretrained", staticmethod(lambda *a, **k: RecordingScorer()))
+    settings = get_settings()
+    monkeypatch.setattr(settings, "batching_enabled", True)
+    monkeypatch.setattr(settings, "cascade_model", "")
+
+    monkeypatch.setattr(settings, "inference_workers", 1)
+    assert isinstance(LLMService().scorer, RecordingScorer)
+    monkeypatch.setattr(settings, "inference_workers", 2)
+    assert isinstance(LLMService().scorer, BatchScheduler)
@@ -0,0 +1,83 @@
+from app.services import cache as cache_module
+from app.services.cache import BoundedCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def scan(cache, keys):
+    """Look up then store each key once, the way the service fills the cache on a miss"""
+    for key in keys:
+        cache.get(key)
+        cache.set(key, key)
+
+
+def test_entry_and_byte_bounds_evict_least_recent_first():
+    cache = BoundedCache(max_entries=3)
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.get("a") == "a"
+    cache.set("d", "d")
+    assert len(cache) == 3 and "b" not in cache and "a" in cache
+
+    sized = BoundedCache(max_entries=None, max_bytes=100, sizer=lambda value: value)
+    sized.set("x", 60)
+    sized.set("y", 30)
+    sized.set("z", 30)
+    assert "x" not in sized and sized.stats()["bytes"] == 60
+    # A value larger than the whole cache is never stored
+    sized.set("huge", 101)
+    assert "huge" not in sized and sized.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = BoundedCache(ttl=10)
+    cache.set("a", 1)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1 and len(cache) == 0
+
+
+def test_invalidate_tag_drops_only_tagged_entries():
+    cache = BoundedCache()
+    cache.set("chef-1", 1, tags=("Chef",))
+    cache.set("chef-2", 2, tags=("Chef", "hospitality"))
+    cache.set("nurse", 3, tags=("Nurse",))
+    assert cache.invalidate_tag("Chef") == 2
+    assert cache.invalidate_tag("hospitality") == 0
+    assert "nurse" in cache and len(cache) == 1
+    assert cache.invalidate("nurse") and not cache.invalidate("nurse")
+    assert cache.stats()["invalidations"] == 3
+
+
+def test_tinylfu_keeps_a_popular_entry_through_a_scan():
+    lru = BoundedCache(max_entries=100, policy="lru")
+    tinylfu = BoundedCache(max_entries=100, policy="tinylfu")
+    for cache in (lru, tinylfu):
+        scan(cache, ["popular"])
+        for _ in range(20):
+            cache.get("popular")
+        scan(cache, [f"once-{n}" for n in range(1000)])
+    assert "popular" not in lru
+    assert "popular" in tinylfu and len(tinylfu) == 100
+
+
+def test_stats_count_hits_misses_and_evictions():
+    cache = BoundedCache(max_entries=2)
+    scan(cache, ["a", "b", "c"])
+    cache.get("c")
+    cache.get("c", record=False)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert stats["hit_ratio"] == 0.25 and stats["entries"] == 2
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
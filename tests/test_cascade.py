@@ -0,0 +1,25 @@
+from app.services.cascade import CascadeScorer
+
+
+class FixedScorer:
+    def __init__(self, model_id, scores):
+        self.model_id = model_id
+        self.scores = scores
+        self.calls = []
+
+    def score(self, pairs):
+        self.calls.append(list(pairs))
+        return [self.scores[hypothesis] for _, hypothesis in pairs]
+
+
+def test_only_uncertain_pairs_are_escalated():
+    small = FixedScorer("small", {"clear yes": 0.9, "clear no": 0.02, "unsure": 0.35})
+    large = FixedScorer("large", {"clear yes": 0.8, "clear no": 0.1, "unsure": 0.7})
+    cascade = CascadeScorer(small, large, threshold=0.3, band=0.1)
+
+    pairs = [("premise", "clear yes"), ("premise", "unsure"), ("premise", "clear no")]
+    assert cascade.score(pairs) == [0.9, 0.7, 0.02]
+    assert large.calls == [[("premise", "unsure")]]
+    stats = cascade.stats()
+    assert stats["pairs"] == 3 and stats["escalated"] == 1
+    assert cascade.model_id == "small>large@0.1"
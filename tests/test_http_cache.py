@@ -0,0 +1,35 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.http_cache import accepts_gzip, etag_matches
+
+
+def test_accepts_gzip_honours_q_values():
+    assert accepts_gzip("gzip")
+    assert accepts_gzip("br, GZIP;q=0.5")
+    assert accepts_gzip("x-gzip")
+    assert accepts_gzip("*")
+    assert not accepts_gzip(None)
+    assert not accepts_gzip("")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip; q=0.000, *")
+    assert not accepts_gzip("*;q=0")
+    assert not accepts_gzip("gzip;q=bogus")
+
+
+def test_etag_matches_weakly():
+    assert etag_matches('W/"abc"', 'W/"abc"')
+    assert etag_matches('"xyz", "abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches('W/"abd"', 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+
+
+def test_refused_gzip_is_not_applied_by_middleware():
+    client = TestClient(app)
+    compressed = client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers.get("Content-Encoding") == "gzip"
+    refused = client.get("/metrics", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "Content-Encoding" not in refused.headers
+    assert refused.text.startswith("# HELP") and compressed.text.startswith("# HELP")
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.inference_executor import DeadlineExceededError, InferenceExecutor
+
+
+def work(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_bulk_timings_do_not_shed_interactive_requests():
+    async def main():
+        executor = InferenceExecutor(workers=1, max_queue=8)
+        await executor.run(work, 0.01)
+        for _ in range(3):
+            await executor.run(work, 0.3, kind="bulk")
+        stats = executor.stats()
+        assert stats["recent_service_seconds"] < 0.1
+        assert stats["recent_service_seconds_by_kind"]["bulk"] >= 0.3
+
+        # Idle pool: a single request's own timings decide, so it is admitted
+        assert await executor.run_within(0.1, work, 0.01) == 0.01
+
+        # Queued bulk work is weighed at bulk cost, so a tight deadline is shed
+        bulk = asyncio.ensure_future(executor.run(work, 0.3, kind="bulk"))
+        await asyncio.sleep(0.05)
+        assert executor.estimated_wait() >= 0.3
+        with pytest.raises(DeadlineExceededError):
+            await executor.run_within(0.1, work, 0.01)
+        await bulk
+        assert executor.stats()["shed"] == 1 and executor.estimated_wait() == 0.0
+        executor.shutdown()
+
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+import json
+
+from app.services.label_planner import GENERIC_CATEGORY_LABELS, plan_labels, rule_label
+from app.services.llm_service import HYPOTHESIS_TEMPLATE, LLMService
+from app.utils.data_loader import TaxRule, TaxRulesLoader
+
+RULES = [
+    TaxRule("Chef", "Uniform cleaning", "Washing your own chef whites", "hospitality"),
+    TaxRule("Chef", "Knives", "Buying your own kitchen knives", "hospitality"),
+    TaxRule("Chef", "Fees", "Food hygiene certificate fees", "hospitality"),
+]
+
+# Distinct scores that neither rise nor fall with the label position
+RULE_SCORES = {rule_label(RULES[0]): 0.2, rule_label(RULES[1]): 0.95, rule_label(RULES[2]): 0.6}
+GENERIC_SCORES = {label: round(0.05 + 0.01 * i, 2) for i, label in enumerate(reversed(GENERIC_CATEGORY_LABELS))}
+
+
+class LabelScorer:
+    """Scores each pair by its hypothesis, so a positional mix-up shows as wrong scores"""
+    model_id = "label"
+
+    def __init__(self):
+        self.hypotheses = []
+
+    def score(self, pairs):
+        scores = {HYPOTHESIS_TEMPLATE.format(label): score for label, score in {**RULE_SCORES, **GENERIC_SCORES}.items()}
+        self.hypotheses.extend(hypothesis for _, hypothesis in pairs)
+        return [scores[hypothesis] for _, hypothesis in pairs]
+
+
+def make_service(tmp_path):
+    rules = [{"profession": rule.profession, "name": rule.name, "criteria": rule.criteria} for rule in RULES]
+    (tmp_path / "hospitality_rules.json").write_text(json.dumps(rules))
+    scorer = LabelScorer()
+    service = LLMService(scorer=scorer, shared_tiers=False)
+    service.rules_loader = TaxRulesLoader(tmp_path)
+    service.prefilter.build(service.rules_loader.snapshot)
+    return service, scorer
+
+
+def test_plan_scores_each_label_once_and_generic_only_on_request():
+    plan = plan_labels(RULES + RULES[:1])
+    assert plan.labels == tuple(rule_label(rule) for rule in RULES)
+
+    labelled = plan_labels(RULES, include_generic=True)
+    assert labelled.labels == plan.labels + GENERIC_CATEGORY_LABELS
+    scores = {**RULE_SCORES, **GENERIC_SCORES}
+    assert list(labelled.rule_scores(scores)) == list(RULE_SCORES.items())
+    assert labelled.generic_scores(scores) == GENERIC_SCORES
+
+
+def test_recommend_maps_scores_by_label(tmp_path):
+    service, scorer = make_service(tmp_path)
+
+    result = service.recommend("Chef", "I buy my own knives and wash my whites")
+    assert result.recommendations[1:] == [
+        "• Knives: Buying your own kitchen knives\n  (Relevance: 95%)",
+        "• Fees: Food hygiene certificate fees\n  (Relevance: 60%)",
+    ]
+    # Generic category labels are not scored by default
+    assert sorted(scorer.hypotheses) == sorted(HYPOTHESIS_TEMPLATE.format(label) for label in RULE_SCORES)
+    assert result.categories is None
+
+
+def test_recommend_returns_categories_only_when_asked(tmp_path):
+    service, scorer = make_service(tmp_path)
+
+    result = service.recommend("Chef", "I buy my own knives", include_categories=True)
+    assert result.categories == GENERIC_SCORES
+    assert len(scorer.hypotheses) == len(RULE_SCORES) + len(GENERIC_SCORES)
+    assert "• Knives: Buying your own kitchen knives\n  (Relevance: 95%)" in result.recommendations
@@ -0,0 +1,64 @@
+import re
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+ROUTE_LABELS = 'method="POST",route="/api/tax-relief",status="200"'
+_SAMPLE_RE = re.compile(r"^([a-z_]+)(\{[^}]*\})? (\S+)$")
+
+
+def scrape():
+    """Every sample in /metrics, keyed by name and labels"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line.startswith("#"):
+            continue
+        name, labels, value = _SAMPLE_RE.match(line).groups()
+        samples[name + (labels or "")] = float(value)
+    return response.text, samples
+
+
+def test_request_reports_server_timing_and_metrics():
+    _, before = scrape()
+    response = client.post(
+        "/api/tax-relief",
+        json={"profession": "Chef", "questions": f"I buy my own aprons, order {uuid.uuid4()}"}
+    )
+    assert response.status_code == 200
+
+    timings = {}
+    for entry in response.headers["server-timing"].split(", "):
+        stage, duration = entry.split(";dur=")
+        timings[stage] = float(duration)
+    assert {"cache", "prefilter", "inference", "total"} <= set(timings)
+    assert list(timings)[-1] == "total"
+    assert all(duration >= 0 for duration in timings.values())
+    assert float(response.headers["x-process-time"]) > 0
+
+    text, after = scrape()
+    assert "# TYPE tax_relief_http_request_seconds histogram" in text
+    buckets = [
+        value for sample, value in after.items()
+        if sample.startswith(f"tax_relief_http_request_seconds_bucket{{{ROUTE_LABELS},le=")
+    ]
+    assert buckets == sorted(buckets) and len(buckets) > 1
+    count = after[f"tax_relief_http_request_seconds_count{{{ROUTE_LABELS}}}"]
+    assert after[f'tax_relief_http_request_seconds_bucket{{{ROUTE_LABELS},le="+Inf"}}'] == count
+    assert count == before.get(f"tax_relief_http_request_seconds_count{{{ROUTE_LABELS}}}", 0) + 1
+    assert after[f"tax_relief_http_request_seconds_sum{{{ROUTE_LABELS}}}"] > 0
+
+    # Every stage in the header was also added to the stage histogram
+    for stage in set(timings) - {"total"}:
+        name = f'tax_relief_stage_seconds_count{{stage="{stage}"}}'
+        assert after[name] > before.get(name, 0)
+
+    assert "# TYPE tax_relief_cache_misses_total counter" in text
+    assert after["tax_relief_cache_misses_total"] == before["tax_relief_cache_misses_total"] + 1
+    assert after["tax_relief_inference_completed_total"] > before["tax_relief_inference_completed_total"]
@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.nli_scorer import NLIScorer
+from benchmarks.tiny_nli import build_tiny_nli_model
+
+PAIRS = [
+    ("I am a Chef and want to know about tax relief for my own uniform", "This text describes Uniform expenses"),
+    ("I am a Nurse and want to know about tax relief for travel", "This text describes Professional fees"),
+    ("I am a Software Engineer", "This text describes equipment"),
+]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    return str(build_tiny_nli_model(tmp_path_factory.mktemp("tiny-nli")))
+
+
+@pytest.mark.parametrize("backend", ["int8", "onnx", "onnx-int8"])
+def test_backend_matches_fp32(model_path, backend, tmp_path):
+    if backend.startswith("onnx"):
+        pytest.importorskip("onnxruntime")
+    reference = NLIScorer.from_pretrained(model_path).score(PAIRS)
+    scorer = NLIScorer.from_pretrained(model_path, backend=backend, onnx_path=str(tmp_path / "model.onnx"))
+    assert scorer.model_id.endswith(f"@{backend}")
+    assert scorer.score(PAIRS) == pytest.approx(reference, abs=0.01)
+
+
+def test_cached_hypothesis_tokenization_matches_tokenizer(model_path):
+    scorer = NLIScorer.from_pretrained(model_path)
+    # A premise long enough to be truncated, and a repeated premise
+    pairs = PAIRS + [("tax relief " * 400, "This text describes equipment"), PAIRS[0]]
+    plain = scorer._tokenize_pairs(pairs)
+    for _ in range(2):
+        cached = scorer.tokenize(pairs)
+        assert set(cached) == set(plain)
+        for name in plain:
+            assert cached[name].tolist() == plain[name].tolist()
+
+
+@pytest.mark.parametrize("backend", ["fp32", "int8"])
+def test_torch_backends_apply_threads(model_path, backend):
+    import torch
+
+    previous = torch.get_num_threads()
+    threads = 2 if previous == 1 else 1
+    try:
+        NLIScorer.from_pretrained(model_path, backend=backend, threads=threads)
+        assert torch.get_num_threads() == threads
+    finally:
+        torch.set_num_threads(previous)
@@ -0,0 +1,94 @@
+import json
+import time
+
+from app.config import get_settings
+from app.services import persistent_cache
+from app.services.llm_service import LLMService
+from app.services.persistent_cache import SQLiteResultCache
+from app.utils.data_loader import TaxRulesLoader
+
+
+class CountingScorer:
+    model_id = "counting"
+
+    def __init__(self):
+        self.pairs = 0
+
+    def score(self, pairs):
+        self.pairs += len(pairs)
+        return [0.9] * len(pairs)
+
+
+def test_round_trip_and_model_keying(tmp_path):
+    path = tmp_path / "results.db"
+    cache = SQLiteResultCache(str(path), model_id="model-a")
+    assert cache.get("key") is None
+    cache.set("key", ["Uniform cleaning"], {"Uniform cleaning": 0.9})
+    cache.set("key", ["Knives"])
+    cache.set("other", ["Knives"])
+    assert cache.get("key") == (["Knives"], None)
+    assert cache.stats()["entries"] == 2 == len(cache)
+
+    # Another model shares the file but never sees these rows
+    other_model = SQLiteResultCache(str(path), model_id="model-b")
+    assert other_model.get("key") is None and other_model.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+    other_model.close()
+
+
+def test_ttl_expiry_and_prune(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(persistent_cache.time, "time", lambda: now[0])
+    cache = SQLiteResultCache(str(tmp_path / "results.db"), model_id="m", ttl=60, prune_interval=0)
+    cache.set("old", ["A"])
+    now[0] += 30
+    cache.set("new", ["B"])
+    now[0] += 40
+    assert cache.get("old") is None and cache.get("new") == (["B"], None)
+    assert cache.stats()["entries"] == 2
+
+    assert cache.prune() == 1
+    assert cache.stats()["entries"] == 1 == len(cache)
+    cache.close()
+
+
+def test_pruner_thread_runs_periodically(tmp_path):
+    cache = SQLiteResultCache(str(tmp_path / "results.db"), model_id="m", ttl=0.05, prune_interval=0.02)
+    cache.set("key", ["A"])
+    deadline = time.monotonic() + 5
+    while len(cache) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(cache) == 0
+    cache.close()
+    assert cache._pruner is None
+
+
+def test_service_reuses_rows_until_rules_change(tmp_path, monkeypatch):
+    rules = tmp_path / "rules"
+    rules.mkdir()
+    rules_file = rules / "hospitality_rules.json"
+    chef = {"profession": "Chef", "name": "Uniform cleaning", "criteria": "Washing your own chef whites"}
+    rules_file.write_text(json.dumps([chef]))
+    monkeypatch.setattr(get_settings(), "persistent_cache_path", str(tmp_path / "results.db"))
+    questions = "I wash my own chef whites at home"
+
+    def service_with(scorer):
+        service = LLMService(scorer=scorer)
+        service.rules_loader = TaxRulesLoader(rules)
+        return service
+
+    first = CountingScorer()
+    expected = service_with(first).recommend("Chef", questions).recommendations
+    assert first.pairs
+
+    # A new process with an empty memory cache finds the row on disk
+    second = CountingScorer()
+    assert service_with(second).recommend("Chef", questions).recommendations == expected
+    assert second.pairs == 0
+
+    # New rules give a new rules version, so the stored row no longer matches
+    rules_file.write_text(json.dumps([chef, {"profession": "Chef", "name": "Knives", "criteria": "Buying knives"}]))
+    third = CountingScorer()
+    service_with(third).recommend("Chef", questions)
+    assert third.pairs
@@ -0,0 +1,62 @@
+from app.services.prefilter import BM25Index, RulePrefilter, TrigramIndex
+from app.utils.data_loader import RulesSnapshot, TaxRule
+
+RULES = tuple(
+    TaxRule("Chef", name, criteria, "hospitality")
+    for name, criteria in [
+        ("Uniform cleaning", "Washing your own chef whites"),
+        ("Knives", "Buying your own kitchen knives"),
+        ("Fees", "Food hygiene certificate fees"),
+        ("Travel", "Travelling between kitchens for work"),
+        ("Books", "Recipe books for professional use"),
+        ("Shoes", "Safety shoes for the kitchen"),
+    ]
+)
+SNAPSHOT = RulesSnapshot(RULES, {"hospitality_rules.json": "v1"})
+
+
+def test_bm25_and_trigram_rank_the_matching_rule_first():
+    for index in (BM25Index(RULES), TrigramIndex(RULES)):
+        scores = index.scores("I wash my chef whites", RULES)
+        assert max(scores, key=scores.get) == RULES[0]
+        # Rules the index has never seen score zero
+        assert index.scores("knives", [TaxRule("Nurse", "Knives", "Knives", "medical")]) == {
+            TaxRule("Nurse", "Knives", "Knives", "medical"): 0.0
+        }
+
+    scores = BM25Index(RULES).scores("knives", RULES)
+    assert scores[RULES[1]] > 0 and all(scores[rule] == 0 for rule in RULES if rule is not RULES[1])
+
+
+def test_select_keeps_top_k_in_original_order():
+    prefilter = RulePrefilter("bm25", top_k=2)
+    prefilter.build(SNAPSHOT)
+    question = "safety shoes and knives for the kitchen"
+
+    ranked = prefilter.ranked(question, RULES, SNAPSHOT)
+    assert len(ranked) == 2 and set(ranked) == {RULES[1], RULES[5]}
+    assert prefilter.select(question, RULES, SNAPSHOT) == tuple(rule for rule in RULES if rule in ranked)
+
+    # Few enough rules are all kept
+    assert prefilter.select(question, RULES[:2], SNAPSHOT) == RULES[:2]
+
+
+def test_none_backend_selects_every_rule():
+    prefilter = RulePrefilter("none", top_k=2)
+    prefilter.build(SNAPSHOT)
+
+    assert prefilter.select("knives", RULES, SNAPSHOT) == RULES
+    assert prefilter.ranked("knives", RULES, SNAPSHOT) == RULES
+
+
+def test_index_is_rebuilt_when_the_rules_version_changes():
+    prefilter = RulePrefilter("trigram", top_k=1)
+    prefilter.build(SNAPSHOT)
+    index = prefilter._index
+    assert prefilter.select("knives", RULES, SNAPSHOT) == (RULES[1],)
+    assert prefilter._index is index
+
+    rules = RULES + (TaxRule("Chef", "Aprons", "Buying aprons for work", "hospitality"),)
+    snapshot = RulesSnapshot(rules, {"hospitality_rules.json": "v2"})
+    assert prefilter.select("aprons", rules, snapshot) == (rules[-1],)
+    assert prefilter._index is not index and prefilter._index_version == snapshot.version
@@ -0,0 +1,116 @@
+import difflib
+
+from app.services.profession_mapper import ProfessionMapper, ProfessionResolver
+from app.utils.data_loader import get_rules_loader
+
+# Real-world job titles: exact, aliases, casing, typos, seniority prefixes and unknowns
+JOB_TITLES = [
+    "Chef", "chef", "CHEF", "Head Chef", "Sous Chef", "Chef de Partie", "Pastry Chef", "Cook",
+    "Software Engineer", "software engineer", "Sofware Engineer", "Senior Software Engineer",
+    "Software Developer", "Software Dev", "SWE", "Coder", "Developer", "Programmer",
+    "Web Developer", "Frontend Developer", "Front End Developer", "Front-end Developer",
+    "Backend Developer", "Back End Developer", "Full Stack Developer", "Fullstack Developer",
+    "DevOps Engineer", "Devops engineer", "Site Reliability Engineer", "SRE",
+    "Data Scientist", "Data Analyst", "Data Engineer", "ML Engineer", "Machine Learning Engineer",
+    "AI Engineer", "AI Scientist", "Database Administrator", "DBA", "Systems Architect",
+    "Solutions Architect", "Enterprise Architect", "Cloud Architect", "CTO", "IT Consultant",
+    "Tech Consultant", "IT Technician", "IT Support", "Helpdesk Technician", "Network Engineer",
+    "Cybersecurity Specialist", "Security Analyst", "UI/UX Designer", "UX Designer", "UI Designer",
+    "Product Designer", "UX/UI Designer", "Web Designer", "Graphic Designer", "Visual Designer",
+    "Motion Designer", "Animator", "Game Developer", "Unity Developer", "Game Programmer",
+    "Doctor", "doctor", "Physician", "GP", "General Practitioner", "Surgeon", "Consultant",
+    "Nurse", "Staff Nurse", "Registered Nurse", "Dental Nurse", "Dentist", "Dental Hygienist",
+    "Physiotherapist", "Physio", "Physical Therapist", "Optometrist", "Paramedic", "Vet",
+    "Veterinarian", "Veterinary Surgeon", "Occupational Therapist", "Speech Therapist", "SLT",
+    "Pharmacist", "Midwife", "Care Assistant", "Healthcare Assistant",
+    "Electrician", "Electrican", "Plumber", "Carpenter", "Joiner", "Builder", "Bricklayer",
+    "Plasterer", "Painter", "Painter and Decorator", "Decorator", "Roofer", "Glazier",
+    "Scaffolder", "Site Manager", "Construction Worker", "Labourer", "Civil Engineer",
+    "Structural Engineer", "Mechanical Engineer", "Architect",
+    "Teacher", "Primary School Teacher", "Secondary Teacher", "Lecturer", "Professor",
+    "Teaching Assistant", "Tutor", "Music Teacher", "Dance Teacher", "Yoga Instructor",
+    "Driving Instructor", "Personal Trainer", "PT", "Fitness Instructor", "Sports Coach",
+    "Accountant", "Chartered Accountant", "Bookkeeper", "Financial Advisor", "Financial Planner",
+    "Wealth Manager", "Investment Banker", "Insurance Broker", "Business Analyst",
+    "Management Consultant", "Business Consultant", "Tax Consultant", "Mortgage Advisor",
+    "Risk Analyst", "Project Manager", "Marketing Manager", "Product Manager",
+    "Taxi Driver", "Uber Driver", "Bus Driver", "Pilot", "Airline Pilot", "Train Driver",
+    "Courier", "Delivery Driver", "HGV Driver", "Lorry Driver", "Truck Driver", "Fleet Manager",
+    "Logistics Coordinator", "Warehouse Operative",
+    "Hairdresser", "Hair Stylist", "Barber", "Beautician", "Beauty Therapist", "Hotel Manager",
+    "Restaurant Manager", "Waiter", "Bartender", "Event Planner", "Wedding Planner",
+    "Lawyer", "Solicitor", "Barrister", "Paralegal", "Legal Secretary", "Conveyancer",
+    "Journalist", "Reporter", "News Reporter", "TV Producer", "Radio Presenter", "Copywriter",
+    "Freelance Writer", "Photographer", "Videographer", "Video Editor", "Musician", "Actor",
+    "Voice Actor", "Artist", "Illustrator", "Content Creator", "YouTuber", "Influencer",
+    "Research Scientist", "Biochemist", "Lab Technician", "Laboratory Technician",
+    "Farmer", "Environmental Consultant", "Security Guard", "Door Supervisor",
+    "Private Investigator", "Firefighter", "Police Officer", "Counsellor", "Therapist",
+    "Psychotherapist", "Estate Agent", "Surveyor", "Astronaut", "xx", "Zookeeper",
+]
+
+
+def legacy_get_matching_profession(mapper: ProfessionMapper, input_profession: str) -> str:
+    """The original linear-scan implementation, kept as the parity reference"""
+    valid_professions = {rule.profession for rule in get_rules_loader().snapshot.rules}
+    input_lower = input_profession.lower()
+
+    if input_profession in valid_professions:
+        return input_profession
+
+    for main_profession, aliases in mapper.profession_aliases.items():
+        if input_lower in [alias.lower() for alias in aliases]:
+            if main_profession in valid_professions:
+                return main_profession
+
+    best_match = None
+    highest_ratio = 0
+    for group_name, professions in mapper.profession_groups.items():
+        for profession in professions:
+            ratio = difflib.SequenceMatcher(None, input_lower, profession.lower()).ratio()
+            if ratio > highest_ratio and profession in valid_professions:
+                highest_ratio = ratio
+                best_match = profession
+    if highest_ratio > 0.8:
+        return best_match
+
+    potential_groups = []
+    for group_name, professions in mapper.profession_groups.items():
+        group_words = set(' '.join(professions).lower().split())
+        input_words = set(input_lower.split())
+        if len(input_words & group_words) > 0:
+            potential_groups.append(group_name)
+
+    for group_name in potential_groups:
+        valid_group_profs = [p for p in mapper.profession_groups[group_name] if p in valid_professions]
+        matches = difflib.get_close_matches(input_profession, valid_group_profs, n=1, cutoff=0.6)
+        if matches:
+            return matches[0]
+
+    matches = difflib.get_close_matches(input_profession, valid_professions, n=1, cutoff=0.7)
+    if matches:
+        return matches[0]
+    return input_profession
+
+
+def test_resolver_matches_legacy_mapping():
+    mapper = ProfessionMapper()
+    mismatches = {
+        title: (mapper.get_matching_profession(title), legacy_get_matching_profession(mapper, title))
+        for title in JOB_TITLES
+        if mapper.get_matching_profession(title) != legacy_get_matching_profession(mapper, title)
+    }
+    assert mismatches == {}
+
+
+def test_resolver_memo_is_bounded():
+    mapper = ProfessionMapper()
+    resolver = ProfessionResolver(
+        get_rules_loader().snapshot.professions,
+        mapper.profession_groups,
+        mapper.profession_aliases,
+        memo_size=8
+    )
+    results = {title: resolver.resolve(title) for title in JOB_TITLES}
+    assert len(resolver._memo) == 8
+    assert all(resolver.resolve(title) == mapped for title, mapped in results.items())
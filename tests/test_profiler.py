@@ -0,0 +1,85 @@
+import asyncio
+import cProfile
+import pstats
+import time
+
+from app.middleware.profiling import ProfilingMiddleware
+from app.services.profiler import Profiler, call_profiled
+
+
+def busy_work():
+    deadline = time.perf_counter() + 0.05
+    blocks = []
+    while time.perf_counter() < deadline:
+        blocks.append(bytearray(1024))
+    return blocks
+
+
+async def handle_request():
+    await asyncio.sleep(0)
+    # Inference jobs run on another thread in a copy of the request's context
+    return await asyncio.to_thread(call_profiled, busy_work)
+
+
+def test_session_collects_request_profiles_stacks_and_allocations(tmp_path):
+    profiler = Profiler()
+    assert not profiler.sample_request()
+
+    profiler.start(duration=30, fraction=1.0, memory=True, interval_ms=1)
+    assert profiler.sample_request()
+    blocks = asyncio.run(profiler.profile_request(handle_request()))
+    status = profiler.stop()
+    assert not profiler.active and not profiler.sample_request()
+    assert status["profiled_requests"] == 1 and status["stack_samples"] > 0
+
+    path = tmp_path / "profile.pstats"
+    path.write_bytes(profiler.pstats_dump())
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert {"handle_request", "busy_work"} <= functions
+
+    stacks = profiler.collapsed_stacks().splitlines()
+    assert any("busy_work" in line for line in stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert "test_profiler.py" in profiler.collapsed_memory()
+    del blocks
+
+
+class ExclusiveProfile(cProfile.Profile):
+    """cProfile as on Python 3.12+, where only one may be enabled in the process"""
+    enabled = 0
+
+    def enable(self, *args, **kwargs):
+        if ExclusiveProfile.enabled:
+            raise ValueError("Another profiling tool is already active")
+        super().enable(*args, **kwargs)
+        ExclusiveProfile.enabled += 1
+        self.on = True
+
+    def disable(self):
+        super().disable()
+        if getattr(self, "on", False):
+            ExclusiveProfile.enabled -= 1
+            self.on = False
+
+
+def test_concurrent_sampled_requests_never_enable_two_profiles(monkeypatch):
+    monkeypatch.setattr(cProfile, "Profile", ExclusiveProfile)
+    profiler = Profiler()
+    profiler.start(duration=30, fraction=1.0, stacks=False)
+
+    async def app(scope, receive, send):
+        await handle_request()
+
+    middleware = ProfilingMiddleware(app)
+    middleware.profiler = profiler
+
+    async def main():
+        scope = {"type": "http", "path": "/api/tax-relief"}
+        await asyncio.gather(*(middleware(scope, None, None) for _ in range(2)))
+
+    asyncio.run(main())
+    status = profiler.stop()
+    assert status["profiled_requests"] == 1 and status["skipped_requests"] == 1
+    assert ExclusiveProfile.enabled == 0
+    # The profiled request's inference job waited for its own step's profile to be switched off
+    assert "busy_work" in profiler.top_functions(50)
@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import rate_limit
+from app.middleware.rate_limit import InMemoryBackend, RateLimiter, SQLiteBackend, _take
+
+
+def test_bucket_refills_at_rate_up_to_capacity():
+    # Full bucket: take one
+    assert _take(2.0, 0.0, 0.0, capacity=2.0, rate=1.0) == (1.0, 0.0)
+    # Empty bucket: half a second of refill leaves half a token short
+    assert _take(0.0, 0.0, 0.5, capacity=2.0, rate=1.0) == (0.5, 0.5)
+    # Long idle: refill stops at capacity
+    assert _take(0.0, 0.0, 100.0, capacity=2.0, rate=1.0) == (1.0, 0.0)
+    # A clock that went backwards adds nothing
+    assert _take(0.0, 10.0, 5.0, capacity=2.0, rate=1.0) == (0.0, 1.0)
+
+
+def test_limited_requests_get_429_with_retry_after():
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    app.add_middleware(RateLimiter, requests_per_minute=1, burst=2, backend=InMemoryBackend())
+    client = TestClient(app)
+    assert [client.get("/ping").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/ping")
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+
+
+def test_memory_backend_forgets_least_recent_clients():
+    backend = InMemoryBackend(max_clients=2)
+    backend.acquire("a", 1.0, 0.001)
+    backend.acquire("b", 1.0, 0.001)
+    backend.acquire("a", 1.0, 0.001)
+    backend.acquire("c", 1.0, 0.001)
+    assert len(backend) == 2
+    # "a" is still empty; "b" was forgotten and starts with a full bucket
+    assert backend.acquire("a", 1.0, 0.001) > 0
+    assert backend.acquire("b", 1.0, 0.001) == 0.0
+
+
+def test_sqlite_cleanup_drops_refilled_and_excess_buckets(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    backend = SQLiteBackend(str(tmp_path / "limits.db"), max_clients=2, cleanup_interval=60)
+    backend.acquire("first", 2.0, 1.0)
+    backend._cleanup_thread.join()
+    now[0] += 1
+    for client in ("a", "b", "c"):
+        backend.acquire(client, 2.0, 1.0)
+        now[0] += 1
+    assert len(backend) == 4
+
+    now[0] += 60
+    backend.acquire("d", 2.0, 1.0)
+    backend._cleanup_thread.join()
+    # Everything but "d" has refilled; the new request is kept
+    assert len(backend) == 1
+
+
+def test_sqlite_backend_shares_buckets_and_falls_back_when_locked(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    assert first.acquire("client", 1.0, 0.001) == 0.0
+    assert second.acquire("client", 1.0, 0.001) > 0
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        # The shared bucket is empty, but the local fallback one is not
+        assert second.acquire("client", 1.0, 0.001) == 0.0
+        assert second.fallbacks == 1
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+
+
+def test_sqlite_backend_reconnects_after_fork(tmp_path, monkeypatch):
+    backend = SQLiteBackend(str(tmp_path / "limits.db"))
+    parent_conn = backend._connection()
+    assert backend._connection() is parent_conn
+    monkeypatch.setattr(rate_limit.os, "getpid", lambda: -1)
+    child_conn = backend._connection()
+    assert child_conn is not parent_conn
+    assert backend.acquire("client", 1.0, 1.0) == 0.0
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        rate_limit.create_rate_limit_backend("redis")
+    with pytest.raises(ValueError):
+        rate_limit.create_rate_limit_backend("sqlite")
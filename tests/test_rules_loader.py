@@ -0,0 +1,131 @@
+import json
+import os
+
+from app.services.llm_service import LLMService
+from app.utils.data_loader import RulesSnapshot, TaxRule, TaxRulesLoader
+
+CHEF_RULES = [
+    {"profession": "Chef", "name": "Uniform cleaning", "criteria": "Washing your own chef whites"},
+    {"profession": "Chef", "name": "Knives", "criteria": "Buying your own kitchen knives"},
+]
+NURSE_RULES = [
+    {"profession": "Nurse", "name": "Uniform cleaning", "criteria": "Washing your own nurse uniform"},
+]
+
+
+class CountingScorer:
+    model_id = "counting"
+
+    def __init__(self):
+        self.pairs = 0
+
+    def score(self, pairs):
+        self.pairs += len(pairs)
+        return [0.9] * len(pairs)
+
+
+def write_rules(directory, name, rules, mtime=None):
+    path = directory / f"{name}_rules.json"
+    path.write_text(json.dumps(rules))
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return path
+
+
+def test_snapshot_indexes_rules_and_hashes_content(tmp_path):
+    write_rules(tmp_path, "hospitality", CHEF_RULES)
+    write_rules(tmp_path, "medical", NURSE_RULES)
+
+    snapshot = RulesSnapshot.from_directory(tmp_path)
+    assert len(snapshot) == 3 and snapshot.professions == {"Chef", "Nurse"}
+    assert snapshot.rules_for_profession("chef") == snapshot.by_profession["Chef"]
+    assert [rule.category for rule in snapshot.rules_for_category("Medical")] == ["medical"]
+    assert RulesSnapshot.from_directory(tmp_path).version == snapshot.version
+
+    write_rules(tmp_path, "medical", NURSE_RULES + [{"profession": "Nurse", "name": "Fees", "criteria": "NMC fees"}])
+    changed = RulesSnapshot.from_directory(tmp_path)
+    assert changed.version != snapshot.version
+    assert snapshot.changed_professions(changed) == {"Nurse"}
+
+
+def test_reload_swaps_snapshot_and_notifies_only_on_content_change(tmp_path):
+    write_rules(tmp_path, "hospitality", CHEF_RULES, mtime=1_000_000_000)
+    loader = TaxRulesLoader(tmp_path)
+    calls = []
+    loader.add_reload_listener(lambda changed, old, new: calls.append((changed, old.version, new.version)))
+    first = loader.snapshot
+    assert not loader.has_changed()
+
+    # Touched but identical content: no swap, no notification
+    write_rules(tmp_path, "hospitality", CHEF_RULES, mtime=2_000_000_000)
+    assert loader.has_changed()
+    assert loader.reload() == set() and loader.snapshot is first and not calls
+
+    write_rules(tmp_path, "medical", NURSE_RULES)
+    assert loader.reload() == {"Nurse"}
+    assert loader.snapshot is not first and len(loader.snapshot) == 3
+    assert calls == [({"Nurse"}, first.version, loader.snapshot.version)]
+
+    # A broken file keeps the current snapshot
+    current = loader.snapshot
+    (tmp_path / "medical_rules.json").write_text("[not json")
+    assert loader.reload(force=True) == set() and loader.snapshot is current
+
+
+def test_reload_invalidates_changed_professions_and_versions_their_keys(tmp_path):
+    write_rules(tmp_path, "hospitality", CHEF_RULES)
+    write_rules(tmp_path, "medical", NURSE_RULES)
+    loader = TaxRulesLoader(tmp_path)
+    scorer = CountingScorer()
+    service = LLMService(scorer=scorer)
+    service.rules_loader = loader
+    loader.add_reload_listener(service._on_rules_reloaded)
+
+    chef_questions = "I wash my own chef whites at home"
+    nurse_questions = "I wash my own nurse uniform at home"
+    service.recommend("Chef", chef_questions)
+    service.recommend("Nurse", nurse_questions)
+    scored = scorer.pairs
+    old_snapshot = loader.snapshot
+    _, old_rules, old_version = service._resolve_rules("Nurse")
+
+    write_rules(tmp_path, "medical", NURSE_RULES + [{"profession": "Nurse", "name": "Fees", "criteria": "NMC fees"}])
+    assert loader.reload() == {"Nurse"}
+    assert service.cache_stats()["entries"] == 1
+
+    # Chef's rules and key are unchanged, so it is still a cache hit
+    service.recommend("Chef", chef_questions)
+    assert scorer.pairs == scored
+    service.recommend("Nurse", nurse_questions)
+    assert scorer.pairs > scored
+
+    _, new_rules, new_version = service._resolve_rules("Nurse")
+    assert new_version != old_version
+    # A thread still holding the old snapshot cannot hand its version to the new one
+    assert service._rules_version(old_snapshot, "Nurse", old_rules) == old_version
+    assert service._rules_version(loader.snapshot, "Nurse", new_rules) == new_version
+    assert service._rules_version(loader.snapshot, "Nurse", old_rules) == old_version
+
+
+def test_tax_rule_is_immutable_and_hashable():
+    rule = TaxRule("Chef", "Knives", "Buying knives", "hospitality")
+    assert rule == TaxRule("Chef", "Knives", "Buying knives", "hospitality")
+    assert len({rule, TaxRule("Chef", "Knives", "Buying knives", "hospitality")}) == 1
+    try:
+        rule.name = "Other"
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("TaxRule allowed assignment")
+
+
+def test_failed_initial_parse_is_retried(tmp_path):
+    (tmp_path / "hospitality_rules.json").write_text("[not json")
+    loader = TaxRulesLoader(tmp_path)
+    assert len(loader.snapshot) == 0
+
+    # Nothing was touched since, but the failed parse must still be retried
+    assert loader.has_changed()
+    write_rules(tmp_path, "hospitality", CHEF_RULES)
+    assert loader.reload() == {"Chef"}
+    assert len(loader.snapshot) == 2 and not loader.has_changed()
@@ -0,0 +1,39 @@
+from app.services.semantic_cache import HashingEncoder, SemanticCache
+
+
+def test_paraphrase_reuses_result_in_same_partition():
+    cache = SemanticCache(HashingEncoder(), threshold=0.9)
+    cache.add(("Chef", "v1", False), "I wash my own chef uniform", "key-1")
+
+    assert cache.find(("Chef", "v1", False), "I clean my chef's uniform myself")[0] == "key-1"
+    assert cache.find(("Chef", "v1", False), "I buy my own kitchen knives") is None
+    # Other professions and rules versions never share results
+    assert cache.find(("Nurse", "v1", False), "I wash my own chef uniform") is None
+    assert cache.find(("Chef", "v2", False), "I wash my own chef uniform") is None
+
+
+def test_partition_overwrites_oldest_when_full():
+    cache = SemanticCache(HashingEncoder(), threshold=0.99, max_entries=2)
+    partition = ("Chef", "v1", False)
+    for i, question in enumerate(["knives", "uniform", "food hygiene certificate"]):
+        cache.add(partition, question, f"key-{i}")
+
+    assert cache.find(partition, "knives") is None
+    assert cache.find(partition, "food hygiene certificate")[0] == "key-2"
+    assert cache.stats()["entries"] == 2
+
+
+def test_partition_dropped_while_encoding_is_a_miss():
+    partition = ("Chef", "v1", False)
+
+    class InvalidatingEncoder(HashingEncoder):
+        def encode(self, text):
+            if text == "knives again":
+                cache.invalidate_professions({"Chef"})
+            return super().encode(text)
+
+    cache = SemanticCache(InvalidatingEncoder(), threshold=0.5)
+    cache.add(partition, "knives", "key-1")
+
+    assert cache.find(partition, "knives again") is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.services.inference_executor import DeadlineExceededError
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def main():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        assert results == ["result"] * 5 and len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 4, "retried": 0}
+        # Finished flights are not reused
+        assert await flight.do("key", work) == "result" and len(calls) == 2
+
+    asyncio.run(main())
+
+
+def test_errors_reach_every_joiner():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(flight) == 0
+
+    asyncio.run(main())
+
+
+def test_joiner_retries_when_the_leader_missed_its_own_deadline():
+    async def main():
+        flight = SingleFlight()
+
+        async def shed():
+            await asyncio.sleep(0.01)
+            raise DeadlineExceededError(1)
+
+        async def work():
+            return "result"
+
+        leader = asyncio.ensure_future(flight.do("key", shed, retry_on=(DeadlineExceededError,)))
+        await asyncio.sleep(0)
+        joiner = flight.do("key", work, retry_on=(DeadlineExceededError,))
+        assert await joiner == "result"
+        with pytest.raises(DeadlineExceededError):
+            await leader
+        assert flight.retried == 1
+
+    asyncio.run(main())
+
+
+def test_cancelling_the_leader_does_not_cancel_the_work():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "result"
+
+        leader = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        joiner = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await joiner == "result"
+        assert leader.cancelled() and flight.stats()["started"] == 1
+
+    asyncio.run(main())